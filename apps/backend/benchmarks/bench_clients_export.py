@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Vazão (linhas/s) de GET /api/clients/export (NDJSON a partir de cursor no
+servidor) e da paginação keyset de GET /api/clients, mais o pico de memória
+alocada durante a exportação (tracemalloc) para tabelas de tamanhos
+diferentes — deve ficar constante.
+
+Uso (a partir de apps/backend):
+    python -m benchmarks.bench_clients_export --rows 50000,200000 --chunk-size 1000
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+import httpx  # noqa: E402
+from sqlalchemy import create_engine, insert  # noqa: E402
+
+from benchmarks.bench_client_search import INSERT_BATCH, _row  # noqa: E402
+
+
+def _seed(url: str, rows: int) -> None:
+    from email_classifier_llm.models.client import Base, Client
+
+    engine = create_engine(url)
+    Base.metadata.create_all(engine)
+    rng = random.Random(42)
+    with engine.begin() as conn:
+        for start in range(0, rows, INSERT_BATCH):
+            conn.execute(insert(Client), [_row(i, rng) for i in range(start, min(start + INSERT_BATCH, rows))])
+    engine.dispose()
+
+
+async def _export(chunk_size: int) -> int:
+    # Consome o body_iterator da StreamingResponse diretamente: o ASGITransport
+    # do httpx acumula a resposta inteira e distorceria a medida de memória
+    from email_classifier_llm.routers.clients import export_clients
+
+    response = await export_clients(chunk_size=chunk_size)
+    lines = 0
+    async for chunk in response.body_iterator:
+        lines += chunk.count(b"\n")
+    return lines
+
+
+async def _paginate(client: httpx.AsyncClient) -> int:
+    total, cursor = 0, None
+    while True:
+        params = {"limit": 100, **({"after": cursor} if cursor is not None else {})}
+        body = (await client.get("/api/clients", params=params)).json()
+        total += body["count"]
+        cursor = body["next_cursor"]
+        if cursor is None:
+            return total
+
+
+async def _run(rows: int, chunk_size: int) -> dict:
+    from fastapi import FastAPI
+
+    from email_classifier_llm.database import close_db
+    from email_classifier_llm.routers.clients import router
+
+    app = FastAPI()
+    app.include_router(router, prefix="/api")
+    result = {"rows": rows}
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench", timeout=None) as client:
+        start = time.perf_counter()
+        exported = await _export(chunk_size)
+        result["export_rows_s"] = round(exported / (time.perf_counter() - start))
+
+        start = time.perf_counter()
+        paged = await _paginate(client)
+        result["keyset_rows_s"] = round(paged / (time.perf_counter() - start))
+
+        tracemalloc.start()
+        await _export(chunk_size)
+        result["export_peak_mib"] = round(tracemalloc.get_traced_memory()[1] / 2**20, 2)
+        tracemalloc.stop()
+    assert exported == paged == rows, (exported, paged, rows)
+    await close_db()
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", default="50000,200000", help="Tamanhos de tabela separados por vírgula")
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    from core.config import get_settings
+
+    for rows in (int(value) for value in args.rows.split(",")):
+        with tempfile.TemporaryDirectory() as tmp:
+            url = f"sqlite:///{Path(tmp) / 'clients.db'}"
+            _seed(url, rows)
+            os.environ.update(ENABLE_DB="true", DATABASE_URL=url, CLIENT_CACHE_ENABLED="false")
+            get_settings.cache_clear()
+            result = asyncio.run(_run(rows, args.chunk_size))
+            print("  ".join(f"{k}={v}" for k, v in result.items()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Latência de /api/clients/search com e sem chamadas ao LLM em andamento,
+comparando o caminho antigo (Session síncrona dentro de handler async, que
+bloqueia o event loop) com o AsyncEngine/AsyncSession atual.
+
+O banco é um SQLite em arquivo com N clientes (busca por `ilike` faz full
+scan, então cada consulta custa dezenas de ms); o LLM é o servidor fake do
+Gemini com latência fixa, chamado pelo GoogleClient real. Tudo roda no mesmo
+event loop (httpx.ASGITransport), então bloqueios aparecem nas medidas: no
+modo `sync` a busca bloqueia o loop e as chamadas ao LLM em andamento ficam
+paradas atrás dela; no modo `async` a busca não para o resto da aplicação.
+
+Uso (a partir de apps/backend):
+    python -m benchmarks.bench_clients_search_concurrency --rows 20000 --llm-inflight 16
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from datetime import date
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+import httpx  # noqa: E402
+
+from benchmarks.fake_gemini import FakeGeminiServer  # noqa: E402
+
+FIRST_NAMES = ["Maria", "João", "Ana", "Pedro", "Lucas", "Juliana", "Carlos", "Fernanda"]
+LAST_NAMES = ["Silva", "Souza", "Oliveira", "Lima", "Pereira", "Costa", "Almeida", "Ribeiro"]
+
+
+def _seed(url: str, rows: int) -> None:
+    from sqlalchemy import create_engine, insert
+
+    from email_classifier_llm.models.client import Base, Client
+
+    engine = create_engine(url)
+    Base.metadata.create_all(engine)
+    values = [
+        {
+            "nome_completo": f"{FIRST_NAMES[i % 8]} {LAST_NAMES[(i // 8) % 8]} {i}",
+            "cpf": f"{i:011d}",
+            "data_nascimento": date(1970 + i % 40, 1 + i % 12, 1 + i % 28),
+            "numero_cliente": f"CLI{i:07d}",
+            "email": f"cliente{i}@example.com",
+            "perfil_investidor": "Moderado",
+            "plano_contratual_em_dia": True,
+        }
+        for i in range(rows)
+    ]
+    with engine.begin() as conn:
+        conn.execute(insert(Client), values)
+    engine.dispose()
+
+
+def _legacy_app(url: str):
+    """Handler como era antes: async def chamando a Session síncrona."""
+    from fastapi import FastAPI
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import Session
+
+    from email_classifier_llm.services.client_service import ClientService
+
+    engine = create_engine(url)
+    legacy = FastAPI()
+
+    @legacy.get("/api/clients/search")
+    async def search(q: str):
+        with Session(engine) as db:
+            clients = ClientService(db).search_clients(q)
+            return {"success": True, "count": len(clients), "clients": [c.to_dict() for c in clients]}
+
+    return legacy, engine
+
+
+def _pct(samples: list[float], q: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * q))] * 1000
+
+
+async def _measure(search_client: httpx.AsyncClient, api: httpx.AsyncClient, *, rows: int, searches: int,
+                   concurrency: int, llm_inflight: int) -> dict:
+    stop = asyncio.Event()
+    llm_latencies: list[float] = []
+
+    async def llm_caller(n: int) -> None:
+        while not stop.is_set():
+            start = time.perf_counter()
+            await api.post("/api/classify", data={"text": f"Preciso do boleto {n}", "no_cache": "true"})
+            llm_latencies.append(time.perf_counter() - start)
+
+    callers = [asyncio.create_task(llm_caller(n)) for n in range(llm_inflight)]
+    await asyncio.sleep(0.2 if llm_inflight else 0)
+
+    latencies: list[float] = []
+    queue = iter(range(searches))
+
+    async def searcher() -> None:
+        for n in queue:
+            start = time.perf_counter()
+            # Email exato: poucos resultados, a consulta percorre a tabela inteira
+            resp = await search_client.get("/api/clients/search", params={"q": f"cliente{n * 7919 % rows}@"})
+            resp.raise_for_status()
+            latencies.append(time.perf_counter() - start)
+
+    await asyncio.gather(*(searcher() for _ in range(concurrency)))
+    stop.set()
+    await asyncio.gather(*callers)
+    result = {
+        "search_p50_ms": round(_pct(latencies, 0.50), 2),
+        "search_p95_ms": round(_pct(latencies, 0.95), 2),
+    }
+    if llm_latencies:
+        result["llm_p50_ms"] = round(_pct(llm_latencies, 0.50), 2)
+        result["llm_p95_ms"] = round(_pct(llm_latencies, 0.95), 2)
+    return result
+
+
+async def _run(url: str, args: argparse.Namespace) -> None:
+    from email_classifier_llm.database import close_db
+    from email_classifier_llm.main import app
+    from email_classifier_llm.services.llm_client import close_llm_clients
+
+    legacy, legacy_engine = _legacy_app(url)
+    transports = {"sync": httpx.ASGITransport(app=legacy), "async": httpx.ASGITransport(app=app)}
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as api:
+        for mode, transport in transports.items():
+            async with httpx.AsyncClient(transport=transport, base_url="http://bench") as search_client:
+                for inflight in (0, args.llm_inflight):
+                    result = await _measure(search_client, api, rows=args.rows, searches=args.searches,
+                                            concurrency=args.concurrency, llm_inflight=inflight)
+                    print(f"{mode:<6} llm_em_andamento={inflight:<4}", "  ".join(f"{k}={v}" for k, v in result.items()))
+    legacy_engine.dispose()
+    await close_llm_clients()
+    await close_db()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=20_000)
+    parser.add_argument("--searches", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=1)
+    parser.add_argument("--llm-inflight", type=int, default=16)
+    parser.add_argument("--llm-latency", type=float, default=0.2, help="Latência do LLM fake em segundos")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp, FakeGeminiServer(delay=args.llm_latency) as server:
+        url = f"sqlite:///{Path(tmp) / 'clients.db'}"
+        _seed(url, args.rows)
+        os.environ.update(
+            ENABLE_DB="true",
+            DATABASE_URL=url,
+            GEMINI_API_KEY="bench",
+            GEMINI_BASE_URL=server.base_url,
+            CLASSIFICATION_CACHE_ENABLED="false",
+            EXTRACTION_POOL="inline",
+        )
+        print(f"clientes={args.rows} buscas={args.searches} concorrência={args.concurrency} "
+              f"latência_llm={args.llm_latency * 1000:.0f}ms")
+        asyncio.run(_run(url, args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Latência de requisições pequenas de texto (e lag do event loop) enquanto PDFs
+grandes são enviados em paralelo, comparando a extração no próprio loop
+("inline", comportamento antigo) com os pools de threads e de processos.
+
+O LLM é substituído por um stub com latência fixa; o app roda no mesmo
+event loop do cliente (httpx.ASGITransport), então qualquer bloqueio aparece
+diretamente nas medidas.
+
+Uso (a partir de apps/backend):
+    python -m benchmarks.bench_event_loop_extraction --pages 80 --uploaders 2
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+import httpx  # noqa: E402
+
+from benchmarks.pdf_fixtures import make_text_pdf  # noqa: E402
+
+
+class _StubLLM:
+    model = "stub"
+    prompt_version = "v1"
+
+    async def classify(self, text):
+        await asyncio.sleep(0.005)
+        return {"category": "Produtivo", "reason": "stub", "suggested_reply": "ok"}
+
+
+def _pct(samples: list[float], q: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * q))] * 1000
+
+
+async def _monitor_lag(stop: asyncio.Event, lags: list[float], interval: float = 0.005) -> None:
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        start = loop.time()
+        await asyncio.sleep(interval)
+        lags.append(max(0.0, loop.time() - start - interval))
+
+
+async def _run_mode(mode: str, pdf: bytes, uploaders: int, uploads_each: int, workers: int) -> dict:
+    from core.config import get_settings
+    from email_classifier_llm.main import app
+    from email_classifier_llm.services import extraction_pool, pipeline
+
+    os.environ.update(EXTRACTION_POOL=mode, EXTRACTION_WORKERS=str(workers), EXTRACTION_MAX_PAGES="1000")
+    get_settings.cache_clear()
+    extraction_pool.close_extraction_pool()
+    pipeline.get_llm_client = lambda: _StubLLM()
+    await extraction_pool.get_extraction_pool().warm()
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        stop = asyncio.Event()
+        lags: list[float] = []
+        latencies: list[float] = []
+
+        async def uploader() -> None:
+            for _ in range(uploads_each):
+                await client.post("/api/classify", files={"file": ("big.pdf", pdf, "application/pdf")},
+                                  data={"no_cache": "true"})
+
+        async def prober() -> None:
+            n = 0
+            while not stop.is_set():
+                n += 1
+                start = time.perf_counter()
+                await client.post("/api/classify", data={"text": f"Olá, preciso do boleto {n}", "no_cache": "true"})
+                latencies.append(time.perf_counter() - start)
+                await asyncio.sleep(0.01)
+
+        monitor = asyncio.create_task(_monitor_lag(stop, lags))
+        probe = asyncio.create_task(prober())
+        started = time.perf_counter()
+        await asyncio.gather(*(uploader() for _ in range(uploaders)))
+        elapsed = time.perf_counter() - started
+        stop.set()
+        await asyncio.gather(monitor, probe)
+
+    extraction_pool.close_extraction_pool()
+    return {
+        "mode": mode,
+        "pdf_uploads": uploaders * uploads_each,
+        "elapsed_s": round(elapsed, 2),
+        "text_requests": len(latencies),
+        "text_p50_ms": round(_pct(latencies, 0.50), 2),
+        "text_p99_ms": round(_pct(latencies, 0.99), 2),
+        "text_max_ms": round(max(latencies) * 1000, 2),
+        "loop_lag_max_ms": round(max(lags) * 1000, 2),
+        "loop_lag_mean_ms": round(statistics.fmean(lags) * 1000, 3),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=80)
+    parser.add_argument("--uploaders", type=int, default=2)
+    parser.add_argument("--uploads-each", type=int, default=2)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--modes", default="inline,thread,process")
+    args = parser.parse_args()
+
+    pdf = make_text_pdf(args.pages)
+    print(f"PDF: {args.pages} páginas, {len(pdf) / 1024:.0f} KiB")
+    for mode in args.modes.split(","):
+        result = asyncio.run(_run_mode(mode, pdf, args.uploaders, args.uploads_each, args.workers))
+        print("  ".join(f"{k}={v}" for k, v in result.items()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Cauda de latência de GoogleClient.classify com e sem hedging, contra o
+servidor fake com gerações lentas ocasionais (`--tail-ratio` das chamadas
+demoram `--tail-delay`). Reporta p50/p99 e a fração de chamadas extras.
+
+Uso (a partir de apps/backend):
+    python -m benchmarks.bench_hedging --requests 1000 --tail-ratio 0.03 --tail-delay 1.0
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from benchmarks.fake_gemini import FakeGeminiServer  # noqa: E402
+
+
+async def _run(requests: int, concurrency: int) -> list[float]:
+    from email_classifier_llm.services import llm_client
+
+    client = llm_client.get_llm_client()
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: list[float] = []
+
+    async def one(i: int) -> None:
+        async with semaphore:
+            start = time.perf_counter()
+            await client.classify(f"Preciso da segunda via do boleto {i}")
+            latencies.append(time.perf_counter() - start)
+
+    await asyncio.gather(*(one(i) for i in range(requests)))
+    await llm_client.close_llm_clients()
+    return latencies
+
+
+def _mode(name: str, server: FakeGeminiServer, args: argparse.Namespace, hedging: bool) -> None:
+    from core.config import get_settings
+    from email_classifier_llm.services.hedging import get_hedger
+    from email_classifier_llm.services.rate_limiter import get_rate_limiter
+
+    os.environ["LLM_HEDGING_ENABLED"] = str(hedging).lower()
+    get_settings.cache_clear()
+    get_hedger.cache_clear()
+    get_rate_limiter.cache_clear()
+    server.random.seed(0)
+    before = server.requests
+    latencies = sorted(s * 1000 for s in asyncio.run(_run(args.requests, args.concurrency)))
+    extra = (server.requests - before - args.requests) / args.requests
+    hedger = get_hedger()
+    print(
+        f"{name:<12} p50={statistics.median(latencies):.0f}ms p99={latencies[int(len(latencies) * 0.99) - 1]:.0f}ms "
+        f"max={latencies[-1]:.0f}ms chamadas_extras={extra:.1%}"
+        + (f" hedges={hedger.counters['hedged']} vencidos_pelo_hedge={hedger.counters['hedge_wins']}" if hedger else "")
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--delay", type=float, default=0.05, help="Latência normal do modelo (s)")
+    parser.add_argument("--tail-ratio", type=float, default=0.03)
+    parser.add_argument("--tail-delay", type=float, default=1.0)
+    args = parser.parse_args()
+
+    with FakeGeminiServer(delay=args.delay, tail_ratio=args.tail_ratio, tail_delay=args.tail_delay) as server:
+        # Sem RPM/TPM: o benchmark mede só a cauda de latência, não a cota
+        os.environ.update(GEMINI_API_KEY="bench", GEMINI_BASE_URL=server.base_url, LLM_HEDGE_MIN_SAMPLES="20",
+                          LLM_RPM="0", LLM_TPM="0")
+        _mode("sem hedging", server, args, hedging=False)
+        _mode("com hedging", server, args, hedging=True)
+
+
+if __name__ == "__main__":
+    main()
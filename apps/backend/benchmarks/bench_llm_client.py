@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Overhead por requisição do cliente LLM: um GoogleClient novo por chamada
+(comportamento antigo de /api/classify) vs. o cliente compartilhado do
+registro com pool keep-alive.
+
+Uso (a partir de apps/backend):
+    python -m benchmarks.bench_llm_client --requests 300
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from benchmarks.fake_gemini import FakeGeminiServer  # noqa: E402
+
+
+def _summary(name: str, samples: list[float], connections: int) -> str:
+    samples_ms = sorted(s * 1000 for s in samples)
+    p50 = statistics.median(samples_ms)
+    p99 = samples_ms[int(len(samples_ms) * 0.99) - 1]
+    return (f"{name:<10} n={len(samples_ms):<5} mean={statistics.fmean(samples_ms):7.3f}ms "
+            f"p50={p50:7.3f}ms p99={p99:7.3f}ms conexões_tcp={connections}")
+
+
+async def _run(requests: int, server: FakeGeminiServer) -> None:
+    from email_classifier_llm.services import llm_client
+
+    text = "Bom dia, poderiam verificar o status da minha solicitação de resgate?"
+
+    # Antes: cliente (settings, genai.Client, leitura do prompt) criado a cada requisição
+    llm_client.load_prompt.cache_clear()
+    baseline = server.connections
+    before: list[float] = []
+    for _ in range(requests):
+        start = time.perf_counter()
+        llm_client.load_prompt.cache_clear()
+        client = llm_client.GoogleClient()
+        await client.classify(text)
+        before.append(time.perf_counter() - start)
+        await client.aclose()
+    before_conns = server.connections - baseline
+
+    # Depois: cliente compartilhado criado no lifespan
+    await llm_client.init_llm_clients()
+    baseline = server.connections
+    after: list[float] = []
+    for _ in range(requests):
+        start = time.perf_counter()
+        client = llm_client.get_llm_client()
+        await client.classify(text)
+        after.append(time.perf_counter() - start)
+    after_conns = server.connections - baseline
+    await llm_client.close_llm_clients()
+
+    print(_summary("antes", before, before_conns))
+    print(_summary("depois", after, after_conns))
+    print(f"ganho médio por requisição: "
+          f"{(statistics.fmean(before) - statistics.fmean(after)) * 1000:.3f}ms")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=200)
+    args = parser.parse_args()
+
+    with FakeGeminiServer() as server:
+        os.environ["GEMINI_API_KEY"] = "bench"
+        os.environ["GEMINI_BASE_URL"] = server.base_url
+        asyncio.run(_run(args.requests, server))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Micro-benchmarks de services/processor.py (pytest-benchmark), de 1 KB a 10 MB.
+
+Uso (a partir de apps/backend):
+    python -m pytest benchmarks/bench_processor.py --benchmark-group-by=param:size
+    python -m pytest benchmarks/bench_processor.py -k "1KB or 1MB" --benchmark-columns=mean,stddev,ops
+
+As variantes `legacy_*` reproduzem a implementação anterior (várias passadas
+de normalização e cascata de decodificação) para comparação direta.
+"""
+import re
+from pathlib import Path
+
+import pytest
+
+from benchmarks.pdf_fixtures import make_text_pdf
+from email_classifier_llm.services.processor import _decode_text, extract_text_from_file, preprocess_text
+
+pytest.importorskip("pytest_benchmark")
+
+CORPUS_DIR = Path(__file__).resolve().parents[1] / "tests" / "data" / "emails"
+SIZES = {"1KB": 1024, "64KB": 64 * 1024, "1MB": 1024 * 1024, "10MB": 10 * 1024 * 1024}
+
+
+def legacy_preprocess_text(text: str) -> str:
+    text = text.replace("\r\n", "\n").replace("\r", "\n")
+    lines = [ln.rstrip() for ln in text.split("\n")]
+    joined = "\n".join(lines).strip()
+    joined = re.sub(r"\s+", " ", joined)
+    return joined.strip()
+
+
+def legacy_decode(content: bytes) -> str:
+    for encoding in ("utf-8", "utf-16", "cp1252", "latin-1"):
+        try:
+            return content.decode(encoding).replace("\x00", "").strip()
+        except Exception:
+            continue
+    return content.decode("utf-8", errors="ignore")
+
+
+# cp1252 com tamanho ímpar: a cascata antiga ainda decodifica tudo em utf-16 antes de falhar
+DECODE_CASES = {"utf-8": ("utf-8", b""), "cp1252": ("cp1252", b""), "cp1252-odd": ("cp1252", b"\n")}
+
+
+def _encode(text: str, case: str) -> bytes:
+    encoding, suffix = DECODE_CASES[case]
+    content = text.encode(encoding, errors="replace")
+    if len(content) % 2 == 0:
+        content = content + suffix
+    return content
+
+
+def _corpus_text(size: int) -> str:
+    sample = "\r\n\r\n".join(p.read_text(encoding="utf-8") for p in sorted(CORPUS_DIR.glob("*.txt")))
+    return (sample * (size // len(sample) + 1))[:size]
+
+
+@pytest.fixture(scope="module", params=list(SIZES), ids=list(SIZES))
+def size(request):
+    return request.param
+
+
+@pytest.fixture(scope="module")
+def text(size):
+    return _corpus_text(SIZES[size])
+
+
+def test_preprocess_text(benchmark, text):
+    benchmark.group = "preprocess"
+    benchmark(preprocess_text, text)
+
+
+def test_legacy_preprocess_text(benchmark, text):
+    benchmark.group = "preprocess"
+    benchmark(legacy_preprocess_text, text)
+
+
+@pytest.mark.parametrize("case", list(DECODE_CASES))
+def test_decode(benchmark, text, case):
+    benchmark.group = f"decode-{case}"
+    benchmark(_decode_text, _encode(text, case))
+
+
+@pytest.mark.parametrize("case", list(DECODE_CASES))
+def test_legacy_decode(benchmark, text, case):
+    benchmark.group = f"decode-{case}"
+    benchmark(legacy_decode, _encode(text, case))
+
+
+@pytest.mark.parametrize("pages", [1, 10, 50])
+def test_extract_pdf(benchmark, pages):
+    benchmark.group = "extract-pdf"
+    content = make_text_pdf(pages)
+    benchmark(extract_text_from_file, filename="email.pdf", content=content)
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Pico de requisições contra um modelo com cota de concorrência (servidor
+fake que responde 429 acima de `--quota` chamadas simultâneas): pipeline
+sem limitador (cada 429 vira erro) vs. com token buckets + janela AIMD +
+retentativas com jitter.
+
+Uso (a partir de apps/backend):
+    python -m benchmarks.bench_rate_limiter --requests 300 --quota 8 --delay 0.05
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from benchmarks.fake_gemini import FakeGeminiServer  # noqa: E402
+
+
+async def _burst(requests: int) -> tuple[list[float], dict[int, int]]:
+    from email_classifier_llm.services import llm_client
+    from email_classifier_llm.services.pipeline import classify_text
+
+    await llm_client.init_llm_clients()
+    latencies: list[float] = []
+    statuses: dict[int, int] = {}
+
+    async def one(i: int) -> None:
+        start = time.perf_counter()
+        outcome = await classify_text(f"Preciso da segunda via do boleto {i}", use_cache=False)
+        latencies.append(time.perf_counter() - start)
+        statuses[outcome.status_code] = statuses.get(outcome.status_code, 0) + 1
+
+    await asyncio.gather(*(one(i) for i in range(requests)))
+    await llm_client.close_llm_clients()
+    return latencies, statuses
+
+
+def _run(name: str, server: FakeGeminiServer, requests: int, **env: str) -> None:
+    from core.config import get_settings
+    from email_classifier_llm.services.rate_limiter import get_rate_limiter
+
+    os.environ.update(env)
+    get_settings.cache_clear()
+    get_rate_limiter.cache_clear()
+    before_requests, before_throttled = server.requests, server.throttled
+    start = time.perf_counter()
+    latencies, statuses = asyncio.run(_burst(requests))
+    elapsed = time.perf_counter() - start
+    ordered = sorted(s * 1000 for s in latencies)
+    limiter = get_rate_limiter("google")
+    print(
+        f"{name:<14} ok={statuses.get(200, 0)}/{requests} status={dict(sorted(statuses.items()))} "
+        f"chamadas={server.requests - before_requests} 429={server.throttled - before_throttled} "
+        f"p50={statistics.median(ordered):.0f}ms p99={ordered[int(len(ordered) * 0.99) - 1]:.0f}ms "
+        f"total={elapsed:.2f}s"
+        + (f" janela_final={limiter.stats()['concurrency']['limit']}" if limiter is not None else "")
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--quota", type=int, default=8, help="Chamadas simultâneas aceitas pelo servidor fake")
+    parser.add_argument("--delay", type=float, default=0.05, help="Latência simulada do modelo (s)")
+    args = parser.parse_args()
+
+    with FakeGeminiServer(delay=args.delay, max_in_flight=args.quota, retry_after=0) as server:
+        base = {"GEMINI_API_KEY": "bench", "GEMINI_BASE_URL": server.base_url, "CLASSIFICATION_CACHE_ENABLED": "false",
+                "LLM_PACKING_ENABLED": "false", "ENABLE_DB": "false"}
+        _run("sem limitador", server, args.requests, **base, LLM_RATE_LIMIT_ENABLED="false")
+        _run("com limitador", server, args.requests, **base, LLM_RATE_LIMIT_ENABLED="true", LLM_RETRY_BASE_SECONDS="0.05")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,257 @@
+"""
+Servidor fake compatível com a API do Gemini (``models.generate_content``)
+para benchmarks locais, sem rede nem chave de API real. Também responde no
+formato de OpenAI (``/chat/completions``), Anthropic (``/v1/messages``) e
+Ollama (``/api/generate``), conforme o caminho, para testar o roteador, e
+simula o context caching (``cachedContents``) do Gemini.
+"""
+from __future__ import annotations
+
+import json
+import math
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Optional
+
+DEFAULT_RESULT = {
+    "category": "Produtivo",
+    "reason": "Solicitação de suporte",
+    "suggested_reply": "Olá! Vamos verificar sua solicitação e retornamos em breve.",
+}
+
+
+def generate_content_body(text: str, prompt_tokens: int = 0, cached_tokens: int = 0) -> bytes:
+    output_tokens = len(text) // 4 + 1
+    usage = {
+        "promptTokenCount": prompt_tokens + cached_tokens,
+        "candidatesTokenCount": output_tokens,
+        "totalTokenCount": prompt_tokens + cached_tokens + output_tokens,
+    }
+    if cached_tokens:
+        usage["cachedContentTokenCount"] = cached_tokens
+    return json.dumps({
+        "candidates": [{
+            "content": {"role": "model", "parts": [{"text": text}]},
+            "finishReason": "STOP",
+        }],
+        "usageMetadata": usage,
+    }).encode("utf-8")
+
+
+def response_body(path: str, text: str, prompt_tokens: int = 0, cached_tokens: int = 0) -> bytes:
+    """Corpo da resposta no formato do provider indicado pelo caminho (uso de tokens ≈ 4 caracteres/token)."""
+    output_tokens = len(text) // 4 + 1
+    if path.endswith("/chat/completions"):
+        return json.dumps({
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": text}}],
+            "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": output_tokens},
+        }).encode()
+    if path.endswith("/v1/messages"):
+        return json.dumps({
+            "role": "assistant",
+            "content": [{"type": "text", "text": text}],
+            "usage": {"input_tokens": prompt_tokens, "output_tokens": output_tokens},
+        }).encode()
+    if path.endswith("/api/generate"):
+        return json.dumps({"response": text, "done": True, "prompt_eval_count": prompt_tokens,
+                           "eval_count": output_tokens}).encode()
+    return generate_content_body(text, prompt_tokens, cached_tokens)
+
+
+def latency_sampler(spec: str) -> Callable[[random.Random], float]:
+    """
+    Distribuição de latência do modelo, em segundos: `fixed:S`, `uniform:MIN:MAX`,
+    `exp:MÉDIA` ou `lognormal:MEDIANA:SIGMA`.
+    """
+    kind, *params = spec.split(":")
+    values = [float(p) for p in params]
+    if kind == "fixed" and len(values) == 1:
+        return lambda rng: values[0]
+    if kind == "uniform" and len(values) == 2:
+        return lambda rng: rng.uniform(values[0], values[1])
+    if kind == "exp" and len(values) == 1:
+        return lambda rng: rng.expovariate(1 / values[0]) if values[0] > 0 else 0.0
+    if kind == "lognormal" and len(values) == 2:
+        mu = math.log(values[0])
+        return lambda rng: rng.lognormvariate(mu, values[1])
+    raise ValueError(f"Distribuição de latência inválida: {spec!r}")
+
+
+class FakeGeminiHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+
+    def setup(self) -> None:
+        super().setup()
+        with self.server.lock:
+            self.server.connections += 1
+
+    def do_POST(self) -> None:
+        length = int(self.headers.get("Content-Length") or 0)
+        raw = self.rfile.read(length)
+        if self.path.split("?")[0].endswith("/cachedContents"):
+            self._create_cache(raw)
+            return
+        prompt_tokens = length // 4 + 1
+        cached_name = json.loads(raw or b"{}").get("cachedContent") if "/models/" in self.path else None
+        with self.server.lock:
+            self.server.requests += 1
+            self.server.last_body = raw
+            cached_tokens = self.server.caches.get(cached_name) if cached_name else None
+        if cached_name and cached_tokens is None:
+            self._send_error(404)  # cache expirado ou removido
+            return
+        with self.server.lock:
+            throttled = self.server.throttle > 0
+            self.server.throttle -= throttled
+            # Cota simulada: acima de `max_in_flight` requisições simultâneas responde 429
+            throttled = throttled or (self.server.max_in_flight is not None
+                                      and self.server.in_flight >= self.server.max_in_flight)
+            self.server.throttled += throttled
+            self.server.in_flight += not throttled
+        if throttled:
+            self._send_error(429)
+            return
+        failed = False
+        try:
+            delay = self.server.latency(self.server.random) if self.server.latency else self.server.delay
+            if self.server.tail_ratio and self.server.random.random() < self.server.tail_ratio:
+                delay = self.server.tail_delay  # geração lenta ocasional (cauda)
+            if delay:
+                time.sleep(delay)  # latência simulada do modelo
+            failed = bool(self.server.error_rate) and self.server.random.random() < self.server.error_rate
+        finally:
+            with self.server.lock:
+                self.server.in_flight -= 1
+                self.server.errors += failed
+        if failed:
+            self._send_error(self.server.error_status)
+            return
+        body = response_body(self.path, json.dumps(self.server.result, ensure_ascii=False), prompt_tokens,
+                             cached_tokens or 0)
+        try:
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # cliente cancelou a chamada (ex.: hedge perdedor)
+
+    def _create_cache(self, raw: bytes) -> None:
+        if not self.server.caching:
+            self._send_error(400)  # ex.: prefixo abaixo do mínimo de tokens do modelo
+            return
+        request = json.loads(raw)
+        with self.server.lock:
+            self.server.cache_events["created"] += 1
+            name = f"cachedContents/fake-{self.server.cache_events['created']}"
+            self.server.caches[name] = len(json.dumps(request.get("systemInstruction", ""))) // 4 + 1
+        self._send_json({"name": name, "model": request.get("model"), "displayName": request.get("displayName")})
+
+    def do_PATCH(self) -> None:
+        self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        name = self.path.split("?")[0].split("/v1beta/", 1)[-1]
+        with self.server.lock:
+            found = name in self.server.caches
+            self.server.cache_events["refreshed"] += found
+        if found:
+            self._send_json({"name": name})
+        else:
+            self._send_error(404)
+
+    def do_DELETE(self) -> None:
+        name = self.path.split("?")[0].split("/v1beta/", 1)[-1]
+        with self.server.lock:
+            found = self.server.caches.pop(name, None) is not None
+            self.server.cache_events["deleted"] += found
+        if found:
+            self._send_json({})
+        else:
+            self._send_error(404)
+
+    def _send_json(self, data: dict) -> None:
+        body = json.dumps(data).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_error(self, code: int) -> None:
+        status, message = {
+            400: ("INVALID_ARGUMENT", "Cached content is too small"),
+            404: ("NOT_FOUND", "Not found"),
+            429: ("RESOURCE_EXHAUSTED", "Quota exceeded"),
+        }.get(code, ("INTERNAL", "Internal error"))
+        body = json.dumps({"error": {"code": code, "status": status, "message": message}}).encode()
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        if code == 429 and self.server.retry_after is not None:
+            self.send_header("Retry-After", str(self.server.retry_after))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args) -> None:  # noqa: A002
+        pass
+
+
+class FakeGeminiServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        result: dict | None = None,
+        delay: float = 0.0,
+        throttle: int = 0,
+        retry_after: float | None = None,
+        max_in_flight: int | None = None,
+        tail_ratio: float = 0.0,
+        tail_delay: float = 0.0,
+        latency: Optional[Callable[[random.Random], float]] = None,
+        error_rate: float = 0.0,
+        error_status: int = 500,
+        seed: int = 0,
+        caching: bool = True,
+    ) -> None:
+        super().__init__((host, port), FakeGeminiHandler)
+        self.lock = threading.Lock()
+        self.connections = 0
+        self.requests = 0
+        self.last_body = b""  # corpo da última requisição (para inspecionar o payload enviado)
+        self.result = result or DEFAULT_RESULT
+        self.delay = delay
+        self.throttle = throttle  # as próximas `throttle` requisições recebem 429
+        self.retry_after = retry_after
+        self.max_in_flight = max_in_flight
+        self.tail_ratio = tail_ratio
+        self.tail_delay = tail_delay
+        self.latency = latency  # sobrepõe `delay` (ver latency_sampler)
+        self.error_rate = error_rate  # fração das respostas com `error_status`
+        self.error_status = error_status
+        self.random = random.Random(seed)
+        self.in_flight = 0
+        self.throttled = 0
+        self.errors = 0
+        self.caching = caching  # False: cachedContents responde 400
+        self.caches: dict = {}  # nome -> tokens do prefixo
+        self.cache_events = {"created": 0, "refreshed": 0, "deleted": 0}
+        self._thread: threading.Thread | None = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def __enter__(self) -> "FakeGeminiServer":
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.shutdown()
+        self.server_close()
@@ -0,0 +1,372 @@
+#!/usr/bin/env python3
+"""
+Teste de carga reproduzível do serviço completo: sobe o app com uvicorn
+(`--workers N`) apontando para o servidor fake do Gemini e envia tráfego
+misto (texto e PDF) em taxas de chegada fixas (processo de Poisson com
+semente). Para cada combinação de workers e taxa, reporta:
+
+- vazão (respostas 200/s) e erros por status;
+- p50/p95/p99/max de latência, no geral e por tipo (text/pdf);
+- lag do event loop, estimado por sondas leves (GET /api/classify/cache):
+  latência das sondas durante a carga acima da mediana com o app ocioso;
+- RSS de pico da árvore de processos (uvicorn, workers e pools de extração).
+
+O resultado é gravado em JSON; com `--compare` os valores são confrontados
+com uma execução anterior e o script sai com código 1 se p99 ou vazão
+piorarem além de `--tolerance`.
+
+Uso (a partir de apps/backend):
+    python -m benchmarks.loadtest --workers 1,2,4 --rates 20,50 --duration 30 --out loadtest.json
+    python -m benchmarks.loadtest --workers 2 --rates 50 --latency lognormal:0.5:0.4 --error-rate 0.02 \\
+        --out novo.json --compare loadtest.json
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+import httpx  # noqa: E402
+
+from benchmarks.fake_gemini import FakeGeminiServer, latency_sampler  # noqa: E402
+from benchmarks.pdf_fixtures import make_text_pdf  # noqa: E402
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+PROBE_PATH = "/api/classify/cache"
+
+TEXT_TEMPLATES = (
+    "Bom dia, poderiam verificar o status da minha solicitação de resgate {i}?",
+    "Segue em anexo o comprovante de transferência {i}. Aguardo confirmação.",
+    "Feliz aniversário para toda a equipe! Mensagem {i}.",
+    "Não consigo acessar o aplicativo desde ontem, protocolo {i}. Podem ajudar?",
+)
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _percentiles(samples: List[float]) -> Dict[str, Optional[float]]:
+    if not samples:
+        return {"p50": None, "p95": None, "p99": None, "max": None}
+    ordered = sorted(samples)
+
+    def pick(q: float) -> float:
+        return round(ordered[min(len(ordered) - 1, int(len(ordered) * q))] * 1000, 1)
+
+    return {"p50": pick(0.50), "p95": pick(0.95), "p99": pick(0.99), "max": round(ordered[-1] * 1000, 1)}
+
+
+def tree_rss_bytes(root_pid: int) -> Optional[int]:
+    """RSS somado do processo e descendentes, lido de /proc (None fora do Linux)."""
+    proc = Path("/proc")
+    if not proc.is_dir():
+        return None
+    children: Dict[int, List[int]] = {}
+    for entry in proc.iterdir():
+        if not entry.name.isdigit():
+            continue
+        try:
+            stat = (entry / "stat").read_text()
+        except OSError:
+            continue
+        ppid = int(stat.rsplit(")", 1)[1].split()[1])
+        children.setdefault(ppid, []).append(int(entry.name))
+    total, stack = 0, [root_pid]
+    while stack:
+        pid = stack.pop()
+        stack.extend(children.get(pid, []))
+        try:
+            for line in (proc / str(pid) / "status").read_text().splitlines():
+                if line.startswith("VmRSS:"):
+                    total += int(line.split()[1]) * 1024
+                    break
+        except OSError:
+            continue
+    return total
+
+
+class RSSSampler(threading.Thread):
+    """Pico de RSS da árvore de processos, amostrado a cada `interval` segundos."""
+
+    def __init__(self, pid: int, interval: float = 0.5) -> None:
+        super().__init__(daemon=True)
+        self.pid = pid
+        self.interval = interval
+        self.peak: Optional[int] = None
+        self._stop_event = threading.Event()
+
+    def run(self) -> None:
+        while not self._stop_event.is_set():
+            rss = tree_rss_bytes(self.pid)
+            if rss is not None:
+                self.peak = max(self.peak or 0, rss)
+            self._stop_event.wait(self.interval)
+
+    def stop(self) -> Optional[int]:
+        self._stop_event.set()
+        self.join()
+        return self.peak
+
+
+def start_app(workers: int, port: int, fake_url: str, extra_env: Dict[str, str]) -> subprocess.Popen:
+    env = {
+        **os.environ,
+        "LLM_PROVIDER": "google",
+        "GEMINI_API_KEY": "loadtest",
+        "GEMINI_BASE_URL": fake_url,
+        # Textos únicos e sem cache: toda requisição chega ao modelo
+        "CLASSIFICATION_CACHE_ENABLED": "false",
+        "JOBS_ENABLED": "false",
+        "LOG_SAMPLE_RATE": "0",
+        # A cota é do servidor fake; o limitador por processo distorceria a comparação entre workers
+        "LLM_RPM": "0",
+        "LLM_TPM": "0",
+        **extra_env,
+    }
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "email_classifier_llm.main:app", "--host", "127.0.0.1",
+         "--port", str(port), "--workers", str(workers), "--log-level", "warning"],
+        cwd=BACKEND_DIR,
+        env=env,
+    )
+
+
+def stop_app(process: subprocess.Popen) -> None:
+    process.terminate()
+    try:
+        process.wait(timeout=15)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.wait()
+
+
+async def wait_ready(base_url: str, process: subprocess.Popen, timeout: float = 60.0) -> None:
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient(base_url=base_url, timeout=2.0) as client:
+        while time.monotonic() < deadline:
+            if process.poll() is not None:
+                raise RuntimeError(f"uvicorn saiu com código {process.returncode}")
+            try:
+                if (await client.get(PROBE_PATH)).status_code == 200:
+                    return
+            except httpx.TransportError:
+                pass
+            await asyncio.sleep(0.2)
+    raise RuntimeError(f"App não respondeu em {timeout:g}s")
+
+
+async def drive(
+    base_url: str,
+    *,
+    rate: float,
+    duration: float,
+    pdf_ratio: float,
+    pdf: bytes,
+    seed: int,
+    timeout: float = 120.0,
+    probe_interval: float = 0.1,
+) -> Dict[str, Any]:
+    """
+    Carga em malha aberta: as chegadas seguem o relógio, não as respostas,
+    então um servidor lento acumula requisições em andamento (como em produção).
+    """
+    rng = random.Random(seed)
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=200)
+    results: List[tuple[str, str, float]] = []
+    probes: List[float] = []
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=timeout, limits=limits) as client:
+
+        async def probe() -> float:
+            start = time.perf_counter()
+            await client.get(PROBE_PATH)
+            return time.perf_counter() - start
+
+        idle = sorted([await probe() for _ in range(20)])[10]
+
+        async def one(index: int, kind: str) -> None:
+            start = time.perf_counter()
+            try:
+                if kind == "pdf":
+                    resp = await client.post("/api/classify", files={"file": (f"email{index}.pdf", pdf, "application/pdf")})
+                else:
+                    text = TEXT_TEMPLATES[index % len(TEXT_TEMPLATES)].format(i=index)
+                    resp = await client.post("/api/classify", data={"text": text})
+                status = str(resp.status_code)
+            except httpx.HTTPError as exc:
+                status = type(exc).__name__
+            results.append((kind, status, time.perf_counter() - start))
+
+        async def prober(stop: asyncio.Event) -> None:
+            while not stop.is_set():
+                try:
+                    probes.append(await probe())
+                except httpx.HTTPError:
+                    pass
+                await asyncio.sleep(probe_interval)
+
+        loop = asyncio.get_running_loop()
+        stop = asyncio.Event()
+        probe_task = asyncio.create_task(prober(stop))
+        tasks: List[asyncio.Task] = []
+        started = loop.time()
+        offset = rng.expovariate(rate)
+        while offset < duration:
+            await asyncio.sleep(max(0.0, started + offset - loop.time()))
+            kind = "pdf" if rng.random() < pdf_ratio else "text"
+            tasks.append(asyncio.create_task(one(len(tasks), kind)))
+            offset += rng.expovariate(rate)
+        await asyncio.gather(*tasks)
+        elapsed = loop.time() - started
+        stop.set()
+        await probe_task
+
+    statuses = Counter(status for _, status, _ in results)
+    ok = [latency for _, status, latency in results if status == "200"]
+    by_kind = {
+        kind: _percentiles([latency for k, status, latency in results if k == kind and status == "200"])
+        for kind in ("text", "pdf")
+    }
+    return {
+        "sent": len(results),
+        "ok": len(ok),
+        "errors": {status: count for status, count in sorted(statuses.items()) if status != "200"},
+        "elapsed_s": round(elapsed, 2),
+        "throughput_rps": round(len(ok) / elapsed, 2) if elapsed else 0.0,
+        "latency_ms": _percentiles(ok),
+        "latency_by_kind_ms": by_kind,
+        "event_loop_lag_ms": _percentiles([max(0.0, p - idle) for p in probes]),
+        "probe_idle_ms": round(idle * 1000, 2),
+    }
+
+
+def run_matrix(args: argparse.Namespace) -> Dict[str, Any]:
+    pdf = make_text_pdf(args.pdf_pages)
+    runs: List[Dict[str, Any]] = []
+    with FakeGeminiServer(latency=latency_sampler(args.latency), error_rate=args.error_rate, seed=args.seed) as fake:
+        for workers in args.workers:
+            port = _free_port()
+            base_url = f"http://127.0.0.1:{port}"
+            process = start_app(workers, port, fake.base_url, dict(item.split("=", 1) for item in args.env))
+            try:
+                asyncio.run(wait_ready(base_url, process))
+                for rate in args.rates:
+                    sampler = RSSSampler(process.pid)
+                    sampler.start()
+                    fake_errors = fake.errors
+                    result = asyncio.run(drive(
+                        base_url, rate=rate, duration=args.duration, pdf_ratio=args.pdf_ratio, pdf=pdf, seed=args.seed,
+                    ))
+                    peak = sampler.stop()
+                    result.update(
+                        workers=workers,
+                        rate=rate,
+                        fake_llm_errors=fake.errors - fake_errors,
+                        rss_mb={
+                            "peak_total": round(peak / 2**20, 1) if peak else None,
+                            "peak_per_worker": round(peak / 2**20 / workers, 1) if peak else None,
+                        },
+                    )
+                    runs.append(result)
+                    _print_run(result)
+            finally:
+                stop_app(process)
+    return {"meta": _meta(args), "runs": runs}
+
+
+def _meta(args: argparse.Namespace) -> Dict[str, Any]:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "started_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "args": {key: value for key, value in vars(args).items() if key not in ("out", "compare")},
+    }
+
+
+def _print_run(run: Dict[str, Any]) -> None:
+    latency, lag = run["latency_ms"], run["event_loop_lag_ms"]
+    print(
+        f"workers={run['workers']} taxa={run['rate']:g}/s ok={run['ok']}/{run['sent']} "
+        f"vazão={run['throughput_rps']:.1f}/s p50={latency['p50']}ms p95={latency['p95']}ms p99={latency['p99']}ms "
+        f"lag_p99={lag['p99']}ms rss={run['rss_mb']['peak_total']}MB erros={run['errors']}"
+    )
+
+
+def compare(baseline: Dict[str, Any], current: Dict[str, Any], tolerance: float) -> List[str]:
+    """Regressões de p99 e vazão por (workers, taxa) presentes nas duas execuções."""
+    previous = {(run["workers"], run["rate"]): run for run in baseline["runs"]}
+    regressions: List[str] = []
+    for run in current["runs"]:
+        old = previous.get((run["workers"], run["rate"]))
+        if old is None:
+            continue
+        label = f"workers={run['workers']} taxa={run['rate']:g}/s"
+        old_p99, new_p99 = old["latency_ms"]["p99"], run["latency_ms"]["p99"]
+        old_rps, new_rps = old["throughput_rps"], run["throughput_rps"]
+        print(f"{label}: p99 {old_p99} -> {new_p99} ms, vazão {old_rps} -> {new_rps}/s")
+        if old_p99 and new_p99 and new_p99 > old_p99 * (1 + tolerance):
+            regressions.append(f"{label}: p99 {old_p99} -> {new_p99} ms")
+        if old_rps and new_rps < old_rps * (1 - tolerance):
+            regressions.append(f"{label}: vazão {old_rps} -> {new_rps}/s")
+    return regressions
+
+
+def _numbers(raw: str, cast=float) -> List:
+    return [cast(item) for item in raw.split(",") if item.strip()]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=lambda raw: _numbers(raw, int), default=[1, 2], help="Ex.: 1,2,4")
+    parser.add_argument("--rates", type=_numbers, default=[10.0, 30.0], help="Chegadas por segundo, ex.: 10,30")
+    parser.add_argument("--duration", type=float, default=20.0, help="Segundos de carga por taxa")
+    parser.add_argument("--pdf-ratio", type=float, default=0.2, help="Fração das requisições com PDF")
+    parser.add_argument("--pdf-pages", type=int, default=5)
+    parser.add_argument("--latency", default="lognormal:0.5:0.4", help="fixed:S | uniform:A:B | exp:MÉDIA | lognormal:MEDIANA:SIGMA")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fração de respostas 500 do LLM fake")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--env", action="append", default=[], metavar="CHAVE=VALOR", help="Settings extras do app")
+    parser.add_argument("--out", default="loadtest.json")
+    parser.add_argument("--compare", help="JSON de uma execução anterior")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Piora relativa aceita no --compare")
+    args = parser.parse_args()
+
+    result = run_matrix(args)
+    Path(args.out).write_text(json.dumps(result, indent=2, ensure_ascii=False), encoding="utf-8")
+    print(f"Resultados em {args.out}")
+
+    if args.compare:
+        regressions = compare(json.loads(Path(args.compare).read_text(encoding="utf-8")), result, args.tolerance)
+        for line in regressions:
+            print(f"REGRESSÃO {line}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -15,6 +15,148 @@ class Settings(BaseSettings):
     ENV: str = "dev"  # dev | prod
     ENABLE_DB: bool = False
 
+    # Pool de conexões do banco (engine síncrona e AsyncEngine)
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_TIMEOUT: float = 30.0
+    DB_POOL_PRE_PING: bool = True
+    DB_POOL_RECYCLE: int = 300
+    DB_ECHO: bool = False
+
+    # Cache read-through de clientes (JSON serializado por id/CPF/número)
+    CLIENT_CACHE_ENABLED: bool = True
+    CLIENT_CACHE_MAX_ENTRIES: int = 5_000
+    CLIENT_CACHE_TTL_SECONDS: float = 300.0
+
+    # GET /api/clients/export (NDJSON em blocos a partir de um cursor no servidor)
+    CLIENT_EXPORT_CHUNK_SIZE: int = 1000
+
+    # Clientes citados no email (CPF/número/email) anexados à classificação
+    CLIENT_MATCH_ENABLED: bool = True
+    CLIENT_MATCH_MAX_IDENTIFIERS: int = 20
+
+    # LLM
+    LLM_PROVIDER: str = "google"
+    GEMINI_MODEL: str = "gemini-2.5-flash"
+    GEMINI_BASE_URL: str | None = None  # endpoint alternativo (ex.: servidor fake em benchmarks)
+    PROMPT_VERSION: str = "v2"  # prompts/prompt_<versão>.txt (+ _system.txt com as instruções fixas, se existir)
+    LLM_JSON_MODE: bool = True  # pede JSON com schema aos providers que suportam (Gemini, OpenAI, Ollama)
+
+    # Cache de prefixo do prompt (context caching do Gemini) para as instruções fixas
+    PROMPT_CACHE_ENABLED: bool = True
+    PROMPT_CACHE_TTL_SECONDS: int = 3600
+    PROMPT_CACHE_REFRESH_MARGIN_SECONDS: int = 300  # renova o TTL quando faltar menos que isso
+    PROMPT_CACHE_RETRY_SECONDS: int = 300  # espera antes de tentar registrar de novo após uma falha
+    PROMPT_CACHE_MIN_TOKENS: int = 1024  # mínimo aceito pelo provider; prefixos menores vão no prompt
+
+    # Demais providers (usados diretamente em LLM_PROVIDER ou pelo roteador)
+    OPENAI_API_KEY: str | None = None
+    OPENAI_MODEL: str = "gpt-4o-mini"
+    OPENAI_BASE_URL: str = "https://api.openai.com/v1"  # qualquer API compatível com chat/completions
+    ANTHROPIC_API_KEY: str | None = None
+    ANTHROPIC_MODEL: str = "claude-3-5-haiku-latest"
+    ANTHROPIC_BASE_URL: str = "https://api.anthropic.com"
+    OLLAMA_BASE_URL: str = "http://localhost:11434"
+    OLLAMA_MODEL: str = "llama3.1"
+
+    # Roteador de providers (LLM_PROVIDER=router): EWMA de latência/erros e failover dentro do prazo
+    LLM_ROUTER_PROVIDERS: str = "google"  # ordem de preferência enquanto não há histórico
+    LLM_ROUTER_WEIGHTS: str = ""  # ex.: "google=3,openai=1" divide o tráfego por custo; vazio = menor latência
+    LLM_ROUTER_EWMA_ALPHA: float = 0.2
+    LLM_ROUTER_MAX_ERROR_RATE: float = 0.5  # acima disso o provider sai da rotação por LLM_ROUTER_COOLDOWN_SECONDS
+    LLM_ROUTER_COOLDOWN_SECONDS: float = 30.0
+    LLM_ROUTER_ATTEMPT_TIMEOUT_SECONDS: float = 20.0  # por provider; o total fica em LLM_DEADLINE_SECONDS
+
+    # Pool HTTP compartilhado pelos clientes LLM (keep-alive)
+    LLM_HTTP_MAX_CONNECTIONS: int = 100
+    LLM_HTTP_MAX_KEEPALIVE: int = 20
+    LLM_HTTP_KEEPALIVE_EXPIRY: float = 30.0
+    LLM_HTTP_TIMEOUT: float = 60.0
+
+    # Limite de chamadas ao LLM: token buckets RPM/TPM (0 desliga), janela AIMD e retentativas
+    LLM_RATE_LIMIT_ENABLED: bool = True
+    LLM_RPM: float = 1000
+    LLM_TPM: float = 1_000_000
+    LLM_RPM_BY_PROVIDER: str = ""  # ex.: "google=1000,openai=500"; providers ausentes usam LLM_RPM
+    LLM_TPM_BY_PROVIDER: str = ""  # idem, sobre LLM_TPM
+    LLM_OUTPUT_TOKENS_ESTIMATE: int = 300  # somado ao prompt na reserva de TPM
+    LLM_CONCURRENCY_INITIAL: int = 16
+    LLM_CONCURRENCY_MIN: int = 1
+    LLM_CONCURRENCY_MAX: int = 128
+    LLM_RETRY_MAX_ATTEMPTS: int = 4
+    LLM_RETRY_BASE_SECONDS: float = 0.5
+    LLM_RETRY_MAX_BACKOFF_SECONDS: float = 8.0
+    LLM_DEADLINE_SECONDS: float = 45.0  # prazo total por requisição, incluindo esperas e retentativas
+
+    # Hedging: segunda chamada idêntica quando a primeira passa do percentil da latência recente
+    LLM_HEDGING_ENABLED: bool = False
+    LLM_HEDGE_PERCENTILE: float = 0.95
+    LLM_HEDGE_MIN_SAMPLES: int = 50  # sem histórico suficiente não há hedge
+    LLM_HEDGE_MIN_DELAY_SECONDS: float = 0.2
+    LLM_HEDGE_BUDGET_RATIO: float = 0.05  # no máximo ~5% de chamadas extras
+    LLM_HEDGE_BUDGET_BURST: float = 10.0
+    LLM_HEDGE_WINDOW: int = 1000  # amostras por geração do sketch de latência
+
+    # Tempo máximo de uma classificação pelo LLM (retentativas e hedge incluídos); 0 desliga
+    LLM_CLASSIFICATION_TIMEOUT_SECONDS: float = 60.0
+
+    # Empacotamento de vários emails numa única chamada (micro-batching)
+    LLM_PACKING_ENABLED: bool = False
+    LLM_PACK_MAX_ITEMS: int = 10
+    LLM_PACK_TOKEN_BUDGET: int = 8000
+    LLM_PACK_WINDOW_MS: float = 10.0
+    LLM_PACK_MAX_RETRIES: int = 1
+
+    # Cache de classificações (memória + SQLite opcional)
+    CLASSIFICATION_CACHE_ENABLED: bool = True
+    CLASSIFICATION_CACHE_MAX_ENTRIES: int = 10_000
+    CLASSIFICATION_CACHE_TTL_SECONDS: float = 7 * 24 * 3600
+    CLASSIFICATION_CACHE_SQLITE_PATH: str | None = None
+
+    # Corte de histórico citado/assinaturas e orçamento de tokens de entrada
+    TRIM_ENABLED: bool = True
+    TRIM_MAX_INPUT_TOKENS: int = 2000
+    TRIM_HEAD_RATIO: float = 0.7
+
+    # Pré-classificador local (responde sem LLM quando a confiança é alta)
+    LOCAL_CLASSIFIER_ENABLED: bool = False
+    LOCAL_CLASSIFIER_MODEL_PATH: str | None = None
+    LOCAL_CLASSIFIER_THRESHOLD: float = 0.97
+    LOCAL_CLASSIFIER_CATEGORIES: str = "Improdutivo"  # categorias que podem ser respondidas localmente
+    LOCAL_CLASSIFIER_TRAINING_LOG: str | None = None  # JSONL com os resultados do LLM, para retreino
+
+    # Uploads: limites aplicados durante a leitura e spool em disco acima do threshold
+    UPLOAD_MAX_BYTES: int = 20 * 1024 * 1024
+    UPLOAD_MAX_REQUEST_BYTES: int = 100 * 1024 * 1024
+    UPLOAD_SPOOL_THRESHOLD_BYTES: int = 1024 * 1024
+    UPLOAD_SPOOL_DIR: str | None = None
+
+    # Extração de texto fora do event loop
+    EXTRACTION_POOL: str = "process"  # process | thread | inline
+    EXTRACTION_WORKERS: int = 2
+    EXTRACTION_TIMEOUT_SECONDS: float = 30.0
+    EXTRACTION_MAX_PAGES: int | None = 50
+    EXTRACTION_MAX_BYTES: int = 20 * 1024 * 1024
+    EXTRACTION_INLINE_MAX_BYTES: int = 64 * 1024  # .txt pequenos são decodificados no próprio loop
+
+    # /api/classify/batch
+    BATCH_MAX_ITEMS: int = 100
+    BATCH_MAX_CONCURRENCY: int = 8
+
+    # Fila de jobs de classificação (SQLite em WAL, sem broker externo); opcional, cria o banco em JOBS_DB_PATH
+    JOBS_ENABLED: bool = False
+    JOBS_DB_PATH: str = "jobs.db"  # relativo ao diretório de execução; use um caminho absoluto em produção
+    JOBS_SPOOL_DIR: str | None = None  # uploads aguardando o worker (padrão: <JOBS_DB_PATH>.files)
+    JOBS_WORKERS: int = 2
+    JOBS_VISIBILITY_TIMEOUT_SECONDS: float = 120.0  # sem heartbeat nesse prazo, o job volta para a fila
+    JOBS_MAX_ATTEMPTS: int = 3
+    JOBS_RETRY_BACKOFF_SECONDS: float = 2.0
+    JOBS_POLL_INTERVAL_SECONDS: float = 1.0
+
+    # Observabilidade: GET /metrics (formato Prometheus) e fração das classificações registradas em log JSON
+    METRICS_ENABLED: bool = True
+    LOG_SAMPLE_RATE: float = 0.01
+
 @lru_cache(maxsize=1)
 def get_settings() -> Settings:
     return Settings()
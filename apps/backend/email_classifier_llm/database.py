@@ -1,19 +1,88 @@
-from core.config import Settings
+from __future__ import annotations
 
-if not Settings().ENABLE_DB:
+from functools import lru_cache
+from typing import Any, AsyncIterator, Dict, Iterator
+
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+
+from core.config import Settings, get_settings
+
+DATABASE_URL = get_settings().DATABASE_URL
+
+# Driver assíncrono equivalente ao driver síncrono da DATABASE_URL
+ASYNC_DRIVERS: Dict[str, str] = {
+    "postgresql": "asyncpg",
+    "mysql": "aiomysql",
+    "sqlite": "aiosqlite",
+}
+
+
+def async_database_url(url: str) -> str:
+    """postgresql://, postgresql+psycopg2:// -> postgresql+asyncpg:// (idem mysql/sqlite)."""
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"Banco sem driver assíncrono configurado: {backend}")
+    return parsed.set(drivername=f"{backend}+{ASYNC_DRIVERS[backend]}").render_as_string(hide_password=False)
+
+
+def pool_options(url: str, settings: Settings) -> Dict[str, Any]:
+    """Parâmetros de pool; SQLite em memória usa um pool de conexão única e não aceita tamanho."""
+    options: Dict[str, Any] = {"pool_pre_ping": settings.DB_POOL_PRE_PING, "echo": settings.DB_ECHO}
+    parsed = make_url(url)
+    if parsed.get_backend_name() == "sqlite" and parsed.database in (None, "", ":memory:"):
+        return options
+    options.update(
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+    )
+    return options
+
+
+if not get_settings().ENABLE_DB:
     engine = None
 
-    async def get_db():
+    def get_db_session():
         raise RuntimeError("Database disabled in DEV mode")
 
 else:
     from sqlalchemy import create_engine
     from sqlalchemy.orm import Session
 
+    # Engine síncrona: migrações e scripts
+    engine = create_engine(DATABASE_URL, **pool_options(DATABASE_URL, get_settings()))
 
-    engine = create_engine(Settings().DATABASE_URL)
-
-    def get_db_session() -> Session:
+    def get_db_session() -> Iterator[Session]:
         with Session(engine) as session:
             yield session
-            
\ No newline at end of file
+
+
+@lru_cache(maxsize=1)
+def get_async_engine() -> AsyncEngine:
+    settings = get_settings()
+    if not settings.ENABLE_DB or not settings.DATABASE_URL:
+        raise RuntimeError("Database disabled in DEV mode")
+    url = async_database_url(settings.DATABASE_URL)
+    return create_async_engine(url, **pool_options(url, settings))
+
+
+@lru_cache(maxsize=1)
+def get_sessionmaker() -> async_sessionmaker[AsyncSession]:
+    return async_sessionmaker(get_async_engine(), expire_on_commit=False)
+
+
+async def get_db() -> AsyncIterator[AsyncSession]:
+    """Dependência FastAPI: uma AsyncSession do pool por requisição."""
+    async with get_sessionmaker()() as session:
+        yield session
+
+
+async def close_db() -> None:
+    """Fecha as conexões do pool assíncrono (app shutdown)."""
+    if get_async_engine.cache_info().currsize:
+        await get_async_engine().dispose()
+    get_sessionmaker.cache_clear()
+    get_async_engine.cache_clear()
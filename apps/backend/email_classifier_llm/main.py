@@ -1,16 +1,48 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from pathlib import Path
 import os
 from core.path import FRONTEND_DIR
+from core.config import get_settings
 
 
+from .database import close_db
+from .middleware import BodySizeLimitMiddleware
 from .routers.classify import router as classify_router
 from .routers.clients import router as clients_router
+from .routers.jobs import router as jobs_router
+from .routers.metrics import router as metrics_router
+from .services.classification_cache import close_classification_cache
+from .services.extraction_pool import close_extraction_pool, get_extraction_pool
+from .services.job_queue import close_job_queue, start_job_workers
+from .services.llm_client import close_llm_clients, init_llm_clients
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Clientes LLM compartilhados: um pool keep-alive por provider
+    await init_llm_clients()
+    await get_extraction_pool().warm()
+    start_job_workers()
+    try:
+        yield
+    finally:
+        await close_job_queue()
+        await close_llm_clients()
+        close_classification_cache()
+        close_extraction_pool()
+        await close_db()
 
 
-app = FastAPI(title="Email Classifier LLM API")
+app = FastAPI(title="Email Classifier LLM API", lifespan=lifespan)
+app.add_middleware(
+    BodySizeLimitMiddleware,
+    max_bytes=get_settings().UPLOAD_MAX_REQUEST_BYTES,
+    max_part_bytes=get_settings().UPLOAD_MAX_BYTES,
+)
 
 
 
@@ -40,7 +72,11 @@ def health() -> dict:
         }
 
 app.include_router(classify_router, prefix="/api")
-#app.include_router(clients_router, prefix="/api")
+app.include_router(jobs_router, prefix="/api")
+if get_settings().METRICS_ENABLED:
+    app.include_router(metrics_router)
+if get_settings().ENABLE_DB:
+    app.include_router(clients_router, prefix="/api")
 
 app.mount(
     "/",
@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+from typing import Optional
+
+from fastapi import HTTPException
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# Folga para os cabeçalhos de cada parte (Content-Disposition, nome do arquivo, Content-Type)
+PART_HEADERS_ALLOWANCE = 16 * 1024
+
+
+class MultipartPartCounter:
+    """
+    Tamanho da parte atual de um corpo multipart/form-data, atualizado a cada
+    chunk recebido (cabeçalhos da parte incluídos). O delimitador pode chegar
+    cortado entre dois chunks, por isso o fim de cada chunk fica guardado.
+    """
+
+    def __init__(self, boundary: bytes) -> None:
+        self.delimiter = b"\r\n--" + boundary
+        self.size = 0
+        self.largest = 0
+        self._tail = b"\r\n"  # o primeiro delimitador não tem a quebra de linha antes
+
+    def feed(self, chunk: bytes) -> int:
+        """Processa `chunk` e devolve o maior tamanho de parte visto até aqui."""
+        data = self._tail + chunk
+        start = 0
+        while (index := data.find(self.delimiter, start)) != -1:
+            self.largest = max(self.largest, self.size + index - start)
+            self.size = 0
+            start = index + len(self.delimiter)
+        keep = min(len(self.delimiter) - 1, len(data) - start)
+        self.size += len(data) - start - keep
+        self._tail = data[len(data) - keep:]
+        self.largest = max(self.largest, self.size)
+        return self.largest
+
+
+def multipart_boundary(scope: Scope) -> Optional[bytes]:
+    for name, value in scope["headers"]:
+        if name == b"content-type":
+            kind, _, params = value.partition(b";")
+            if kind.strip().lower() != b"multipart/form-data":
+                return None
+            for param in params.split(b";"):
+                key, _, boundary = param.strip().partition(b"=")
+                if key.lower() == b"boundary" and boundary:
+                    return boundary.strip(b'"')
+            return None
+    return None
+
+
+class BodySizeLimitMiddleware:
+    """
+    Rejeita corpos de requisição acima de `max_bytes` com 413, usando o
+    Content-Length quando presente e contando os bytes recebidos caso
+    contrário — antes de o corpo inteiro ser lido. Em multipart/form-data,
+    cada parte (cada arquivo) também é limitada a `max_part_bytes` enquanto o
+    corpo chega, antes de o Starlette gravá-la no seu arquivo temporário.
+    """
+
+    def __init__(self, app: ASGIApp, max_bytes: int, max_part_bytes: Optional[int] = None) -> None:
+        self.app = app
+        self.max_bytes = max_bytes
+        self.max_part_bytes = max_part_bytes
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] not in ("POST", "PUT", "PATCH"):
+            await self.app(scope, receive, send)
+            return
+
+        for name, value in scope["headers"]:
+            if name == b"content-length":
+                if value.isdigit() and int(value) > self.max_bytes:
+                    await self._reject(send)
+                    return
+                break
+
+        received = 0
+        boundary = multipart_boundary(scope) if self.max_part_bytes is not None else None
+        parts = MultipartPartCounter(boundary) if boundary else None
+
+        async def limited_receive() -> Message:
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                body = message.get("body", b"")
+                received += len(body)
+                if received > self.max_bytes:
+                    raise HTTPException(status_code=413, detail=self._detail())
+                if parts is not None and parts.feed(body) > self.max_part_bytes + PART_HEADERS_ALLOWANCE:
+                    raise HTTPException(status_code=413, detail=f"Arquivo excede o limite de {self.max_part_bytes} bytes.")
+            return message
+
+        await self.app(scope, limited_receive, send)
+
+    def _detail(self) -> str:
+        return f"Requisição excede o limite de {self.max_bytes} bytes."
+
+    async def _reject(self, send: Send) -> None:
+        body = ('{"detail":"%s"}' % self._detail()).encode("utf-8")
+        await send({
+            "type": "http.response.start",
+            "status": 413,
+            "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+        })
+        await send({"type": "http.response.body", "body": body})
@@ -1,11 +1,30 @@
-from sqlalchemy import Column, Integer, String, Date, Boolean, Text
+from sqlalchemy import Column, Integer, String, Date, Boolean, Text, Index, event, func
 from sqlalchemy.ext.declarative import declarative_base
 from datetime import date
 from typing import Optional
+import unicodedata
 
 Base = declarative_base()
 
 
+def normalize_search_text(value: str) -> str:
+    """Minúsculas, sem acentos e com espaços colapsados (equivale a lower(unaccent(...)))."""
+    decomposed = unicodedata.normalize("NFKD", value)
+    stripped = "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+    return " ".join(stripped.lower().split())
+
+
+def normalize_cpf(cpf: str) -> str:
+    """Somente os dígitos do CPF ("123.456.789-00" -> "12345678900")."""
+    return "".join(ch for ch in cpf or "" if ch.isdigit())
+
+
+def build_search_text(nome_completo: str, cpf: str, numero_cliente: str, email: str) -> str:
+    """Coluna de busca: nome, CPF (com e sem máscara), número e email normalizados."""
+    parts = (nome_completo, cpf, normalize_cpf(cpf), numero_cliente, email)
+    return normalize_search_text(" ".join(part for part in parts if part))
+
+
 class Client(Base):
     __tablename__ = "clients"
     
@@ -18,6 +37,9 @@ class Client(Base):
     perfil_investidor = Column(String(50), nullable=False)
     ativos_custodiados = Column(Text, nullable=True)
     plano_contratual_em_dia = Column(Boolean, default=True, nullable=False)
+    # Mantidas na escrita (ver _fill_derived_columns)
+    cpf_digits = Column(String(11), unique=True, nullable=True, index=True)
+    search_text = Column(Text, nullable=True)  # indexada por pg_trgm / FTS5
     
     def to_dict(self) -> dict:
         """Converte o modelo para dicionário para serialização JSON"""
@@ -32,3 +54,14 @@ class Client(Base):
             "ativos_custodiados": self.ativos_custodiados,
             "plano_contratual_em_dia": self.plano_contratual_em_dia
         }
+
+
+# Busca exata por email sem diferenciar maiúsculas
+Index("ix_clients_email_lower", func.lower(Client.email))
+
+
+@event.listens_for(Client, "before_insert")
+@event.listens_for(Client, "before_update")
+def _fill_derived_columns(mapper, connection, target: Client) -> None:
+    target.cpf_digits = normalize_cpf(target.cpf)
+    target.search_text = build_search_text(target.nome_completo, target.cpf, target.numero_cliente, target.email)
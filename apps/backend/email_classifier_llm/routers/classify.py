@@ -1,9 +1,18 @@
+import asyncio
+import json
+import orjson
 from fastapi import APIRouter, UploadFile, File, Form, HTTPException
-from fastapi.responses import JSONResponse
-from typing import Optional
+from fastapi.responses import Response, StreamingResponse
+from typing import Any, Dict, List, Optional
 
-from ..services.processor import extract_text_from_file, preprocess_text
-from ..services.llm_client import get_llm_client
+from core.config import get_settings
+from ..services.classification_cache import get_classification_cache
+from ..services.hedging import get_hedger
+from ..services.llm_router import current_router
+from ..services.local_classifier import get_local_classifier
+from ..services.pipeline import classify_text, classify_text_stream, read_file_text
+from ..services.rate_limiter import get_rate_limiter
+from ..services.uploads import UploadTooLarge, spool_upload
 
 router = APIRouter(tags=["classify"])
 
@@ -12,44 +21,186 @@ router = APIRouter(tags=["classify"])
 async def classify(
     text: Optional[str] = Form(None),
     file: Optional[UploadFile] = File(None),
+    no_cache: bool = Form(False),
 ):
+    text = await _read_input(text, file)
+    outcome = await classify_text(text, use_cache=not no_cache)
+    return _json_response(
+        outcome.result,
+        status_code=outcome.status_code,
+        headers={"X-Tokens-Saved": str(outcome.meta["tokens_saved"])},
+    )
+
+
+def _json_response(content: Any, status_code: int = 200, headers: Optional[Dict[str, str]] = None) -> Response:
+    # Serializa direto para bytes (orjson), sem passar pelo jsonable_encoder/json.dumps do FastAPI
+    return Response(orjson.dumps(content), status_code=status_code, headers=headers, media_type="application/json")
+
+
+@router.post("/classify/stream")
+async def classify_stream(
+    text: Optional[str] = Form(None),
+    file: Optional[UploadFile] = File(None),
+    no_cache: bool = Form(False),
+):
+    """
+    Server-sent events: `classification` (categoria e motivo), vários `reply`
+    com trechos da resposta sugerida e `done` com o resultado final
+    (ou `error`, com o mesmo fallback de /classify).
+    """
+    text = await _read_input(text, file)
+
+    async def events():
+        async for event, data in classify_text_stream(text, use_cache=not no_cache):
+            yield b"event: " + event.encode() + b"\ndata: " + orjson.dumps(data) + b"\n\n"
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+async def _read_input(text: Optional[str], file: Optional[UploadFile]) -> str:
     if not text and not file:
         raise HTTPException(status_code=400, detail="Provide 'text' or 'file'.")
 
     if file is not None:
         try:
-            content = await file.read()
-            if not content:
-                raise HTTPException(status_code=400, detail="Arquivo recebido está vazio (0 bytes).")
-            text = extract_text_from_file(filename=file.filename, content=content)
+            async with await spool_upload(file, filename=file.filename) as upload:
+                text = await read_file_text(filename=file.filename, **upload.source())
+        except UploadTooLarge as exc:
+            raise HTTPException(status_code=413, detail=str(exc))
         except Exception as exc:  # noqa: BLE001
             raise HTTPException(status_code=400, detail=f"Failed to read file: {exc}")
 
     assert text is not None
-    cleaned = preprocess_text(text)
-    if not cleaned:
-        # Fallback amigável: retorna 200 com mensagem explicativa
-        return JSONResponse(
-            {
-                "category": "Improdutivo",
-                "reason": "Arquivo sem conteúdo válido após extração (encoding/arquivo em branco).",
-                "suggested_reply": "O arquivo enviado não pôde ser lido. Pode colar o texto diretamente ou reenviar o arquivo em .txt/.pdf?",
-            }
-        )
+    return text
+
 
+def _parse_texts(texts: Optional[str]) -> List[str]:
+    if not texts:
+        return []
     try:
-        # Get LLM client and classify
-        llm_client = get_llm_client()
-        result = await llm_client.classify(cleaned)
-        
-        print(result)
-        return JSONResponse(result)
-    except Exception as exc:
-        return JSONResponse(
-            {
-                "category": "Improdutivo",
-                "reason": f"Erro na classificação: {str(exc)}",
-                "suggested_reply": "Desculpe, ocorreu um erro interno. Tente novamente em alguns instantes.",
-            },
-            status_code=500
-        )
+        items = json.loads(texts)
+    except json.JSONDecodeError as exc:
+        raise HTTPException(status_code=400, detail=f"'texts' deve ser um array JSON: {exc}")
+    if not isinstance(items, list) or not all(isinstance(item, str) for item in items):
+        raise HTTPException(status_code=400, detail="'texts' deve ser um array JSON de strings.")
+    return items
+
+
+@router.post("/classify/batch")
+async def classify_batch(
+    texts: Optional[str] = Form(None, description="Array JSON de textos de email"),
+    files: Optional[List[UploadFile]] = File(None),
+    no_cache: bool = Form(False),
+):
+    """
+    Classifica vários emails (textos e/ou arquivos) em paralelo.
+    Os resultados seguem a ordem de entrada: primeiro `texts`, depois `files`.
+    """
+    settings = get_settings()
+    text_items = _parse_texts(texts)
+    file_items = files or []
+    total = len(text_items) + len(file_items)
+    if total == 0:
+        raise HTTPException(status_code=400, detail="Provide 'texts' or 'files'.")
+    if total > settings.BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=413, detail=f"Máximo de {settings.BATCH_MAX_ITEMS} itens por lote.")
+
+    semaphore = asyncio.Semaphore(settings.BATCH_MAX_CONCURRENCY)
+
+    async def run_text(index: int, text: str) -> Dict[str, Any]:
+        async with semaphore:
+            outcome = await classify_text(text, use_cache=not no_cache)
+        return _item(index, "text", outcome.status_code, outcome.result, tokens_saved=outcome.meta["tokens_saved"])
+
+    async def run_file(index: int, file: UploadFile) -> Dict[str, Any]:
+        async with semaphore:
+            try:
+                async with await spool_upload(file, filename=file.filename) as upload:
+                    text = await read_file_text(filename=file.filename, **upload.source())
+            except UploadTooLarge as exc:
+                return _item(index, file.filename, 413, None, error=str(exc))
+            except Exception as exc:  # noqa: BLE001
+                return _item(index, file.filename, 400, None, error=f"Failed to read file: {exc}")
+            outcome = await classify_text(text, use_cache=not no_cache)
+        return _item(index, file.filename, outcome.status_code, outcome.result, tokens_saved=outcome.meta["tokens_saved"])
+
+    tasks = [run_text(i, text) for i, text in enumerate(text_items)]
+    tasks += [run_file(len(text_items) + i, file) for i, file in enumerate(file_items)]
+    results = await asyncio.gather(*tasks)
+
+    return _json_response({
+        "count": len(results),
+        "failed": sum(1 for item in results if item["error"]),
+        "results": results,
+    })
+
+
+def _item(
+    index: int,
+    source: str,
+    status_code: int,
+    result: Optional[Dict[str, Any]],
+    error: Optional[str] = None,
+    tokens_saved: int = 0,
+) -> Dict[str, Any]:
+    if error is None and status_code >= 400 and result is not None:
+        error = result.get("reason")
+    return {
+        "index": index,
+        "source": source,
+        "status": status_code,
+        "result": result,
+        "error": error,
+        "tokens_saved": tokens_saved,
+    }
+
+
+@router.get("/classify/cache")
+async def classification_cache_stats():
+    """Contadores do cache de classificações (hits, misses, evictions)."""
+    cache = get_classification_cache()
+    if cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **cache.stats()}
+
+
+@router.get("/classify/local")
+async def local_classifier_stats():
+    """Quantas classificações o pré-classificador local respondeu sem chamar o LLM."""
+    local = get_local_classifier()
+    if local is None:
+        return {"enabled": False}
+    return {"enabled": True, **local.stats()}
+
+
+@router.get("/classify/limiter")
+async def rate_limiter_stats():
+    """Estado dos limitadores de chamadas ao LLM, por provider: buckets RPM/TPM, janela AIMD e retentativas."""
+    settings = get_settings()
+    if not settings.LLM_RATE_LIMIT_ENABLED:
+        return {"enabled": False}
+    llm_router = current_router()
+    providers = list(llm_router.health) if llm_router is not None else [settings.LLM_PROVIDER]
+    return {"enabled": True, "providers": {name: get_rate_limiter(name).stats() for name in providers}}
+
+
+@router.get("/classify/hedging")
+async def hedging_stats():
+    """Quantis recentes de latência do LLM, hedges disparados/vencedores e crédito do orçamento."""
+    hedger = get_hedger()
+    if hedger is None:
+        return {"enabled": False}
+    return {"enabled": True, **hedger.stats()}
+
+
+@router.get("/classify/router")
+async def llm_router_stats():
+    """Roteador de providers (LLM_PROVIDER=router): EWMA de latência/erros por provider e failovers."""
+    llm_router = current_router()
+    if llm_router is None:
+        return {"enabled": False}
+    return {"enabled": True, **llm_router.stats()}
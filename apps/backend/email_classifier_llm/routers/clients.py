@@ -1,25 +1,56 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
-from typing import List, Optional
+import json
 
-from ..database import get_db
-from ..services.client_service import ClientService
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Awaitable, Callable, Optional
+
+from core.config import get_settings
+from ..database import get_db, get_sessionmaker
+from ..services.client_cache import get_client_cache, serialize_client
+from ..services.client_search import detect_query_shape
+from ..services.client_service import AsyncClientService
 from ..models.client import Client
 
 router = APIRouter(tags=["clients"])
 
 
+async def _read_through(kind: str, value, load: Callable[[], Awaitable[Optional[Client]]]) -> Optional[bytes]:
+    """JSON do cliente a partir do cache (id | cpf | numero); no miss, carrega do banco e guarda."""
+    cache = get_client_cache()
+    if cache is not None:
+        payload = cache.get(value) if kind == "id" else cache.get_by(kind, value)
+        if payload is not None:
+            return payload
+    client = await load()
+    if client is None:
+        return None
+    return cache.put(client) if cache is not None else serialize_client(client)
+
+
+def _json(*parts: bytes) -> Response:
+    return Response(content=b"".join(parts), media_type="application/json")
+
+
 @router.get("/clients/search")
 async def search_clients(
     q: str = Query(..., min_length=2, description="Termo de busca (nome, CPF, número do cliente ou email)"),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Busca clientes por termo de pesquisa
     """
     try:
-        client_service = ClientService(db)
-        clients = client_service.search_clients(q)
+        client_service = AsyncClientService(db)
+        shape, value = detect_query_shape(q)
+        if shape == "cpf" or shape == "numero":
+            load = client_service.get_client_by_cpf if shape == "cpf" else client_service.get_client_by_number
+            payload = await _read_through(shape, value, lambda: load(value))
+            if payload is None:
+                return {"success": True, "count": 0, "clients": []}
+            return _json(b'{"success":true,"count":1,"clients":[', payload, b"]}")
+
+        clients = await client_service.search_clients(q)
         
         return {
             "success": True,
@@ -30,25 +61,51 @@ async def search_clients(
         raise HTTPException(status_code=500, detail=f"Erro na busca de clientes: {str(e)}")
 
 
+@router.get("/clients/cache")
+async def client_cache_stats():
+    """Contadores do cache de clientes (hits, misses, evictions)."""
+    cache = get_client_cache()
+    if cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **cache.stats()}
+
+
+@router.get("/clients/export")
+async def export_clients(
+    chunk_size: Optional[int] = Query(None, ge=1, le=10_000, description="Linhas por bloco lido do cursor"),
+):
+    """
+    Exporta todos os clientes em NDJSON (um objeto por linha), em ordem de id.
+    As linhas vêm de um cursor no servidor em blocos de tamanho fixo, então a
+    memória usada não depende do tamanho da tabela.
+    """
+    size = chunk_size or get_settings().CLIENT_EXPORT_CHUNK_SIZE
+
+    async def rows():
+        # Sessão própria: vive enquanto a resposta está sendo enviada
+        async with get_sessionmaker()() as session:
+            async for chunk in AsyncClientService(session).iter_all_clients(size):
+                yield "".join(json.dumps(client.to_dict(), ensure_ascii=False) + "\n" for client in chunk).encode("utf-8")
+
+    return StreamingResponse(rows(), media_type="application/x-ndjson")
+
+
 @router.get("/clients/{client_id}")
 async def get_client(
     client_id: int,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Busca um cliente específico por ID
     """
     try:
-        client_service = ClientService(db)
-        client = client_service.get_client_by_id(client_id)
-        
-        if not client:
+        client_service = AsyncClientService(db)
+        payload = await _read_through("id", client_id, lambda: client_service.get_client_by_id(client_id))
+
+        if payload is None:
             raise HTTPException(status_code=404, detail="Cliente não encontrado")
-        
-        return {
-            "success": True,
-            "client": client.to_dict()
-        }
+
+        return _json(b'{"success":true,"client":', payload, b"}")
     except HTTPException:
         raise
     except Exception as e:
@@ -58,19 +115,22 @@ async def get_client(
 @router.get("/clients")
 async def list_clients(
     limit: int = Query(50, ge=1, le=100, description="Número máximo de clientes a retornar"),
-    db: Session = Depends(get_db)
+    after: Optional[int] = Query(None, ge=0, description="Cursor: id do último cliente da página anterior"),
+    db: AsyncSession = Depends(get_db)
 ):
     """
-    Lista todos os clientes com limite
+    Lista clientes em ordem de id com paginação por cursor (keyset):
+    passe o `next_cursor` da resposta em `after` para obter a próxima página
     """
     try:
-        client_service = ClientService(db)
-        clients = client_service.get_all_clients(limit)
+        client_service = AsyncClientService(db)
+        clients = await client_service.get_all_clients(limit, after)
         
         return {
             "success": True,
             "count": len(clients),
-            "clients": [client.to_dict() for client in clients]
+            "clients": [client.to_dict() for client in clients],
+            "next_cursor": clients[-1].id if len(clients) == limit else None
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erro ao listar clientes: {str(e)}")
@@ -0,0 +1,70 @@
+import asyncio
+from fastapi import APIRouter, UploadFile, File, Form, HTTPException
+from typing import Optional
+
+from ..services.job_queue import get_job_queue, get_job_workers, jobs_spool_dir
+from ..services.uploads import UploadTooLarge, spool_upload
+
+router = APIRouter(tags=["jobs"])
+
+
+def _queue():
+    queue = get_job_queue()
+    if queue is None:
+        raise HTTPException(status_code=503, detail="Fila de jobs desabilitada (JOBS_ENABLED=false).")
+    return queue
+
+
+@router.post("/jobs/classify", status_code=202)
+async def enqueue_classification(
+    text: Optional[str] = Form(None),
+    file: Optional[UploadFile] = File(None),
+    no_cache: bool = Form(False),
+    priority: int = Form(0, description="Jobs com prioridade maior são processados primeiro"),
+):
+    """
+    Enfileira a classificação e responde na hora com o id do job.
+    Arquivos são só gravados em disco; a extração roda no worker.
+    """
+    queue = _queue()
+    if not text and not file:
+        raise HTTPException(status_code=400, detail="Provide 'text' or 'file'.")
+
+    payload = {"text": text, "use_cache": not no_cache}
+    if file is not None:
+        try:
+            async with await spool_upload(file, filename=file.filename, persist=True, spool_dir=jobs_spool_dir()) as upload:
+                if not upload.size:
+                    raise HTTPException(status_code=400, detail="Arquivo recebido está vazio (0 bytes).")
+                payload["file"] = {"filename": file.filename, "path": upload.keep()}
+        except UploadTooLarge as exc:
+            raise HTTPException(status_code=413, detail=str(exc))
+
+    job_id = await asyncio.to_thread(queue.enqueue, payload, priority=priority)
+    workers = get_job_workers()
+    if workers is not None:
+        workers.notify()
+    return {"id": job_id, "status": "queued"}
+
+
+@router.get("/jobs")
+async def job_queue_stats():
+    """Jobs por status e os últimos enviados ao dead letter."""
+    queue = get_job_queue()
+    if queue is None:
+        return {"enabled": False}
+    stats, dead = await asyncio.gather(asyncio.to_thread(queue.stats), asyncio.to_thread(queue.dead_letters))
+    return {"enabled": True, **stats, "dead_letters": dead}
+
+
+@router.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    """
+    Estado do job; quando `done` (ou `failed` após as tentativas), `result`
+    tem o mesmo formato da resposta de /api/classify e `status_code` o status
+    que ela teria.
+    """
+    job = await asyncio.to_thread(_queue().get, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job não encontrado")
+    return job
@@ -0,0 +1,134 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from functools import lru_cache
+from typing import Any, Dict, Optional
+
+from core.config import get_settings
+from .ttl_cache import TTLCache
+
+
+def make_cache_key(text: str, *, prompt_version: str, model: str) -> str:
+    """Chave endereçada por conteúdo: texto pré-processado + versão do prompt + modelo."""
+    digest = hashlib.sha256()
+    for part in (prompt_version, model, text):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\x00")
+    return digest.hexdigest()
+
+
+class SQLiteResultStore:
+    """Camada persistente opcional (sobrevive a reinícios)."""
+
+    def __init__(self, path: str, ttl_seconds: float) -> None:
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS classification_cache ("
+            " key TEXT PRIMARY KEY,"
+            " value TEXT NOT NULL,"
+            " expires_at REAL NOT NULL)"
+        )
+        self.hits = 0
+        self.misses = 0
+        self.expirations = 0
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM classification_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            if row[1] <= time.time():
+                self._conn.execute("DELETE FROM classification_cache WHERE key = ?", (key,))
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self.hits += 1
+        return json.loads(row[0])
+
+    def set(self, key: str, value: Dict[str, Any]) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO classification_cache (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, json.dumps(value, ensure_ascii=False), time.time() + self.ttl_seconds),
+            )
+
+    def purge_expired(self) -> int:
+        with self._lock:
+            cur = self._conn.execute("DELETE FROM classification_cache WHERE expires_at <= ?", (time.time(),))
+            self.expirations += cur.rowcount
+            return cur.rowcount
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            size = self._conn.execute("SELECT COUNT(*) FROM classification_cache").fetchone()[0]
+        return {"size": size, "hits": self.hits, "misses": self.misses, "expirations": self.expirations}
+
+
+class ClassificationCache:
+    """
+    Cache de resultados de classificação: LRU/TTL em memória com camada
+    SQLite opcional. Hits em disco são promovidos para a memória.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float, sqlite_path: str | None = None) -> None:
+        self.memory: TTLCache[Dict[str, Any]] = TTLCache(max_entries, ttl_seconds)
+        self.disk = SQLiteResultStore(sqlite_path, ttl_seconds) if sqlite_path else None
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        value = self.memory.get(key)
+        if value is None and self.disk is not None:
+            value = await asyncio.to_thread(self.disk.get, key)
+            if value is not None:
+                self.memory.set(key, value)
+        return dict(value) if value is not None else None
+
+    async def set(self, key: str, value: Dict[str, Any]) -> None:
+        self.memory.set(key, dict(value))
+        if self.disk is not None:
+            await asyncio.to_thread(self.disk.set, key, value)
+
+    def close(self) -> None:
+        if self.disk is not None:
+            self.disk.close()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "memory": self.memory.stats(),
+            "disk": self.disk.stats() if self.disk is not None else None,
+        }
+
+
+@lru_cache(maxsize=1)
+def get_classification_cache() -> ClassificationCache | None:
+    settings = get_settings()
+    if not settings.CLASSIFICATION_CACHE_ENABLED:
+        return None
+    return ClassificationCache(
+        max_entries=settings.CLASSIFICATION_CACHE_MAX_ENTRIES,
+        ttl_seconds=settings.CLASSIFICATION_CACHE_TTL_SECONDS,
+        sqlite_path=settings.CLASSIFICATION_CACHE_SQLITE_PATH,
+    )
+
+
+def close_classification_cache() -> None:
+    if get_classification_cache.cache_info().currsize:
+        cache = get_classification_cache()
+        if cache is not None:
+            cache.close()
+        get_classification_cache.cache_clear()
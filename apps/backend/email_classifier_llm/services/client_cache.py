@@ -0,0 +1,94 @@
+"""
+Cache read-through de clientes: guarda o JSON já serializado (bytes) de
+`Client.to_dict()`, acessível por id, CPF e número do cliente.
+
+Escritas via ORM invalidam as entradas pelos eventos `after_update` /
+`after_delete` do mapper; em deploys com vários processos, o TTL limita
+por quanto tempo outro processo pode servir um registro alterado.
+"""
+from __future__ import annotations
+
+import json
+from functools import lru_cache
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from sqlalchemy import event, inspect
+
+from core.config import get_settings
+from ..models.client import Client, normalize_cpf
+from .ttl_cache import TTLCache
+
+AliasKey = Tuple[str, str]  # ("cpf", dígitos) | ("numero", número)
+
+
+def serialize_client(client: Client) -> bytes:
+    return json.dumps(client.to_dict(), ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def alias_key(kind: str, value: str) -> AliasKey:
+    return (kind, normalize_cpf(value) if kind == "cpf" else value)
+
+
+class ClientCache:
+    def __init__(self, max_entries: int, ttl_seconds: float) -> None:
+        self.records: TTLCache[bytes] = TTLCache(max_entries, ttl_seconds)
+        # CPF/número -> id; o registro em si fica só em `records`
+        self.aliases: TTLCache[int] = TTLCache(max_entries * 2, ttl_seconds)
+
+    def get(self, client_id: int) -> Optional[bytes]:
+        return self.records.get(client_id)
+
+    def get_by(self, kind: str, value: str) -> Optional[bytes]:
+        client_id = self.aliases.get(alias_key(kind, value))
+        return self.records.get(client_id) if client_id is not None else None
+
+    def put(self, client: Client) -> bytes:
+        payload = serialize_client(client)
+        self.records.set(client.id, payload)
+        self.aliases.set(alias_key("cpf", client.cpf), client.id)
+        self.aliases.set(alias_key("numero", client.numero_cliente), client.id)
+        return payload
+
+    def invalidate(self, client_id: int, *, cpfs: Iterable[str] = (), numeros: Iterable[str] = ()) -> None:
+        self.records.delete(client_id)
+        for cpf in cpfs:
+            self.aliases.delete(alias_key("cpf", cpf))
+        for numero in numeros:
+            self.aliases.delete(alias_key("numero", numero))
+
+    def clear(self) -> None:
+        self.records.clear()
+        self.aliases.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {"records": self.records.stats(), "aliases": self.aliases.stats()}
+
+
+@lru_cache(maxsize=1)
+def get_client_cache() -> ClientCache | None:
+    settings = get_settings()
+    if not settings.CLIENT_CACHE_ENABLED:
+        return None
+    return ClientCache(
+        max_entries=settings.CLIENT_CACHE_MAX_ENTRIES,
+        ttl_seconds=settings.CLIENT_CACHE_TTL_SECONDS,
+    )
+
+
+def invalidate_client(target: Client) -> None:
+    """Remove o cliente do cache, incluindo CPF/número anteriores a uma alteração."""
+    if not get_client_cache.cache_info().currsize:
+        return
+    cache = get_client_cache()
+    if cache is None or target.id is None:
+        return
+    state = inspect(target)
+    cpfs = [target.cpf, *state.attrs.cpf.history.deleted]
+    numeros = [target.numero_cliente, *state.attrs.numero_cliente.history.deleted]
+    cache.invalidate(target.id, cpfs=[c for c in cpfs if c], numeros=[n for n in numeros if n])
+
+
+@event.listens_for(Client, "after_update")
+@event.listens_for(Client, "after_delete")
+def _invalidate_on_write(mapper, connection, target: Client) -> None:
+    invalidate_client(target)
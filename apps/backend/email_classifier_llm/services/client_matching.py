@@ -0,0 +1,89 @@
+"""
+Identificação automática de clientes citados no email.
+
+Uma única passada de regex (CPF com ou sem máscara, número do cliente e
+email) recolhe os candidatos do texto original — assinaturas costumam
+trazer o CPF e são cortadas antes do LLM — e todos são resolvidos numa só
+consulta `IN (...)` (`AsyncClientService.find_clients`), em vez de uma busca
+manual em /api/clients/search por identificador.
+"""
+from __future__ import annotations
+
+import logging
+import re
+from typing import Any, Dict, List, NamedTuple
+
+from core.config import get_settings
+from ..database import get_sessionmaker
+from ..models.client import Client, normalize_cpf
+from .client_service import AsyncClientService
+
+logger = logging.getLogger(__name__)
+
+_IDENTIFIER_RE = re.compile(
+    r"(?P<email>[\w.+-]+@[\w-]+(?:\.[\w-]+)+)"
+    r"|(?P<numero>\bCLI\d+\b)"
+    r"|(?P<cpf>(?<![\d.])\d{3}\.?\d{3}\.?\d{3}-?\d{2}(?![\d-]))",
+    re.IGNORECASE,
+)
+
+
+class Identifiers(NamedTuple):
+    cpfs: List[str]  # só dígitos
+    numeros: List[str]  # maiúsculas
+    emails: List[str]  # minúsculas
+
+    def __bool__(self) -> bool:
+        return bool(self.cpfs or self.numeros or self.emails)
+
+
+def extract_identifiers(text: str, limit: int = 20) -> Identifiers:
+    """Candidatos na ordem em que aparecem, sem repetição, até `limit` no total."""
+    found: Dict[str, Dict[str, None]] = {"cpf": {}, "numero": {}, "email": {}}
+    total = 0
+    for match in _IDENTIFIER_RE.finditer(text or ""):
+        kind = match.lastgroup
+        value = match.group(kind)
+        value = normalize_cpf(value) if kind == "cpf" else value.upper() if kind == "numero" else value.lower()
+        if value in found[kind]:
+            continue
+        found[kind][value] = None
+        total += 1
+        if total >= limit:
+            break
+    return Identifiers(list(found["cpf"]), list(found["numero"]), list(found["email"]))
+
+
+def matched_by(client: Client, identifiers: Identifiers) -> List[str]:
+    """Quais identificadores do texto apontaram para o cliente."""
+    kinds = []
+    if client.cpf_digits in identifiers.cpfs:
+        kinds.append("cpf")
+    if client.numero_cliente in identifiers.numeros:
+        kinds.append("numero_cliente")
+    if client.email and client.email.lower() in identifiers.emails:
+        kinds.append("email")
+    return kinds
+
+
+def matching_enabled() -> bool:
+    settings = get_settings()
+    return settings.ENABLE_DB and settings.CLIENT_MATCH_ENABLED
+
+
+async def find_mentioned_clients(text: str) -> List[Dict[str, Any]]:
+    """
+    Clientes citados no texto, com `matched_by`. Falhas no banco não
+    derrubam a classificação: o erro é registrado e a lista volta vazia.
+    """
+    identifiers = extract_identifiers(text, get_settings().CLIENT_MATCH_MAX_IDENTIFIERS)
+    if not identifiers:
+        return []
+
+    try:
+        async with get_sessionmaker()() as db:
+            clients = await AsyncClientService(db).find_clients(*identifiers)
+    except Exception as exc:  # noqa: BLE001
+        logger.warning("Client lookup for classification failed: %s", exc)
+        return []
+    return [{**client.to_dict(), "matched_by": matched_by(client, identifiers)} for client in clients]
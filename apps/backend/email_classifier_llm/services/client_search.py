@@ -0,0 +1,176 @@
+"""
+Busca de clientes.
+
+O formato da consulta é detectado primeiro: CPF (com ou sem máscara),
+número do cliente e email vão direto para buscas exatas em colunas com
+índice (`cpf_digits`, `numero_cliente`, `lower(email)`). Só texto livre
+cai na busca textual sobre a coluna normalizada `search_text`:
+
+- PostgreSQL: índice GIN `gin_trgm_ops` (pg_trgm) atende o `LIKE '%termo%'`
+  de cada palavra; o resultado é ordenado por `word_similarity`.
+- SQLite (dev/local): tabela FTS5 com tokenizer trigram, ordenada por bm25.
+- Outros bancos: `LIKE` sobre `search_text` (sem índice).
+
+Os índices são criados pelas migrações `0002`/`0003` (ou por
+`create_search_index` em bancos criados com `Base.metadata.create_all`).
+"""
+from __future__ import annotations
+
+import re
+from typing import List, Tuple
+
+from sqlalchemy import Select, bindparam, column, func, literal_column, select, table, text
+from sqlalchemy.engine import Connection
+
+from ..models.client import Client, build_search_text, normalize_cpf, normalize_search_text
+
+SEARCH_LIMIT = 10
+FTS_TABLE = "clients_fts"
+TRGM_INDEX = "ix_clients_search_text_trgm"
+MIN_TRIGRAM_TERM = 3  # termos menores não geram trigramas
+BACKFILL_BATCH = 5_000
+
+_fts = table(FTS_TABLE, column("rowid"), column("rank"))
+
+_CPF_RE = re.compile(r"\d{3}\.?\d{3}\.?\d{3}-?\d{2}")
+_CLIENT_NUMBER_RE = re.compile(r"CLI\d+", re.IGNORECASE)
+_EMAIL_RE = re.compile(r"[^@\s]+@[^@\s]+\.[^@\s]+")
+
+
+def detect_query_shape(query: str) -> Tuple[str, str]:
+    """(formato, valor normalizado); formato: cpf | numero | email | text."""
+    query = query.strip()
+    if _CPF_RE.fullmatch(query):
+        return "cpf", normalize_cpf(query)
+    if _CLIENT_NUMBER_RE.fullmatch(query):
+        return "numero", query.upper()
+    if _EMAIL_RE.fullmatch(query):
+        return "email", query.lower()
+    return "text", query
+
+
+def cpf_statement(cpf: str) -> Select:
+    return select(Client).where(Client.cpf_digits == normalize_cpf(cpf)).limit(1)
+
+
+def number_statement(numero_cliente: str) -> Select:
+    return select(Client).where(Client.numero_cliente == numero_cliente).limit(1)
+
+
+def email_statement(email: str) -> Select:
+    return select(Client).where(func.lower(Client.email) == email.lower()).limit(SEARCH_LIMIT)
+
+
+def lookup_statement(query: str, dialect: str) -> Select:
+    """Busca exata quando o formato da consulta permite; senão, busca textual."""
+    shape, value = detect_query_shape(query)
+    if shape == "cpf":
+        return cpf_statement(value)
+    if shape == "numero":
+        return number_statement(value)
+    if shape == "email":
+        return email_statement(value)
+    return search_statement(query, dialect)
+
+
+def search_terms(query: str) -> List[str]:
+    return normalize_search_text(query).split()
+
+
+def _fts_query(terms: List[str]) -> str:
+    # Cada termo vira uma frase FTS5 ("..."), combinadas com AND implícito
+    return " ".join('"' + term.replace('"', '""') + '"' for term in terms)
+
+
+def search_statement(query: str, dialect: str) -> Select:
+    """SELECT dos clientes que contêm todas as palavras da busca, mais relevantes primeiro."""
+    terms = search_terms(query)
+    if dialect == "sqlite":
+        indexed = [term for term in terms if len(term) >= MIN_TRIGRAM_TERM]
+        if indexed:
+            short = [term for term in terms if len(term) < MIN_TRIGRAM_TERM]
+            return (
+                select(Client)
+                .join(_fts, _fts.c.rowid == Client.id)
+                .where(literal_column(FTS_TABLE).match(_fts_query(indexed)))
+                .where(*(Client.search_text.contains(term, autoescape=True) for term in short))
+                .order_by(_fts.c.rank)
+                .limit(SEARCH_LIMIT)
+            )
+
+    stmt = select(Client).where(*(Client.search_text.contains(term, autoescape=True) for term in terms))
+    if dialect == "postgresql":
+        ranking = func.word_similarity(" ".join(terms), Client.search_text).desc()
+    else:
+        ranking = func.length(Client.search_text)
+    return stmt.order_by(ranking, Client.id).limit(SEARCH_LIMIT)
+
+
+def _backfill(connection: Connection, target: str, sources: Tuple[str, ...], compute) -> int:
+    """Preenche a coluna derivada `target` das linhas antigas, em lotes por id."""
+    clients = Client.__table__
+    updated = 0
+    last_id = 0
+    while True:
+        rows = connection.execute(
+            select(clients.c.id, *(clients.c[name] for name in sources))
+            .where(clients.c[target].is_(None), clients.c.id > last_id)
+            .order_by(clients.c.id)
+            .limit(BACKFILL_BATCH)
+        ).all()
+        if not rows:
+            return updated
+        connection.execute(
+            clients.update().where(clients.c.id == bindparam("row_id")).values({target: bindparam("value")}),
+            [{"row_id": row[0], "value": compute(*row[1:])} for row in rows],
+        )
+        updated += len(rows)
+        last_id = rows[-1][0]
+
+
+def backfill_search_text(connection: Connection) -> int:
+    return _backfill(connection, "search_text", ("nome_completo", "cpf", "numero_cliente", "email"), build_search_text)
+
+
+def backfill_cpf_digits(connection: Connection) -> int:
+    return _backfill(connection, "cpf_digits", ("cpf",), normalize_cpf)
+
+
+def create_search_index(connection: Connection) -> None:
+    """Backfill da coluna e índice de busca do banco conectado (idempotente)."""
+    backfill_search_text(connection)
+    dialect = connection.dialect.name
+    if dialect == "postgresql":
+        connection.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+        connection.execute(text(
+            f"CREATE INDEX IF NOT EXISTS {TRGM_INDEX} ON clients USING gin (search_text gin_trgm_ops)"
+        ))
+    elif dialect == "sqlite":
+        connection.execute(text(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+            "search_text, content='clients', content_rowid='id', tokenize='trigram')"
+        ))
+        connection.execute(text(
+            f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON clients BEGIN "
+            f"INSERT INTO {FTS_TABLE}(rowid, search_text) VALUES (new.id, new.search_text); END"
+        ))
+        connection.execute(text(
+            f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON clients BEGIN "
+            f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, search_text) VALUES ('delete', old.id, old.search_text); END"
+        ))
+        connection.execute(text(
+            f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE ON clients BEGIN "
+            f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, search_text) VALUES ('delete', old.id, old.search_text); "
+            f"INSERT INTO {FTS_TABLE}(rowid, search_text) VALUES (new.id, new.search_text); END"
+        ))
+        connection.execute(text(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')"))
+
+
+def drop_search_index(connection: Connection) -> None:
+    dialect = connection.dialect.name
+    if dialect == "postgresql":
+        connection.execute(text(f"DROP INDEX IF EXISTS {TRGM_INDEX}"))
+    elif dialect == "sqlite":
+        for suffix in ("ai", "ad", "au"):
+            connection.execute(text(f"DROP TRIGGER IF EXISTS {FTS_TABLE}_{suffix}"))
+        connection.execute(text(f"DROP TABLE IF EXISTS {FTS_TABLE}"))
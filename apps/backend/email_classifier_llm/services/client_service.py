@@ -1,53 +1,147 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import or_
-from typing import List, Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import func, or_, select
+from typing import AsyncIterator, Iterable, List, Optional
 from ..models.client import Client
+from .client_search import cpf_statement, email_statement, lookup_statement, number_statement
+
+
+def page_statement(limit: int, after: Optional[int] = None):
+    stmt = select(Client).order_by(Client.id).limit(limit)
+    if after is not None:
+        stmt = stmt.where(Client.id > after)
+    return stmt
+
+
+def identifiers_statement(cpfs: Iterable[str] = (), numeros: Iterable[str] = (), emails: Iterable[str] = ()):
+    """Uma única consulta `IN (...)` para todos os identificadores (CPF só dígitos, email minúsculo)"""
+    conditions = []
+    if cpfs:
+        conditions.append(Client.cpf_digits.in_(list(cpfs)))
+    if numeros:
+        conditions.append(Client.numero_cliente.in_(list(numeros)))
+    if emails:
+        conditions.append(func.lower(Client.email).in_(list(emails)))
+    if not conditions:
+        return None
+    return select(Client).where(or_(*conditions)).order_by(Client.id)
 
 
 class ClientService:
     def __init__(self, db: Session):
         self.db = db
-    
+
     def search_clients(self, query: str) -> List[Client]:
         """
-        Busca clientes por nome, CPF, número do cliente ou email
+        Busca clientes por nome, CPF, número do cliente ou email.
+        CPF, número e email completos usam busca exata; texto livre é
+        ordenado por similaridade
         """
         if not query or len(query.strip()) < 2:
             return []
-        
-        search_term = f"%{query.strip()}%"
-        
-        clients = self.db.query(Client).filter(
-            or_(
-                Client.nome_completo.ilike(search_term),
-                Client.cpf.ilike(search_term),
-                Client.numero_cliente.ilike(search_term),
-                Client.email.ilike(search_term)
-            )
-        ).limit(10).all()
-        
-        return clients
-    
+
+        dialect = self.db.get_bind().dialect.name
+        return list(self.db.scalars(lookup_statement(query, dialect)))
+
     def get_client_by_id(self, client_id: int) -> Optional[Client]:
         """
         Busca um cliente específico por ID
         """
         return self.db.query(Client).filter(Client.id == client_id).first()
-    
+
     def get_client_by_cpf(self, cpf: str) -> Optional[Client]:
         """
         Busca um cliente específico por CPF
         """
-        return self.db.query(Client).filter(Client.cpf == cpf).first()
-    
+        return self.db.scalar(cpf_statement(cpf))
+
     def get_client_by_number(self, numero_cliente: str) -> Optional[Client]:
         """
         Busca um cliente específico por número do cliente
         """
-        return self.db.query(Client).filter(Client.numero_cliente == numero_cliente).first()
-    
-    def get_all_clients(self, limit: int = 50) -> List[Client]:
+        return self.db.scalar(number_statement(numero_cliente))
+
+    def get_client_by_email(self, email: str) -> Optional[Client]:
+        """
+        Busca um cliente específico por email (sem diferenciar maiúsculas)
+        """
+        return self.db.scalar(email_statement(email))
+
+    def get_all_clients(self, limit: int = 50, after: Optional[int] = None) -> List[Client]:
+        """
+        Retorna clientes em ordem de id, a partir do cursor `after` (paginação keyset)
+        """
+        return list(self.db.scalars(page_statement(limit, after)))
+
+    def find_clients(self, cpfs: Iterable[str] = (), numeros: Iterable[str] = (), emails: Iterable[str] = ()) -> List[Client]:
+        """
+        Resolve vários CPFs, números e emails de uma vez (uma consulta só)
+        """
+        stmt = identifiers_statement(cpfs, numeros, emails)
+        return list(self.db.scalars(stmt)) if stmt is not None else []
+
+
+class AsyncClientService:
+    """Mesmas consultas do ClientService sobre uma AsyncSession (não bloqueia o event loop)."""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def search_clients(self, query: str) -> List[Client]:
+        """
+        Busca clientes por nome, CPF, número do cliente ou email.
+        CPF, número e email completos usam busca exata; texto livre é
+        ordenado por similaridade
+        """
+        if not query or len(query.strip()) < 2:
+            return []
+
+        dialect = self.db.get_bind().dialect.name
+        return list(await self.db.scalars(lookup_statement(query, dialect)))
+
+    async def get_client_by_id(self, client_id: int) -> Optional[Client]:
+        """
+        Busca um cliente específico por ID
+        """
+        return await self.db.get(Client, client_id)
+
+    async def get_client_by_cpf(self, cpf: str) -> Optional[Client]:
+        """
+        Busca um cliente específico por CPF
+        """
+        return await self.db.scalar(cpf_statement(cpf))
+
+    async def get_client_by_number(self, numero_cliente: str) -> Optional[Client]:
+        """
+        Busca um cliente específico por número do cliente
+        """
+        return await self.db.scalar(number_statement(numero_cliente))
+
+    async def get_client_by_email(self, email: str) -> Optional[Client]:
+        """
+        Busca um cliente específico por email (sem diferenciar maiúsculas)
+        """
+        return await self.db.scalar(email_statement(email))
+
+    async def get_all_clients(self, limit: int = 50, after: Optional[int] = None) -> List[Client]:
+        """
+        Retorna clientes em ordem de id, a partir do cursor `after` (paginação keyset)
+        """
+        return list(await self.db.scalars(page_statement(limit, after)))
+
+    async def find_clients(self, cpfs: Iterable[str] = (), numeros: Iterable[str] = (), emails: Iterable[str] = ()) -> List[Client]:
+        """
+        Resolve vários CPFs, números e emails de uma vez (uma consulta só)
+        """
+        stmt = identifiers_statement(cpfs, numeros, emails)
+        return list(await self.db.scalars(stmt)) if stmt is not None else []
+
+    async def iter_all_clients(self, chunk_size: int = 1000) -> AsyncIterator[List[Client]]:
         """
-        Retorna todos os clientes com limite
+        Percorre a tabela inteira com cursor no servidor, em blocos de `chunk_size`
         """
-        return self.db.query(Client).limit(limit).all()
+        result = await self.db.stream_scalars(
+            select(Client).order_by(Client.id).execution_options(yield_per=chunk_size)
+        )
+        async for chunk in result.partitions():
+            yield chunk
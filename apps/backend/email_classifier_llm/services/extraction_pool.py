@@ -0,0 +1,155 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import multiprocessing
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import lru_cache, partial
+from typing import BinaryIO
+
+from core.config import get_settings
+from .processor import PDF_EXTENSIONS, _ext_of, extract_text_from_file, source_size
+from .telemetry import file_type_of, span
+
+logger = logging.getLogger(__name__)
+
+
+def _warmup() -> int:
+    # Importa pypdf e o processor no worker antes da primeira requisição
+    import pypdf  # noqa: F401
+    return os.getpid()
+
+
+class ExtractionPool:
+    """
+    Executa `extract_text_from_file` fora do event loop.
+
+    kind: "process" (padrão, com fallback para threads), "thread" ou
+    "inline" (no próprio event loop, apenas para comparação em benchmarks).
+    O timeout libera a requisição; o worker termina o documento em segundo
+    plano, limitado pelo teto de páginas.
+    """
+
+    def __init__(
+        self,
+        *,
+        kind: str,
+        max_workers: int,
+        timeout_seconds: float,
+        max_pages: int | None,
+        max_bytes: int,
+        inline_max_bytes: int = 0,
+    ) -> None:
+        self.max_workers = max_workers
+        self.timeout_seconds = timeout_seconds
+        self.max_pages = max_pages
+        self.max_bytes = max_bytes
+        self.inline_max_bytes = inline_max_bytes
+        self.kind = kind
+        self._executor: Executor | None = None
+        if kind == "process":
+            try:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=max_workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            except (OSError, NotImplementedError, ImportError) as exc:
+                logger.warning("Process pool unavailable, using threads: %s", exc)
+                self.kind = "thread"
+        if self.kind == "thread":
+            self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="extract")
+
+    async def warm(self) -> None:
+        """Sobe todos os workers (spawn + imports) antes do primeiro upload."""
+        if self._executor is None:
+            return
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*(loop.run_in_executor(self._executor, _warmup) for _ in range(self.max_workers)))
+
+    async def extract(
+        self,
+        *,
+        filename: str,
+        content: bytes | None = None,
+        path: str | None = None,
+        fileobj: BinaryIO | None = None,
+    ) -> str:
+        """
+        Recebe o conteúdo em memória, o caminho do upload em disco ou o arquivo
+        aberto. Threads leem `fileobj` direto; para o pool de processos ele é
+        lido antes, já que só bytes e caminhos cruzam o processo.
+        """
+        with span("extract", file_type=file_type_of(filename)):
+            return await self._extract(filename=filename, content=content, path=path, fileobj=fileobj)
+
+    async def _extract(
+        self, *, filename: str, content: bytes | None, path: str | None, fileobj: BinaryIO | None
+    ) -> str:
+        size = source_size(content=content, path=path, fileobj=fileobj)
+        if size > self.max_bytes:
+            raise ValueError(f"Arquivo excede o limite de {self.max_bytes} bytes para extração.")
+
+        small_text = _ext_of(filename) not in PDF_EXTENSIONS and size <= self.inline_max_bytes
+        if fileobj is not None and self.kind == "process" and not small_text:
+            content, fileobj = await asyncio.to_thread(_read_all, fileobj), None
+        func = partial(
+            extract_text_from_file,
+            filename=filename,
+            content=content,
+            path=path,
+            fileobj=fileobj,
+            max_pages=self.max_pages,
+        )
+        if self._executor is None or small_text:
+            return func()
+
+        executor = self._executor
+        try:
+            return await self._run(executor, func)
+        except BrokenProcessPool:
+            # Worker morto (ex.: OOM): troca o pool por threads (uma vez só, mesmo com
+            # várias extrações falhando juntas) e tenta de novo uma única vez
+            if self._executor is executor:
+                logger.warning("Extraction process pool broken, falling back to threads")
+                executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="extract")
+                self.kind = "thread"
+            return await self._run(self._executor, func)
+
+    async def _run(self, executor: Executor, func) -> str:
+        loop = asyncio.get_running_loop()
+        try:
+            return await asyncio.wait_for(loop.run_in_executor(executor, func), self.timeout_seconds)
+        except asyncio.TimeoutError:
+            raise TimeoutError(f"Extração excedeu {self.timeout_seconds:g}s") from None
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+def _read_all(fileobj: BinaryIO) -> bytes:
+    fileobj.seek(0)
+    return fileobj.read()
+
+
+@lru_cache(maxsize=1)
+def get_extraction_pool() -> ExtractionPool:
+    settings = get_settings()
+    return ExtractionPool(
+        kind=settings.EXTRACTION_POOL,
+        max_workers=settings.EXTRACTION_WORKERS,
+        timeout_seconds=settings.EXTRACTION_TIMEOUT_SECONDS,
+        max_pages=settings.EXTRACTION_MAX_PAGES,
+        max_bytes=settings.EXTRACTION_MAX_BYTES,
+        inline_max_bytes=settings.EXTRACTION_INLINE_MAX_BYTES,
+    )
+
+
+def close_extraction_pool() -> None:
+    if get_extraction_pool.cache_info().currsize:
+        get_extraction_pool().shutdown()
+        get_extraction_pool.cache_clear()
@@ -0,0 +1,173 @@
+"""
+Hedging de chamadas ao LLM para cortar a cauda de latência (opt-in).
+
+Se a chamada não volta dentro do percentil configurado da latência recente
+(`LatencySketch`), uma segunda chamada idêntica é disparada; a primeira
+resposta vence e a outra é cancelada. Cada chamada primária rende
+`budget_ratio` de crédito no `HedgeBudget` e cada hedge gasta 1, então as
+chamadas extras ficam limitadas a essa fração (ex.: 5%).
+"""
+from __future__ import annotations
+
+import asyncio
+import math
+import time
+from functools import lru_cache
+from typing import Any, Awaitable, Callable, Dict, Optional, TypeVar
+
+from core.config import get_settings
+
+T = TypeVar("T")
+
+
+class LatencySketch:
+    """
+    Quantis aproximados em memória constante: histograma logarítmico (estilo
+    DDSketch, erro relativo `relative_accuracy`) em duas gerações de `window`
+    amostras — a mais antiga é descartada quando a atual enche.
+    """
+
+    def __init__(self, *, window: int = 1000, relative_accuracy: float = 0.01) -> None:
+        self.window = window
+        self._gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self._gamma)
+        self._current: Dict[int, int] = {}
+        self._previous: Dict[int, int] = {}
+        self._current_count = 0
+        self._previous_count = 0
+
+    def add(self, seconds: float) -> None:
+        index = math.ceil(math.log(max(seconds, 1e-6)) / self._log_gamma)
+        self._current[index] = self._current.get(index, 0) + 1
+        self._current_count += 1
+        if self._current_count >= self.window:
+            self._previous, self._previous_count = self._current, self._current_count
+            self._current, self._current_count = {}, 0
+
+    @property
+    def count(self) -> int:
+        return self._current_count + self._previous_count
+
+    def quantile(self, q: float) -> Optional[float]:
+        total = self.count
+        if not total:
+            return None
+        rank = q * (total - 1)
+        seen = 0
+        for index in sorted(self._current.keys() | self._previous.keys()):
+            seen += self._current.get(index, 0) + self._previous.get(index, 0)
+            if seen > rank:
+                # Centro do bucket (gamma^(i-1), gamma^i]
+                return 2 * self._gamma ** index / (self._gamma + 1)
+        return None
+
+
+class HedgeBudget:
+    """Crédito de hedges: `ratio` por chamada primária, acumulando até `burst`."""
+
+    def __init__(self, *, ratio: float, burst: float) -> None:
+        self.ratio = ratio
+        self.burst = burst
+        self.credit = 0.0
+
+    def earn(self) -> None:
+        self.credit = min(self.burst, self.credit + self.ratio)
+
+    def try_spend(self) -> bool:
+        if self.credit >= 1:
+            self.credit -= 1
+            return True
+        return False
+
+
+class Hedger:
+    def __init__(
+        self,
+        *,
+        sketch: LatencySketch,
+        budget: HedgeBudget,
+        percentile: float,
+        min_samples: int,
+        min_delay: float,
+    ) -> None:
+        self.sketch = sketch
+        self.budget = budget
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self.min_delay = min_delay
+        self.counters = {"calls": 0, "hedged": 0, "hedge_wins": 0, "denied_by_budget": 0}
+
+    def hedge_delay(self) -> Optional[float]:
+        """Quanto esperar pela primária antes do hedge (None enquanto o sketch tem poucas amostras)."""
+        if self.sketch.count < self.min_samples:
+            return None
+        return max(self.sketch.quantile(self.percentile) or 0.0, self.min_delay)
+
+    async def run(self, call: Callable[[], Awaitable[T]]) -> T:
+        self.counters["calls"] += 1
+        self.budget.earn()
+        delay = self.hedge_delay()
+        start = time.monotonic()
+        primary = asyncio.ensure_future(self._timed(call))
+        hedge: asyncio.Future | None = None
+        try:
+            if delay is None:
+                return await primary
+            done, _ = await asyncio.wait({primary}, timeout=delay)
+            if done:
+                return primary.result()
+            if not self.budget.try_spend():
+                self.counters["denied_by_budget"] += 1
+                return await primary
+
+            self.counters["hedged"] += 1
+            hedge = asyncio.ensure_future(self._timed(call))
+            pending = {primary, hedge}
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is hedge:
+                            self.counters["hedge_wins"] += 1
+                            # A primária perdedora levou pelo menos isso; sem a amostra o sketch subestimaria a cauda
+                            self.sketch.add(time.monotonic() - start)
+                        return task.result()
+            # As duas falharam: propaga o erro da primária
+            return primary.result()
+        finally:
+            losers = [task for task in (primary, hedge) if task is not None and not task.done()]
+            for task in losers:
+                task.cancel()
+            if losers:
+                await asyncio.gather(*losers, return_exceptions=True)
+
+    async def _timed(self, call: Callable[[], Awaitable[T]]) -> T:
+        start = time.monotonic()
+        result = await call()
+        self.sketch.add(time.monotonic() - start)
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        quantiles = {f"p{int(q * 100)}_ms": self.sketch.quantile(q) for q in (0.5, 0.95, 0.99)}
+        delay = self.hedge_delay()
+        return {
+            "samples": self.sketch.count,
+            **{name: round(value * 1000, 1) if value is not None else None for name, value in quantiles.items()},
+            "hedge_after_ms": round(delay * 1000, 1) if delay is not None else None,
+            "budget_credit": round(self.budget.credit, 2),
+            **self.counters,
+        }
+
+
+@lru_cache(maxsize=1)
+def get_hedger() -> Hedger | None:
+    settings = get_settings()
+    if not settings.LLM_HEDGING_ENABLED:
+        return None
+    return Hedger(
+        sketch=LatencySketch(window=settings.LLM_HEDGE_WINDOW),
+        budget=HedgeBudget(ratio=settings.LLM_HEDGE_BUDGET_RATIO, burst=settings.LLM_HEDGE_BUDGET_BURST),
+        percentile=settings.LLM_HEDGE_PERCENTILE,
+        min_samples=settings.LLM_HEDGE_MIN_SAMPLES,
+        min_delay=settings.LLM_HEDGE_MIN_DELAY_SECONDS,
+    )
@@ -0,0 +1,327 @@
+"""
+Ingestão em massa de emails arquivados: arquivos mbox, diretórios de `.eml`
+e exportações JSONL, classificados pelo mesmo pipeline de /api/classify.
+
+As mensagens são lidas em streaming (uma por vez), a extração de texto roda
+no pool de extração (processos) e as chamadas ao LLM são limitadas por
+`--concurrency`. Os resultados saem na ordem das fontes, em JSONL ou SQLite,
+e o próprio arquivo de saída é o checkpoint: numa nova execução as
+mensagens já gravadas são puladas (só relidas, sem extrair nem classificar).
+Falhas que valem nova tentativa (status >= 500: LLM indisponível, prazo
+esgotado) não entram no checkpoint: a execução para antes da primeira delas
+e a próxima continua a partir dessa mensagem. Falhas de leitura (400) são
+gravadas normalmente. A janela de mensagens em andamento é limitada, então a
+memória não cresce com o tamanho do arquivo.
+
+CLI:
+    python -m email_classifier_llm.services.ingest archive.mbox emails/ export.jsonl --out results.jsonl
+    python -m email_classifier_llm.services.ingest archive.mbox --out results.db --concurrency 16
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import sqlite3
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterator, NamedTuple, Optional, Sequence
+
+from core.config import get_settings
+from .classification_cache import close_classification_cache
+from .extraction_pool import close_extraction_pool, get_extraction_pool
+from .llm_client import close_llm_clients, init_llm_clients
+from .pipeline import classify_text
+
+JSONL_SUFFIXES = {".jsonl", ".ndjson"}
+SQLITE_SUFFIXES = {".db", ".sqlite", ".sqlite3"}
+TEXT_FIELDS = ("text", "body", "content")
+RETRYABLE_STATUS = 500  # a partir deste status o registro não é gravado e a execução para
+
+
+class Message(NamedTuple):
+    key: str  # identifica a mensagem na fonte (arquivo + posição)
+    filename: str  # nome passado ao extrator (define o formato)
+    content: bytes | None = None
+    path: str | None = None
+    text: str | None = None  # já em texto (JSONL): dispensa extração
+
+
+def iter_mbox(path: str) -> Iterator[Message]:
+    """Divide o mbox nas linhas `From ` sem indexar o arquivo inteiro."""
+    lines: list[bytes] = []
+    index = 0
+    with open(path, "rb") as fh:
+        for line in fh:
+            if line.startswith(b"From ") and (not lines or lines[-1] in (b"\n", b"\r\n")):
+                if lines:
+                    yield Message(f"{path}#{index}", "message.eml", content=_unescape_mbox(lines))
+                    index += 1
+                lines = []
+                continue
+            lines.append(line)
+    if lines:
+        yield Message(f"{path}#{index}", "message.eml", content=_unescape_mbox(lines))
+
+
+def _unescape_mbox(lines: list[bytes]) -> bytes:
+    return b"".join(line[1:] if line.startswith(b">From ") else line for line in lines)
+
+
+def iter_eml_dir(path: str) -> Iterator[Message]:
+    """`.eml` do diretório (recursivo) em ordem estável; só o caminho segue para o extrator."""
+    for root, dirs, files in os.walk(path):
+        dirs.sort()
+        for name in sorted(files):
+            if name.lower().endswith(".eml"):
+                full = os.path.join(root, name)
+                yield Message(full, name, path=full)
+
+
+def iter_jsonl(path: str, text_field: Optional[str] = None) -> Iterator[Message]:
+    """Uma mensagem por linha; o texto vem de `text_field` ou do primeiro de TEXT_FIELDS presente."""
+    with open(path, "r", encoding="utf-8") as fh:
+        for lineno, line in enumerate(fh, start=1):
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            fields = (text_field,) if text_field else TEXT_FIELDS
+            text = next((record[field] for field in fields if isinstance(record.get(field), str)), "")
+            if "title" in record and not text_field:
+                text = f"Assunto: {record['title']}\n\n{text}"
+            yield Message(f"{path}:{lineno}", Path(path).name, text=text)
+
+
+def iter_sources(sources: Sequence[str], *, text_field: Optional[str] = None) -> Iterator[Message]:
+    for source in sources:
+        if os.path.isdir(source):
+            yield from iter_eml_dir(source)
+        elif Path(source).suffix.lower() in JSONL_SUFFIXES:
+            yield from iter_jsonl(source, text_field)
+        else:
+            yield from iter_mbox(source)
+
+
+class JSONLSink:
+    """Saída JSONL com flush por registro; uma linha incompleta no fim (interrupção) é descartada."""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.done, self.last_key = self._recover()
+        self._fh = open(path, "a", encoding="utf-8")
+
+    def _recover(self) -> tuple[int, Optional[str]]:
+        if not os.path.exists(self.path):
+            return 0, None
+        done, last_key, valid_bytes = 0, None, 0
+        with open(self.path, "rb") as fh:
+            for line in fh:
+                if not line.endswith(b"\n"):
+                    break
+                done += 1
+                last_key = json.loads(line)["key"]
+                valid_bytes += len(line)
+        os.truncate(self.path, valid_bytes)
+        return done, last_key
+
+    def write(self, record: Dict[str, Any]) -> None:
+        self._fh.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self._fh.flush()
+
+    def close(self) -> None:
+        self._fh.close()
+
+
+class SQLiteSink:
+    """Saída SQLite (WAL), um commit por registro."""
+
+    def __init__(self, path: str) -> None:
+        self._conn = sqlite3.connect(path, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS classifications ("
+            " seq INTEGER PRIMARY KEY,"
+            " key TEXT NOT NULL,"
+            " status INTEGER NOT NULL,"
+            " category TEXT,"
+            " result TEXT,"
+            " error TEXT,"
+            " meta TEXT)"
+        )
+        row = self._conn.execute("SELECT seq, key FROM classifications ORDER BY seq DESC LIMIT 1").fetchone()
+        self.done, self.last_key = (row[0] + 1, row[1]) if row else (0, None)
+
+    def write(self, record: Dict[str, Any]) -> None:
+        result = record["result"]
+        self._conn.execute(
+            "INSERT INTO classifications (seq, key, status, category, result, error, meta) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (
+                record["seq"], record["key"], record["status"],
+                result.get("category") if result else None,
+                json.dumps(result, ensure_ascii=False) if result is not None else None,
+                record["error"], json.dumps(record["meta"], ensure_ascii=False),
+            ),
+        )
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+def open_sink(path: str):
+    return SQLiteSink(path) if Path(path).suffix.lower() in SQLITE_SUFFIXES else JSONLSink(path)
+
+
+async def classify_message(message: Message, *, use_cache: bool = True) -> Dict[str, Any]:
+    """Extração (fora do event loop) + pipeline de classificação; erros viram registro, não exceção."""
+    text = message.text
+    if text is None:
+        try:
+            text = await get_extraction_pool().extract(
+                filename=message.filename, content=message.content, path=message.path
+            )
+        except Exception as exc:  # noqa: BLE001
+            return {"status": 400, "result": None, "error": f"Failed to read message: {exc}", "meta": {}}
+    outcome = await classify_text(text, use_cache=use_cache)
+    error = outcome.result.get("reason") if outcome.status_code >= 400 else None
+    return {"status": outcome.status_code, "result": outcome.result, "error": error, "meta": outcome.meta}
+
+
+async def ingest(
+    sources: Sequence[str],
+    out: str,
+    *,
+    concurrency: int,
+    use_cache: bool = True,
+    text_field: Optional[str] = None,
+    progress_every: int = 100,
+) -> Dict[str, Any]:
+    """
+    Classifica as mensagens das fontes e grava na ordem em `out`. Resultados
+    que terminam fora de ordem esperam num buffer limitado à janela de
+    `4 * concurrency` mensagens, assim como a leitura das fontes.
+
+    Se a próxima mensagem a gravar falhou com status >= 500, nada mais é
+    gravado, as classificações em andamento são canceladas e o resumo traz
+    `stopped` (seq, key, status e erro) para a execução ser repetida depois.
+    """
+    sink = open_sink(out)
+    skipped = sink.done
+    window = asyncio.Semaphore(max(concurrency * 4, 1))
+    llm_slots = asyncio.Semaphore(concurrency)
+    pending: Dict[int, Dict[str, Any]] = {}
+    next_seq = skipped
+    written = failed = 0
+    stopped: Optional[Dict[str, Any]] = None
+    started = time.perf_counter()
+    tasks: set[asyncio.Task] = set()
+
+    def stop(record: Dict[str, Any]) -> None:
+        nonlocal stopped
+        stopped = {name: record[name] for name in ("seq", "key", "status", "error")}
+        current = asyncio.current_task()
+        for task in tasks:
+            if task is not current:
+                task.cancel()
+        window.release()  # acorda a leitura das fontes, que então encerra
+
+    def flush() -> None:
+        nonlocal next_seq, written, failed
+        while stopped is None and next_seq in pending:
+            record = pending.pop(next_seq)
+            if record["status"] >= RETRYABLE_STATUS:
+                stop(record)
+                return
+            sink.write(record)
+            next_seq += 1
+            written += 1
+            failed += record["error"] is not None
+            window.release()
+            if progress_every and written % progress_every == 0:
+                rate = written / (time.perf_counter() - started)
+                print(f"{skipped + written} mensagens ({written} nesta execução, {rate:.1f}/s)", file=sys.stderr)
+
+    async def run(seq: int, message: Message) -> None:
+        async with llm_slots:
+            record = await classify_message(message, use_cache=use_cache)
+        pending[seq] = {"seq": seq, "key": message.key, **record}
+        flush()
+
+    def mismatch(found: Optional[str]) -> RuntimeError:
+        return RuntimeError(
+            f"Checkpoint em {out} não corresponde às fontes (esperado {sink.last_key!r}, encontrado {found!r})."
+        )
+
+    seen = 0
+    try:
+        for seq, message in enumerate(iter_sources(sources, text_field=text_field)):
+            seen = seq + 1
+            if seq < skipped:
+                if seq == skipped - 1 and message.key != sink.last_key:
+                    raise mismatch(message.key)
+                continue
+            await window.acquire()
+            if stopped is not None:
+                break
+            task = asyncio.create_task(run(seq, message))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+        if seen < skipped:
+            raise mismatch(None)
+        for result in await asyncio.gather(*tasks, return_exceptions=True):
+            if isinstance(result, Exception):
+                raise result
+    finally:
+        for task in tasks:
+            task.cancel()
+        sink.close()
+    summary: Dict[str, Any] = {"skipped": skipped, "written": written, "failed": failed}
+    if stopped is not None:
+        summary["stopped"] = stopped
+    return summary
+
+
+async def _main_async(args: argparse.Namespace) -> Dict[str, Any]:
+    await init_llm_clients()
+    await get_extraction_pool().warm()
+    try:
+        return await ingest(
+            args.sources,
+            args.out,
+            concurrency=args.concurrency,
+            use_cache=not args.no_cache,
+            text_field=args.text_field,
+            progress_every=args.progress_every,
+        )
+    finally:
+        await close_llm_clients()
+        close_classification_cache()
+        close_extraction_pool()
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    settings = get_settings()
+    parser = argparse.ArgumentParser(description="Classificação em massa de mbox, diretórios .eml e JSONL")
+    parser.add_argument("sources", nargs="+", help="Arquivos mbox, diretórios com .eml ou arquivos .jsonl")
+    parser.add_argument("--out", required=True, help="Saída .jsonl ou .db/.sqlite (também é o checkpoint)")
+    parser.add_argument("--concurrency", type=int, default=settings.BATCH_MAX_CONCURRENCY, help="Classificações simultâneas")
+    parser.add_argument("--text-field", help="Campo com o texto nas fontes JSONL (padrão: text, body ou content)")
+    parser.add_argument("--no-cache", action="store_true", help="Ignora o cache de classificações")
+    parser.add_argument("--progress-every", type=int, default=100)
+    args = parser.parse_args(argv)
+
+    summary = asyncio.run(_main_async(args))
+    print(json.dumps(summary, ensure_ascii=False))
+    if "stopped" in summary:
+        print(
+            f"Interrompido em {summary['stopped']['key']} (status {summary['stopped']['status']}); "
+            "rode o mesmo comando novamente para continuar.",
+            file=sys.stderr,
+        )
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,368 @@
+"""
+Fila durável de jobs de classificação sobre SQLite em WAL (sem broker externo).
+
+- `POST /api/jobs/classify` grava o job e responde na hora; um pool de
+  workers no próprio processo consome a fila por prioridade (maior
+  primeiro) e ordem de chegada.
+- Cada job pego ganha um lease (`JOBS_VISIBILITY_TIMEOUT_SECONDS`), renovado
+  por heartbeat enquanto o worker trabalha. Se o worker/processo morrer, o
+  lease expira e o job volta a ser entregue.
+- Falhas (exceções ou status 5xx da classificação) são repetidas com backoff
+  exponencial até `JOBS_MAX_ATTEMPTS`; depois o job fica `failed` e é copiado
+  para a tabela `dead_letter_jobs`.
+- O resultado final tem o mesmo formato da resposta de /api/classify.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from functools import lru_cache
+from typing import Any, Dict, List, NamedTuple, Optional
+
+from core.config import get_settings
+from .pipeline import classify_text, read_file_text
+
+logger = logging.getLogger(__name__)
+
+QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+
+
+class Job(NamedTuple):
+    id: str
+    payload: Dict[str, Any]
+    attempt: int  # também identifica o lease: só quem tem a tentativa atual conclui o job
+
+
+class SQLiteJobQueue:
+    def __init__(self, path: str, *, visibility_timeout: float, max_attempts: int, retry_backoff: float) -> None:
+        self.visibility_timeout = visibility_timeout
+        self.max_attempts = max_attempts
+        self.retry_backoff = retry_backoff
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA busy_timeout=5000")
+        self._conn.executescript(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            " id TEXT PRIMARY KEY,"
+            " status TEXT NOT NULL,"
+            " priority INTEGER NOT NULL DEFAULT 0,"
+            " payload TEXT NOT NULL,"
+            " attempts INTEGER NOT NULL DEFAULT 0,"
+            " available_at REAL NOT NULL,"
+            " lease_expires_at REAL,"
+            " result TEXT,"
+            " status_code INTEGER,"
+            " error TEXT,"
+            " created_at REAL NOT NULL,"
+            " updated_at REAL NOT NULL);"
+            "CREATE INDEX IF NOT EXISTS ix_jobs_ready ON jobs (status, priority DESC, created_at);"
+            "CREATE TABLE IF NOT EXISTS dead_letter_jobs ("
+            " id TEXT PRIMARY KEY,"
+            " payload TEXT NOT NULL,"
+            " attempts INTEGER NOT NULL,"
+            " error TEXT,"
+            " failed_at REAL NOT NULL);"
+        )
+
+    def enqueue(self, payload: Dict[str, Any], *, priority: int = 0) -> str:
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO jobs (id, status, priority, payload, available_at, created_at, updated_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (job_id, QUEUED, priority, json.dumps(payload, ensure_ascii=False), now, now, now),
+            )
+        return job_id
+
+    def claim(self) -> Optional[Job]:
+        """Pega o próximo job pronto (ou com lease vencido) e abre um lease novo."""
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._dead_letter_expired(now)
+                row = self._conn.execute(
+                    "SELECT id, payload, attempts FROM jobs"
+                    " WHERE (status = ? AND available_at <= ?) OR (status = ? AND lease_expires_at <= ?)"
+                    " ORDER BY priority DESC, created_at LIMIT 1",
+                    (QUEUED, now, RUNNING, now),
+                ).fetchone()
+                if row is None:
+                    self._conn.execute("COMMIT")
+                    return None
+                attempt = row[2] + 1
+                self._conn.execute(
+                    "UPDATE jobs SET status = ?, attempts = ?, lease_expires_at = ?, updated_at = ? WHERE id = ?",
+                    (RUNNING, attempt, now + self.visibility_timeout, now, row[0]),
+                )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return Job(row[0], json.loads(row[1]), attempt)
+
+    def _dead_letter_expired(self, now: float) -> None:
+        # Leases vencidos que já esgotaram as tentativas não voltam para a fila
+        expired = self._conn.execute(
+            "SELECT id FROM jobs WHERE status = ? AND lease_expires_at <= ? AND attempts >= ?",
+            (RUNNING, now, self.max_attempts),
+        ).fetchall()
+        for (job_id,) in expired:
+            self._bury(job_id, "Visibility timeout: worker não concluiu o job.", None, None, now)
+
+    def _bury(self, job_id: str, error: str, result: Optional[str], status_code: Optional[int], now: float) -> None:
+        self._conn.execute(
+            "UPDATE jobs SET status = ?, error = ?, result = ?, status_code = ?, lease_expires_at = NULL,"
+            " updated_at = ? WHERE id = ?",
+            (FAILED, error, result, status_code, now, job_id),
+        )
+        self._conn.execute(
+            "INSERT OR REPLACE INTO dead_letter_jobs (id, payload, attempts, error, failed_at)"
+            " SELECT id, payload, attempts, error, ? FROM jobs WHERE id = ?",
+            (now, job_id),
+        )
+
+    def heartbeat(self, job: Job) -> bool:
+        """Renova o lease; False se o job já não pertence a esta tentativa."""
+        now = time.time()
+        with self._lock:
+            cur = self._conn.execute(
+                "UPDATE jobs SET lease_expires_at = ?, updated_at = ? WHERE id = ? AND status = ? AND attempts = ?",
+                (now + self.visibility_timeout, now, job.id, RUNNING, job.attempt),
+            )
+        return cur.rowcount == 1
+
+    def complete(self, job: Job, result: Dict[str, Any], status_code: int) -> bool:
+        now = time.time()
+        with self._lock:
+            cur = self._conn.execute(
+                "UPDATE jobs SET status = ?, result = ?, status_code = ?, error = NULL, lease_expires_at = NULL,"
+                " updated_at = ? WHERE id = ? AND status = ? AND attempts = ?",
+                (DONE, json.dumps(result, ensure_ascii=False), status_code, now, job.id, RUNNING, job.attempt),
+            )
+        return cur.rowcount == 1
+
+    def fail(
+        self,
+        job: Job,
+        error: str,
+        *,
+        result: Optional[Dict[str, Any]] = None,
+        status_code: Optional[int] = None,
+    ) -> Optional[str]:
+        """Reagenda com backoff ou manda para o dead letter; devolve o novo status (None se o lease foi perdido)."""
+        now = time.time()
+        encoded = json.dumps(result, ensure_ascii=False) if result is not None else None
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                owned = self._conn.execute(
+                    "SELECT 1 FROM jobs WHERE id = ? AND status = ? AND attempts = ?", (job.id, RUNNING, job.attempt)
+                ).fetchone()
+                if owned is None:
+                    status = None
+                elif job.attempt >= self.max_attempts:
+                    self._bury(job.id, error, encoded, status_code, now)
+                    status = FAILED
+                else:
+                    self._conn.execute(
+                        "UPDATE jobs SET status = ?, error = ?, available_at = ?, lease_expires_at = NULL,"
+                        " updated_at = ? WHERE id = ?",
+                        (QUEUED, error, now + self.retry_backoff * 2 ** (job.attempt - 1), now, job.id),
+                    )
+                    status = QUEUED
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return status
+
+    def release(self, job: Job) -> None:
+        """Devolve o job à fila sem gastar tentativa (desligamento do worker)."""
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, attempts = attempts - 1, available_at = ?, lease_expires_at = NULL,"
+                " updated_at = ? WHERE id = ? AND status = ? AND attempts = ?",
+                (QUEUED, now, now, job.id, RUNNING, job.attempt),
+            )
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT id, status, priority, attempts, result, status_code, error, created_at, updated_at"
+                " FROM jobs WHERE id = ?",
+                (job_id,),
+            ).fetchone()
+        if row is None:
+            return None
+        return {
+            "id": row[0],
+            "status": row[1],
+            "priority": row[2],
+            "attempts": row[3],
+            "result": json.loads(row[4]) if row[4] is not None else None,
+            "status_code": row[5],
+            "error": row[6],
+            "created_at": row[7],
+            "updated_at": row[8],
+        }
+
+    def dead_letters(self, limit: int = 50) -> List[Dict[str, Any]]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, attempts, error, failed_at FROM dead_letter_jobs ORDER BY failed_at DESC LIMIT ?", (limit,)
+            ).fetchall()
+        return [{"id": r[0], "attempts": r[1], "error": r[2], "failed_at": r[3]} for r in rows]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            counts = dict(self._conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall())
+            dead = self._conn.execute("SELECT COUNT(*) FROM dead_letter_jobs").fetchone()[0]
+        return {**{status: counts.get(status, 0) for status in (QUEUED, RUNNING, DONE, FAILED)}, "dead_letter": dead}
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class JobWorkers:
+    """Pool de workers asyncio que consome a fila e roda o pipeline de classificação."""
+
+    def __init__(self, queue: SQLiteJobQueue, *, workers: int, poll_interval: float) -> None:
+        self.queue = queue
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self._wakeup = asyncio.Event()
+        self._stopping = False
+        self._tasks: List[asyncio.Task] = []
+
+    def start(self) -> None:
+        self._stopping = False
+        self._tasks = [asyncio.create_task(self._run(), name=f"job-worker-{i}") for i in range(self.workers)]
+
+    def notify(self) -> None:
+        """Acorda os workers ociosos (job novo neste processo)."""
+        self._wakeup.set()
+
+    async def stop(self) -> None:
+        self._stopping = True
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def _run(self) -> None:
+        while not self._stopping:
+            job = await asyncio.to_thread(self.queue.claim)
+            if job is None:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            await self.process(job)
+
+    async def process(self, job: Job) -> None:
+        heartbeat = asyncio.create_task(self._heartbeat(job))
+        try:
+            outcome = await _classify_payload(job.payload)
+        except asyncio.CancelledError:
+            await asyncio.to_thread(self.queue.release, job)
+            raise
+        except Exception as exc:  # noqa: BLE001
+            status = await asyncio.to_thread(self.queue.fail, job, str(exc))
+            logger.warning("Job %s attempt %d failed (%s): %s", job.id, job.attempt, status, exc)
+        else:
+            if outcome.status_code >= 500:
+                status = await asyncio.to_thread(
+                    self.queue.fail, job, outcome.result.get("reason", ""),
+                    result=outcome.result, status_code=outcome.status_code,
+                )
+            else:
+                status = DONE if await asyncio.to_thread(self.queue.complete, job, outcome.result, outcome.status_code) else None
+        finally:
+            heartbeat.cancel()
+        if status in (DONE, FAILED):
+            _discard_upload(job.payload)
+
+    async def _heartbeat(self, job: Job) -> None:
+        while True:
+            await asyncio.sleep(self.queue.visibility_timeout / 3)
+            if not await asyncio.to_thread(self.queue.heartbeat, job):
+                return
+
+
+async def _classify_payload(payload: Dict[str, Any]):
+    text = payload.get("text")
+    upload = payload.get("file")
+    if upload is not None:
+        text = await read_file_text(filename=upload["filename"], path=upload["path"])
+    return await classify_text(text or "", use_cache=payload.get("use_cache", True))
+
+
+def _discard_upload(payload: Dict[str, Any]) -> None:
+    upload = payload.get("file")
+    if upload is not None:
+        try:
+            os.unlink(upload["path"])
+        except FileNotFoundError:
+            pass
+
+
+def jobs_spool_dir() -> str:
+    settings = get_settings()
+    path = settings.JOBS_SPOOL_DIR or f"{settings.JOBS_DB_PATH}.files"
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+@lru_cache(maxsize=1)
+def get_job_queue() -> SQLiteJobQueue | None:
+    settings = get_settings()
+    if not settings.JOBS_ENABLED:
+        return None
+    return SQLiteJobQueue(
+        settings.JOBS_DB_PATH,
+        visibility_timeout=settings.JOBS_VISIBILITY_TIMEOUT_SECONDS,
+        max_attempts=settings.JOBS_MAX_ATTEMPTS,
+        retry_backoff=settings.JOBS_RETRY_BACKOFF_SECONDS,
+    )
+
+
+@lru_cache(maxsize=1)
+def get_job_workers() -> JobWorkers | None:
+    queue = get_job_queue()
+    if queue is None:
+        return None
+    settings = get_settings()
+    return JobWorkers(queue, workers=settings.JOBS_WORKERS, poll_interval=settings.JOBS_POLL_INTERVAL_SECONDS)
+
+
+def start_job_workers() -> None:
+    workers = get_job_workers()
+    if workers is not None:
+        workers.start()
+
+
+async def close_job_queue() -> None:
+    if get_job_workers.cache_info().currsize:
+        workers = get_job_workers()
+        if workers is not None:
+            await workers.stop()
+        get_job_workers.cache_clear()
+    if get_job_queue.cache_info().currsize:
+        queue = get_job_queue()
+        if queue is not None:
+            queue.close()
+        get_job_queue.cache_clear()
@@ -0,0 +1,168 @@
+"""
+Parser JSON incremental para a resposta do modelo em streaming.
+
+Lê um objeto JSON de primeiro nível aos pedaços e emite, por chunk, os
+trechos decodificados de cada valor string (`delta`) e o valor completo
+quando a string fecha (`complete`). Texto antes do primeiro `{` (prosa,
+cercas de markdown) é ignorado. Custo linear: cada caractere é visto uma vez.
+"""
+from __future__ import annotations
+
+import json
+from typing import Any, Dict, List, Tuple
+
+Event = Tuple[str, str, Any]  # (tipo, chave, valor)
+
+_SEEK_OBJECT, _SEEK_KEY, _IN_KEY, _SEEK_COLON, _SEEK_VALUE, _IN_STRING, _IN_OTHER, _DONE = range(8)
+_ESCAPES = {'"': '"', "\\": "\\", "/": "/", "b": "\b", "f": "\f", "n": "\n", "r": "\r", "t": "\t"}
+
+
+class IncrementalJSONObjectParser:
+    def __init__(self) -> None:
+        self.values: Dict[str, Any] = {}
+        self._state = _SEEK_OBJECT
+        self._key: List[str] = []
+        self._current_key = ""
+        self._value: List[str] = []
+        self._escape: str | None = None  # escape pendente entre chunks ("\\" ou "\\uXX...")
+        self._surrogate: int | None = None  # \uD800-\uDBFF à espera da segunda metade do par
+        self._other: List[str] = []
+        self._depth = 0
+        self._other_in_string = False
+        self._other_escape = False
+
+    @property
+    def done(self) -> bool:
+        return self._state == _DONE
+
+    def feed(self, chunk: str) -> List[Event]:
+        events: List[Event] = []
+        delta: List[str] = []
+        for ch in chunk:
+            state = self._state
+            if state == _IN_STRING:
+                if self._escape is not None:
+                    self._escape += ch
+                    decoded = self._decode_escape()
+                    if decoded:
+                        self._value.append(decoded)
+                        delta.append(decoded)
+                elif ch == "\\":
+                    self._escape = "\\"
+                elif ch == '"':
+                    if self._surrogate is not None:
+                        lone = self._flush_surrogate()
+                        self._value.append(lone)
+                        delta.append(lone)
+                    if delta:
+                        events.append(("delta", self._current_key, "".join(delta)))
+                        delta = []
+                    value = "".join(self._value)
+                    self.values[self._current_key] = value
+                    events.append(("complete", self._current_key, value))
+                    self._state = _SEEK_KEY
+                else:
+                    if self._surrogate is not None:
+                        ch = self._flush_surrogate() + ch
+                    self._value.append(ch)
+                    delta.append(ch)
+            elif state == _IN_KEY:
+                if self._escape is not None:
+                    self._escape += ch
+                    decoded = self._decode_escape()
+                    if decoded:
+                        self._key.append(decoded)
+                elif ch == "\\":
+                    self._escape = "\\"
+                elif ch == '"':
+                    self._key.append(self._flush_surrogate())
+                    self._current_key = "".join(self._key)
+                    self._state = _SEEK_COLON
+                else:
+                    self._key.append(self._flush_surrogate() + ch)
+            elif state == _SEEK_OBJECT:
+                if ch == "{":
+                    self._state = _SEEK_KEY
+            elif state == _SEEK_KEY:
+                if ch == '"':
+                    self._key = []
+                    self._state = _IN_KEY
+                elif ch == "}":
+                    self._state = _DONE
+            elif state == _SEEK_COLON:
+                if ch == ":":
+                    self._state = _SEEK_VALUE
+            elif state == _SEEK_VALUE:
+                if ch == '"':
+                    self._value = []
+                    self._state = _IN_STRING
+                elif not ch.isspace():
+                    self._other = [ch]
+                    self._depth = 1 if ch in "{[" else 0
+                    self._other_in_string = False
+                    self._state = _IN_OTHER
+            elif state == _IN_OTHER:
+                if self._consume_other(ch, events):
+                    if ch == "}":
+                        self._state = _DONE
+        if delta:
+            events.append(("delta", self._current_key, "".join(delta)))
+        return events
+
+    def _decode_escape(self) -> str | None:
+        esc = self._escape
+        if len(esc) == 2 and esc[1] != "u":
+            self._escape = None
+            return self._flush_surrogate() + _ESCAPES.get(esc[1], esc[1])
+        if len(esc) < 6:
+            return None
+        self._escape = None
+        code = int(esc[2:6], 16)
+        # Fora do BMP (ex.: emoji) o caractere chega como par \uD83D\uDE00: junta as duas metades
+        if 0xD800 <= code <= 0xDBFF:
+            pending = self._flush_surrogate()
+            self._surrogate = code
+            return pending
+        if 0xDC00 <= code <= 0xDFFF:
+            high, self._surrogate = self._surrogate, None
+            if high is None:
+                return "\ufffd"
+            return chr(0x10000 + ((high - 0xD800) << 10) + (code - 0xDC00))
+        return self._flush_surrogate() + chr(code)
+
+    def _flush_surrogate(self) -> str:
+        """U+FFFD no lugar de uma metade alta sem par (ou "" se não há nenhuma pendente)."""
+        if self._surrogate is None:
+            return ""
+        self._surrogate = None
+        return "\ufffd"
+
+    def _consume_other(self, ch: str, events: List[Event]) -> bool:
+        """Valores não-string (números, bool, null, aninhados). True quando o valor terminou."""
+        if self._other_in_string:
+            self._other.append(ch)
+            if self._other_escape:
+                self._other_escape = False
+            elif ch == "\\":
+                self._other_escape = True
+            elif ch == '"':
+                self._other_in_string = False
+            return False
+        if self._depth == 0 and ch in ",}":
+            raw = "".join(self._other).strip()
+            try:
+                value = json.loads(raw)
+            except json.JSONDecodeError:
+                value = raw
+            self.values[self._current_key] = value
+            events.append(("complete", self._current_key, value))
+            self._state = _SEEK_KEY
+            return True
+        self._other.append(ch)
+        if ch == '"':
+            self._other_in_string = True
+        elif ch in "{[":
+            self._depth += 1
+        elif ch in "}]":
+            self._depth -= 1
+        return False
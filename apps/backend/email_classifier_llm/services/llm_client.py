@@ -1,236 +1,602 @@
 from __future__ import annotations
 
 import json
+import logging
 from abc import ABC, abstractmethod
-from typing import Any, Dict
+from functools import lru_cache
+from typing import Any, AsyncIterator, Callable, Dict, List, NamedTuple, Sequence, Tuple
 import asyncio
-from tenacity import retry, stop_after_attempt, wait_exponential
+from functools import partial
+import httpx
+import orjson
 from core.path import PROMPTS_DIR
 from core.config import get_settings
+from .micro_batcher import MicroBatcher
+from .hedging import get_hedger
+from .prompt_cache import PromptCache
+from .rate_limiter import get_rate_limiter, status_of
+from .telemetry import PARSE_FAILURES, log_sampled, record_tokens, span
 
 from google import genai
+from google.genai import types
+
+logger = logging.getLogger(__name__)
+
+
+@lru_cache(maxsize=None)
+def load_prompt(version: str) -> str:
+    """Read a prompt template once per process."""
+    path = PROMPTS_DIR / f"prompt_{version}.txt"
+    if not path.exists():
+        raise RuntimeError(f"Prompt não encontrado: {path}")
+    return path.read_text(encoding="utf-8")
+
+
+@lru_cache(maxsize=None)
+def load_system_prompt(version: str) -> str:
+    """Static instructions of a split prompt version (`prompt_<version>_system.txt`); "" when there is none."""
+    path = PROMPTS_DIR / f"prompt_{version}_system.txt"
+    return path.read_text(encoding="utf-8").strip() if path.exists() else ""
+
+
+class SplitPrompt(str):
+    """Full prompt text that also keeps the static instructions (`system`) and the per-email part (`user`)
+    apart, so providers can send the instructions as a system prompt or reference a cached prefix"""
+
+    system: str
+    user: str
+
+    def __new__(cls, system: str, user: str) -> "SplitPrompt":
+        prompt = super().__new__(cls, f"{system}\n\n{user}" if system else user)
+        prompt.system = system
+        prompt.user = user
+        return prompt
+
+
+def split_prompt(prompt: str) -> Tuple[str, str]:
+    """(system, user) of a prompt; plain strings (e.g. v1 prompts) have no system part"""
+    return getattr(prompt, "system", ""), getattr(prompt, "user", prompt)
+
+
+def build_http_client() -> httpx.AsyncClient:
+    """Keep-alive connection pool shared by all calls of a provider client."""
+    settings = get_settings()
+    return httpx.AsyncClient(
+        limits=httpx.Limits(
+            max_connections=settings.LLM_HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.LLM_HTTP_MAX_KEEPALIVE,
+            keepalive_expiry=settings.LLM_HTTP_KEEPALIVE_EXPIRY,
+        ),
+        timeout=settings.LLM_HTTP_TIMEOUT,
+    )
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate (~4 chars per token) used for packing budgets."""
+    return len(text) // 4 + 1
+
+
+# Tokens de "id"/"email"/aspas por item empacotado
+PACK_ITEM_OVERHEAD_TOKENS = 12
+
+# Resposta padrão quando o retorno do modelo não pode ser interpretado
+PARSE_FALLBACK: Dict[str, str] = {
+    "category": "Improdutivo",
+    "reason": "Falha ao interpretar resposta da IA",
+    "suggested_reply": "Desculpe, não foi possível processar sua mensagem."
+}
+
+
+CATEGORIES = ("Produtivo", "Improdutivo")
+
+# JSON schema sent with JSON mode; property order is kept by the model, so the stream starts with category/reason
+CLASSIFICATION_SCHEMA: Dict[str, Any] = {
+    "type": "object",
+    "properties": {
+        "category": {"type": "string", "enum": list(CATEGORIES)},
+        "reason": {"type": "string"},
+        "suggested_reply": {"type": "string"},
+    },
+    "required": ["category", "reason", "suggested_reply"],
+    "additionalProperties": False,
+}
+
+PACKED_SCHEMA: Dict[str, Any] = {
+    "type": "array",
+    "items": {
+        **CLASSIFICATION_SCHEMA,
+        "properties": {"id": {"type": "string"}, **CLASSIFICATION_SCHEMA["properties"]},
+        "required": ["id", *CLASSIFICATION_SCHEMA["required"]],
+    },
+}
+
+
+class Classification(NamedTuple):
+    category: str
+    reason: str
+    suggested_reply: str
+
+
+def parse_classification(content: str | bytes) -> Classification:
+    """Strict parse of a JSON-mode reply: one object with the schema fields. Raises ValueError otherwise"""
+    return classification_from_dict(orjson.loads(content))
+
+
+def classification_from_dict(data: Any) -> Classification:
+    """Same check for an already decoded object (packed item, streamed reply). Raises ValueError"""
+    if not isinstance(data, dict):
+        raise ValueError("Classification is not a JSON object")
+    try:
+        result = Classification(data["category"], data["reason"], data["suggested_reply"])
+    except KeyError as exc:
+        raise ValueError(f"Missing field {exc}") from None
+    if result.category not in CATEGORIES or not all(isinstance(value, str) for value in result):
+        raise ValueError("Classification does not match the schema")
+    return result
+
+
+def _total_tokens(response: Any) -> int | None:
+    usage = getattr(response, "usage_metadata", None)
+    return getattr(usage, "total_token_count", None)
+
+
+def _usage_total(*fields: str) -> Callable[[Dict[str, Any]], int | None]:
+    """Total tokens reported in the `usage` object (or at the top level) of a JSON reply"""
+    def total(data: Dict[str, Any]) -> int | None:
+        usage = data.get("usage", data) or {}
+        counts = [usage.get(field) for field in fields]
+        return sum(counts) if all(isinstance(count, int) for count in counts) else None
+
+    return total
+
+
+def _record_gemini_usage(usage: Any) -> None:
+    if usage is not None:
+        record_tokens("google", usage.prompt_token_count, usage.candidates_token_count,
+                      usage.cached_content_token_count)
+
+
+# Status with which Gemini rejects a cachedContent reference that expired or was deleted
+CACHE_REJECTED_STATUS = frozenset({403, 404})
+
 
 # Prompt centralizado para classificação de emails
 class LLMClient(ABC):
     """Base class for LLM clients"""    
+    model: str = ""
+    prompt_version: str = ""
+    provider: str = ""  # label das métricas
+
     @abstractmethod
     async def classify(self, text: str) -> Dict[str, Any]:
         """Classify text and return standardized result"""
         pass
 
-class GoogleClient(LLMClient):
-    """Google Gemini API client"""
-    
-    def __init__(self) -> None:        
-        settings = get_settings()
-        if not settings.GEMINI_API_KEY:
-            raise ValueError("GEMINI_API_KEY not found in environment")
-        
-        self.client = genai.Client(api_key=settings.GEMINI_API_KEY).aio
-        self.prompt_template = self._load_prompt()
+    async def classify_many(self, texts: Sequence[str]) -> List[Dict[str, Any] | BaseException]:
+        """Classify several texts, in order. Failed items are returned as exceptions"""
+        return list(await asyncio.gather(*(self.classify(text) for text in texts), return_exceptions=True))
+
+    async def classify_stream(self, text: str) -> AsyncIterator[str]:
+        """Raw model output in chunks. Default: the whole result as a single JSON chunk"""
+        yield json.dumps(await self.classify(text), ensure_ascii=False)
+
+    @property
+    def batcher(self) -> MicroBatcher:
+        """Micro-batcher that groups concurrent single requests into classify_many"""
+        batcher = getattr(self, "_batcher", None)
+        if batcher is None:
+            settings = get_settings()
+            batcher = self._batcher = MicroBatcher(
+                self.classify_many,
+                window_ms=settings.LLM_PACK_WINDOW_MS,
+                max_items=settings.LLM_PACK_MAX_ITEMS,
+            )
+        return batcher
+
+    async def aclose(self) -> None:
+        """Release network resources held by the client"""
+        pass
+
+class PromptClient(LLMClient):
+    """Base for clients that send the prompt template as text and parse the JSON reply"""
 
-    def _load_prompt(self) -> str:
-        path = PROMPTS_DIR / "prompt_v1.txt"
-        if not path.exists():
-            raise RuntimeError(f"Prompt não encontrado: {path}")
-        return path.read_text(encoding="utf-8")
+    def __init__(self, http_client: httpx.AsyncClient | None = None) -> None:
+        self.prompt_version = get_settings().PROMPT_VERSION
+        self.prompt_template = load_prompt(self.prompt_version)
+        self.system_prompt = load_system_prompt(self.prompt_version)
+        self._owns_http = http_client is None
+        self._http = http_client or build_http_client()
+
+    async def aclose(self) -> None:
+        if self._owns_http:
+            await self._http.aclose()
 
     async def classify(self, text: str) -> Dict[str, Any]:
-        prompt = self._build_prompt(text)
-        content = await self._call_model(prompt)
-        print('content', content)
-        return self._parse_response(content)
+        content = await self._call_model(self._build_prompt(text))
+        with span("parse", provider=self.provider):
+            return self._parse_response(content)
 
-    def _build_prompt(self, text: str) -> str:
-        return self.prompt_template.format(text=text)
+    async def _call_model(self, prompt: str, schema: Dict[str, Any] | None = CLASSIFICATION_SCHEMA) -> str:
+        with span("llm_call", provider=self.provider):
+            content = await self._generate(prompt, schema if get_settings().LLM_JSON_MODE else None)
+        log_sampled(logger, "llm_response", provider=self.provider, model=self.model, content=content[:500])
+        return content
+
+    @abstractmethod
+    async def _generate(self, prompt: str, schema: Dict[str, Any] | None) -> str:
+        """Send the prompt (in JSON mode constrained to `schema`, when given and supported),
+        record token usage and return the raw text of the reply"""
+
+    async def _limited(self, func, prompt: str, usage=None):
+        """Run a model call under this provider's RPM/TPM/concurrency limiter, with retries"""
+        limiter = get_rate_limiter(self.provider)
+        if limiter is None:
+            return await func()
+        tokens = estimate_tokens(prompt) + get_settings().LLM_OUTPUT_TOKENS_ESTIMATE
+        return await limiter.call(func, tokens=tokens, usage=usage)
 
+    async def _post(self, prompt: str, body: Dict[str, Any], usage=None, headers: Dict[str, str] | None = None):
+        """POST `body` to the provider endpoint under the limiter and return the decoded JSON reply"""
+        async def post():
+            response = await self._http.post(self._url, headers=headers, json=body)
+            response.raise_for_status()
+            return response.json()
 
-    #@retry(wait=wait_exponential(multiplier=1, min=1, max=10), stop=stop_after_attempt(3))
-    async def _call_model(self, prompt: str) -> str:
-        response = await self.client.models.generate_content(
-            model="gemini-2.5-flash",
-            contents=prompt)
-        return response.text
+        return await self._limited(post, prompt, usage=usage)
+
+    def _build_prompt(self, text: str) -> str:
+        return SplitPrompt(self.system_prompt, self.prompt_template.format(text=text))
 
     def _parse_response(self, content: str) -> Dict[str, Any]:
+        try:
+            return parse_classification(content)._asdict()
+        except ValueError:
+            pass
+        # Replies outside JSON mode may wrap the object in prose or markdown
         try:
             # Extract JSON from response
             start = content.find('{')
             end = content.rfind('}') + 1
             if start != -1 and end != 0:
                 json_str = content[start:end]
-                data = json.loads(json_str)
-                return {
-                    "category": data.get("category", "Improdutivo"),
-                    "reason": data.get("reason", "Não foi possível analisar o conteúdo"),
-                    "suggested_reply": data.get("suggested_reply", "Obrigado pelo contato!")
-                }
+                return classification_from_dict(json.loads(json_str))._asdict()
         except (json.JSONDecodeError, ValueError):
             pass
-        
-        return {
-            "category": "Improdutivo",
-            "reason": "Falha ao interpretar resposta da IA",
-            "suggested_reply": "Desculpe, não foi possível processar sua mensagem."
+
+        PARSE_FAILURES.inc(provider=self.provider)
+        return dict(PARSE_FALLBACK)
+
+
+class GoogleClient(PromptClient):
+    """Google Gemini API client"""
+
+    provider = "google"
+
+    def __init__(self, http_client: httpx.AsyncClient | None = None) -> None:
+        settings = get_settings()
+        if not settings.GEMINI_API_KEY:
+            raise ValueError("GEMINI_API_KEY not found in environment")
+
+        super().__init__(http_client)
+        self.model = settings.GEMINI_MODEL
+        self.client = genai.Client(
+            api_key=settings.GEMINI_API_KEY,
+            http_options=types.HttpOptions(
+                base_url=settings.GEMINI_BASE_URL,
+                httpx_async_client=self._http,
+            ),
+        ).aio
+        # Only prefixes the API accepts (minimum token count) are registered; shorter ones go inline
+        self.prompt_cache: PromptCache | None = None
+        if (settings.PROMPT_CACHE_ENABLED and self.system_prompt
+                and estimate_tokens(self.system_prompt) >= settings.PROMPT_CACHE_MIN_TOKENS):
+            self.prompt_cache = PromptCache(
+                self.client,
+                model=self.model,
+                system=self.system_prompt,
+                version=self.prompt_version,
+                ttl_seconds=settings.PROMPT_CACHE_TTL_SECONDS,
+                refresh_margin=settings.PROMPT_CACHE_REFRESH_MARGIN_SECONDS,
+                retry_seconds=settings.PROMPT_CACHE_RETRY_SECONDS,
+            )
+
+    async def aclose(self) -> None:
+        if self.prompt_cache is not None:
+            await self.prompt_cache.aclose()
+        await self.client.aclose()
+        await super().aclose()
+
+    async def classify(self, text: str) -> Dict[str, Any]:
+        prompt = self._build_prompt(text)
+        hedger = get_hedger()
+        if hedger is not None:
+            # Only single-email calls are hedged: packed prompts have a different latency profile
+            content = await hedger.run(partial(self._call_model, prompt))
+        else:
+            content = await self._call_model(prompt)
+        with span("parse", provider=self.provider):
+            return self._parse_response(content)
+
+    async def classify_stream(self, text: str) -> AsyncIterator[str]:
+        prompt = self._build_prompt(text)
+
+        async def open_stream(contents, config):
+            stream = await self.client.models.generate_content_stream(model=self.model, contents=contents, config=config)
+            # The request is only sent on the first chunk; retries stop once output starts
+            return await anext(stream, None), stream
+
+        schema = CLASSIFICATION_SCHEMA if get_settings().LLM_JSON_MODE else None
+        first, stream = await self._request(open_stream, prompt, schema)
+        usage = getattr(first, "usage_metadata", None)
+        if first is not None and first.text:
+            yield first.text
+        async for chunk in stream:
+            usage = chunk.usage_metadata or usage  # o uso total vem no último trecho
+            if chunk.text:
+                yield chunk.text
+        _record_gemini_usage(usage)
+
+    async def classify_many(self, texts: Sequence[str]) -> List[Dict[str, Any] | BaseException]:
+        """Pack several emails per call under the token budget"""
+        try:
+            load_prompt(f"{self.prompt_version}_batch")
+        except RuntimeError:
+            return await super().classify_many(texts)
+
+        results: List[Dict[str, Any] | BaseException | None] = [None] * len(texts)
+        await asyncio.gather(*(
+            self._classify_group(group, texts, results) for group in self._pack(texts)
+        ))
+        return results
+
+    def _pack(self, texts: Sequence[str]) -> List[List[int]]:
+        settings = get_settings()
+        template = load_prompt(f"{self.prompt_version}_batch")
+        budget = settings.LLM_PACK_TOKEN_BUDGET - estimate_tokens(self.system_prompt) - estimate_tokens(template)
+        groups: List[List[int]] = []
+        current: List[int] = []
+        used = 0
+        for index, text in enumerate(texts):
+            cost = estimate_tokens(text) + PACK_ITEM_OVERHEAD_TOKENS
+            if current and (used + cost > budget or len(current) >= settings.LLM_PACK_MAX_ITEMS):
+                groups.append(current)
+                current, used = [], 0
+            current.append(index)
+            used += cost
+        if current:
+            groups.append(current)
+        return groups
+
+    async def _classify_group(self, indexes: List[int], texts: Sequence[str], results: list) -> None:
+        pending = list(indexes)
+        for _ in range(1 + get_settings().LLM_PACK_MAX_RETRIES):
+            if len(pending) < 2:
+                break
+            items = {str(index): texts[index] for index in pending}
+            try:
+                content = await self._call_model(self._build_packed_prompt(items), PACKED_SCHEMA)
+                parsed = self._parse_packed_response(content, items.keys())
+            except Exception as exc:  # noqa: BLE001
+                logger.warning("Packed classification failed for %d items: %s", len(items), exc)
+                parsed = {}
+            for key, result in parsed.items():
+                results[int(key)] = result
+            # Só os itens ausentes ou inválidos seguem para nova tentativa
+            pending = [index for index in pending if results[index] is None]
+
+        singles = await asyncio.gather(*(self.classify(texts[index]) for index in pending), return_exceptions=True)
+        for index, result in zip(pending, singles):
+            results[index] = result
+
+    def _build_packed_prompt(self, items: Dict[str, str]) -> SplitPrompt:
+        payload = json.dumps([{"id": key, "email": text} for key, text in items.items()], ensure_ascii=False)
+        # Same static instructions as single calls, so packed calls also reference the cached prefix
+        return SplitPrompt(self.system_prompt, load_prompt(f"{self.prompt_version}_batch").format(items=payload))
+
+    def _parse_packed_response(self, content: str, ids) -> Dict[str, Dict[str, Any]]:
+        """Items that pass the typed check, by id. A reply missing or mangling any item counts as one parse failure"""
+        expected = set(ids)
+        parsed: Dict[str, Dict[str, Any]] = {}
+        start = content.find('[')
+        end = content.rfind(']') + 1
+        try:
+            data = json.loads(content[start:end]) if start != -1 and end != 0 else None
+        except (json.JSONDecodeError, ValueError):
+            data = None
+        for entry in data if isinstance(data, list) else ():
+            key = str(entry.get("id")) if isinstance(entry, dict) else None
+            if key not in expected:
+                continue
+            try:
+                parsed[key] = classification_from_dict(entry)._asdict()
+            except ValueError:
+                continue
+        if len(parsed) < len(expected):
+            PARSE_FAILURES.inc(provider=self.provider)
+        return parsed
+
+    async def _generate(self, prompt: str, schema: Dict[str, Any] | None) -> str:
+        def generate(contents, config):
+            return self.client.models.generate_content(model=self.model, contents=contents, config=config)
+
+        response = await self._request(generate, prompt, schema, usage=_total_tokens)
+        _record_gemini_usage(response.usage_metadata)
+        return response.text or ""
+
+    async def _request(self, call, prompt: str, schema: Dict[str, Any] | None, usage=None):
+        """Run `call(contents, config)` under the limiter, sending only the email when the static
+        instructions are cached. A rejected cache handle is dropped and the call repeated with the full prompt"""
+        system, user = split_prompt(prompt)
+        cached = await self.prompt_cache.handle() if self.prompt_cache is not None and system else None
+        if cached is not None:
+            try:
+                return await self._limited(partial(call, user, self._config(schema, cached_content=cached)),
+                                           prompt, usage=usage)
+            except Exception as exc:  # noqa: BLE001
+                if status_of(exc) not in CACHE_REJECTED_STATUS:
+                    raise
+                logger.warning("Cached prompt prefix %s rejected, sending the full prompt: %r", cached, exc)
+                self.prompt_cache.invalidate()
+        return await self._limited(partial(call, user, self._config(schema, system_instruction=system)),
+                                   prompt, usage=usage)
+
+    @staticmethod
+    def _config(
+        schema: Dict[str, Any] | None,
+        *,
+        system_instruction: str = "",
+        cached_content: str | None = None,
+    ) -> types.GenerateContentConfig | None:
+        options: Dict[str, Any] = {}
+        if schema is not None:
+            options.update(response_mime_type="application/json", response_json_schema=schema)
+        if system_instruction:
+            options["system_instruction"] = system_instruction
+        if cached_content:
+            options["cached_content"] = cached_content
+        return types.GenerateContentConfig(**options) if options else None
+
+
+class OpenAIClient(PromptClient):
+    """OpenAI chat completions API (or any compatible endpoint via OPENAI_BASE_URL)"""
+
+    provider = "openai"
+
+    def __init__(self, http_client: httpx.AsyncClient | None = None) -> None:
+        settings = get_settings()
+        if not settings.OPENAI_API_KEY:
+            raise ValueError("OPENAI_API_KEY not found in environment")
+
+        super().__init__(http_client)
+        self.model = settings.OPENAI_MODEL
+        self._url = f"{settings.OPENAI_BASE_URL.rstrip('/')}/chat/completions"
+        self._headers = {"Authorization": f"Bearer {settings.OPENAI_API_KEY}"}
+
+    async def _generate(self, prompt: str, schema: Dict[str, Any] | None) -> str:
+        response_format = (
+            {"type": "json_schema", "json_schema": {"name": "classification", "strict": True, "schema": schema}}
+            if schema is not None else {"type": "json_object"}
+        )
+        system, user = split_prompt(prompt)
+        # Instructions first, email last: the API caches identical prompt prefixes automatically
+        messages = [{"role": "system", "content": system}] if system else []
+        messages.append({"role": "user", "content": user})
+        data = await self._post(prompt, {
+            "model": self.model,
+            "messages": messages,
+            "temperature": 0.2,
+            "response_format": response_format,
+        }, usage=_usage_total("prompt_tokens", "completion_tokens"), headers=self._headers)
+        usage = data.get("usage") or {}
+        cached = (usage.get("prompt_tokens_details") or {}).get("cached_tokens")
+        record_tokens(self.provider, usage.get("prompt_tokens"), usage.get("completion_tokens"), cached)
+        return data["choices"][0]["message"]["content"] or ""
+
+
+class AnthropicClient(PromptClient):
+    """Anthropic Messages API client"""
+
+    provider = "anthropic"
+
+    def __init__(self, http_client: httpx.AsyncClient | None = None) -> None:
+        settings = get_settings()
+        if not settings.ANTHROPIC_API_KEY:
+            raise ValueError("ANTHROPIC_API_KEY not found in environment")
+
+        super().__init__(http_client)
+        self.model = settings.ANTHROPIC_MODEL
+        self._url = f"{settings.ANTHROPIC_BASE_URL.rstrip('/')}/v1/messages"
+        self._headers = {"x-api-key": settings.ANTHROPIC_API_KEY, "anthropic-version": "2023-06-01"}
+
+    async def _generate(self, prompt: str, schema: Dict[str, Any] | None) -> str:
+        # The Messages API has no JSON mode: the prompt asks for JSON and parsing falls back to the tolerant path
+        system, user = split_prompt(prompt)
+        body: Dict[str, Any] = {
+            "model": self.model,
+            "max_tokens": 1000,
+            "temperature": 0.2,
+            "messages": [{"role": "user", "content": user}],
+        }
+        if system:
+            # Cache breakpoint after the static instructions (ignored below the model's minimum prefix size)
+            body["system"] = [{"type": "text", "text": system, "cache_control": {"type": "ephemeral"}}]
+        data = await self._post(prompt, body, usage=_usage_total("input_tokens", "output_tokens"),
+                                headers=self._headers)
+        usage = data.get("usage") or {}
+        record_tokens(self.provider, usage.get("input_tokens"), usage.get("output_tokens"),
+                      usage.get("cache_read_input_tokens"))
+        return "".join(block.get("text", "") for block in data["content"])
+
+
+class OllamaClient(PromptClient):
+    """Ollama local API client"""
+
+    provider = "ollama"
+
+    def __init__(self, http_client: httpx.AsyncClient | None = None) -> None:
+        settings = get_settings()
+        super().__init__(http_client)
+        self.model = settings.OLLAMA_MODEL
+        self._url = f"{settings.OLLAMA_BASE_URL.rstrip('/')}/api/generate"
+
+    async def _generate(self, prompt: str, schema: Dict[str, Any] | None) -> str:
+        system, user = split_prompt(prompt)
+        body: Dict[str, Any] = {
+            "model": self.model,
+            "prompt": user,
+            "stream": False,
+            "format": schema if schema is not None else "json",
+            "options": {"temperature": 0.2},
         }
+        if system:
+            body["system"] = system
+        data = await self._post(prompt, body, usage=_usage_total("prompt_eval_count", "eval_count"))
+        record_tokens(self.provider, data.get("prompt_eval_count"), data.get("eval_count"))
+        return data.get("response", "")
+
+
+def _router() -> LLMClient:
+    from .llm_router import build_router
+
+    return build_router()
+
+
+# Nome do provider -> fábrica do cliente; "router" distribui entre os de LLM_ROUTER_PROVIDERS
+PROVIDERS: Dict[str, Callable[[], LLMClient]] = {
+    "google": GoogleClient,
+    "openai": OpenAIClient,
+    "anthropic": AnthropicClient,
+    "ollama": OllamaClient,
+    "router": _router,
+}
+
+# Um cliente compartilhado por provider, criado no lifespan da aplicação
+_clients: Dict[str, LLMClient] = {}
+
+
+async def init_llm_clients() -> None:
+    """Create the shared client of the configured provider (app startup)."""
+    provider = get_settings().LLM_PROVIDER
+    try:
+        get_llm_client(provider)
+    except ValueError as exc:
+        # Sem credenciais a app sobe mesmo assim; /api/classify responde com fallback
+        logger.warning("LLM client '%s' not initialised: %s", provider, exc)
+
 
+async def close_llm_clients() -> None:
+    """Close every shared client (app shutdown)."""
+    clients = list(_clients.values())
+    _clients.clear()
+    for client in clients:
+        await client.aclose()
 
 
-# class OpenAIClient(LLMClient):
-#     """OpenAI API client"""
-    
-#     def __init__(self) -> None:
-#         from openai import AsyncOpenAI
-        
-#         settings = get_settings()
-#         if not settings.openai_api_key:
-#             raise ValueError("OPENAI_API_KEY not found in environment")
-        
-#         self._client = AsyncOpenAI(api_key=settings.openai_api_key)
-#         self._model = settings.openai_model
-
-#     @retry(wait=wait_exponential(multiplier=1, min=1, max=10), stop=stop_after_attempt(3))
-#     async def classify(self, text: str) -> Dict[str, Any]:
-#         prompt = self._build_prompt(text)
-        
-#         response = await self._client.chat.completions.create(
-#             model=self._model,
-#             messages=[{"role": "user", "content": prompt}],
-#             temperature=0.2,
-#             response_format={"type": "json_object"},
-#         )
-        
-#         content = response.choices[0].message.content or "{}"
-#         return self._parse_response(content)
-
-#     def _build_prompt(self, text: str) -> str:
-#         return EMAIL_CLASSIFICATION_PROMPT.format(text=text)
-
-#     def _parse_response(self, content: str) -> Dict[str, Any]:
-#         try:
-#             data = json.loads(content)
-#             return {
-#                 "category": data.get("category", "Improdutivo"),
-#                 "reason": data.get("reason", "Não foi possível analisar o conteúdo"),
-#                 "suggested_reply": data.get("suggested_reply", "Obrigado pelo contato!")
-#             }
-#         except json.JSONDecodeError:
-#             return {
-#                 "category": "Improdutivo",
-#                 "reason": "Falha ao interpretar resposta da IA",
-#                 "suggested_reply": "Desculpe, não foi possível processar sua mensagem."
-#             }
-
-
-# class AnthropicClient(LLMClient):
-#     """Anthropic Claude API client"""
-    
-#     def __init__(self) -> None:
-#         import anthropic
-        
-#         settings = get_settings()
-#         if not settings.anthropic_api_key:
-#             raise ValueError("ANTHROPIC_API_KEY not found in environment")
-        
-#         self._client = anthropic.AsyncAnthropic(api_key=settings.anthropic_api_key)
-#         self._model = settings.anthropic_model
-
-#     @retry(wait=wait_exponential(multiplier=1, min=1, max=10), stop=stop_after_attempt(3))
-#     async def classify(self, text: str) -> Dict[str, Any]:
-#         prompt = self._build_prompt(text)
-        
-#         response = await self._client.messages.create(
-#             model=self._model,
-#             max_tokens=1000,
-#             temperature=0.2,
-#             messages=[{"role": "user", "content": prompt}]
-#         )
-        
-#         content = response.content[0].text
-#         return self._parse_response(content)
-
-#     def _build_prompt(self, text: str) -> str:
-#         return EMAIL_CLASSIFICATION_PROMPT.format(text=text)
-
-#     def _parse_response(self, content: str) -> Dict[str, Any]:
-#         try:
-#             # Extract JSON from response
-#             start = content.find('{')
-#             end = content.rfind('}') + 1
-#             if start != -1 and end != 0:
-#                 json_str = content[start:end]
-#                 data = json.loads(json_str)
-#                 return {
-#                     "category": data.get("category", "Improdutivo"),
-#                     "reason": data.get("reason", "Não foi possível analisar o conteúdo"),
-#                     "suggested_reply": data.get("suggested_reply", "Obrigado pelo contato!")
-#                 }
-#         except (json.JSONDecodeError, ValueError):
-#             pass
-        
-#         return {
-#             "category": "Improdutivo",
-#             "reason": "Falha ao interpretar resposta da IA",
-#             "suggested_reply": "Desculpe, não foi possível processar sua mensagem."
-#         }
-
-
-
-# class OllamaClient(LLMClient):
-#     """Ollama local API client"""
-    
-#     def __init__(self) -> None:
-#         import httpx
-        
-#         settings = get_settings()
-#         self._base_url = settings.ollama_base_url
-#         self._model = settings.ollama_model
-#         self._client = httpx.AsyncClient(timeout=60.0)
-
-#     @retry(wait=wait_exponential(multiplier=1, min=1, max=10), stop=stop_after_attempt(3))
-#     async def classify(self, text: str) -> Dict[str, Any]:
-#         prompt = self._build_prompt(text)
-        
-#         response = await self._client.post(
-#             f"{self._base_url}/api/generate",
-#             json={
-#                 "model": self._model,
-#                 "prompt": prompt,
-#                 "stream": False,
-#                 "options": {"temperature": 0.2}
-#             }
-#         )
-#         response.raise_for_status()
-        
-#         data = response.json()
-#         content = data.get("response", "")
-#         return self._parse_response(content)
-
-#     def _build_prompt(self, text: str) -> str:
-#         return EMAIL_CLASSIFICATION_PROMPT.format(text=text)
-
-#     def _parse_response(self, content: str) -> Dict[str, Any]:
-#         try:
-#             # Extract JSON from response
-#             start = content.find('{')
-#             end = content.rfind('}') + 1
-#             if start != -1 and end != 0:
-#                 json_str = content[start:end]
-#                 data = json.loads(json_str)
-#                 return {
-#                     "category": data.get("category", "Improdutivo"),
-#                     "reason": data.get("reason", "Não foi possível analisar o conteúdo"),
-#                     "suggested_reply": data.get("suggested_reply", "Obrigado pelo contato!")
-#                 }
-#         except (json.JSONDecodeError, ValueError):
-#             pass
-        
-#         return {
-#             "category": "Improdutivo",
-#             "reason": "Falha ao interpretar resposta da IA",
-#             "suggested_reply": "Desculpe, não foi possível processar sua mensagem."
-#         }
-
-
-def get_llm_client() -> LLMClient:
-    return GoogleClient()
+def get_llm_client(provider: str | None = None) -> LLMClient:
+    provider = provider or get_settings().LLM_PROVIDER
+    client = _clients.get(provider)
+    if client is None:
+        if provider not in PROVIDERS:
+            raise ValueError(f"Unknown LLM provider: {provider}")
+        client = _clients[provider] = PROVIDERS[provider]()
+    return client
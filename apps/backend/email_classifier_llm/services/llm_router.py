@@ -0,0 +1,216 @@
+"""
+Roteador entre providers de LLM (`LLM_PROVIDER=router`).
+
+Cada provider tem uma EWMA de latência (só chamadas bem-sucedidas) e de
+taxa de erro. Sem pesos configurados, a requisição vai para o provider de
+menor latência esperada (`latência / (1 - taxa de erro)`); com
+`LLM_ROUTER_WEIGHTS`, o primeiro provider é sorteado pelos pesos (divisão de
+tráfego por custo). Em erro ou timeout, a mesma requisição segue para o
+próximo provider, dentro de um prazo único (`LLM_DEADLINE_SECONDS`).
+Providers com taxa de erro acima do limite saem da rotação por um tempo e
+só são tentados quando nenhum outro está disponível.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import random
+import time
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, TypeVar
+
+from core.config import get_settings
+from .llm_client import LLMClient, get_llm_client
+from .rate_limiter import DeadlineExceeded, LLMUnavailable
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class ProviderHealth:
+    def __init__(self, *, alpha: float, max_error_rate: float, cooldown: float) -> None:
+        self.alpha = alpha
+        self.max_error_rate = max_error_rate
+        self.cooldown = cooldown
+        self.latency: Optional[float] = None
+        self.error_rate = 0.0
+        self.ejected_until = 0.0
+        self.calls = 0
+        self.failures = 0
+
+    def record(self, *, ok: bool, seconds: Optional[float] = None) -> None:
+        self.calls += 1
+        self.failures += not ok
+        if ok and seconds is not None:
+            self.latency = seconds if self.latency is None else self.latency + self.alpha * (seconds - self.latency)
+        self.error_rate += self.alpha * ((0.0 if ok else 1.0) - self.error_rate)
+        if not ok and self.error_rate >= self.max_error_rate:
+            self.ejected_until = time.monotonic() + self.cooldown
+
+    @property
+    def available(self) -> bool:
+        return time.monotonic() >= self.ejected_until
+
+    def expected_latency(self) -> float:
+        """Latência esperada contando as falhas; sem histórico vale 0, para o provider ser experimentado."""
+        return (self.latency or 0.0) / max(1.0 - self.error_rate, 0.05)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "latency_ms": round(self.latency * 1000, 1) if self.latency is not None else None,
+            "error_rate": round(self.error_rate, 3),
+            "available": self.available,
+            "calls": self.calls,
+            "failures": self.failures,
+        }
+
+
+class LLMRouter(LLMClient):
+    """
+    LLMClient que distribui as chamadas entre outros clientes. O empacotamento
+    de `classify_many` não é usado: cada email é roteado (e tem failover)
+    individualmente.
+    """
+
+    def __init__(
+        self,
+        clients: Dict[str, LLMClient],
+        *,
+        weights: Optional[Dict[str, float]] = None,
+        alpha: float,
+        max_error_rate: float,
+        cooldown: float,
+        attempt_timeout: float,
+        deadline_seconds: float,
+        rng: Optional[random.Random] = None,
+    ) -> None:
+        if not clients:
+            raise ValueError("LLM router has no configured provider")
+        self.clients = clients
+        self.weights = {name: weight for name, weight in (weights or {}).items() if name in clients}
+        self.health = {
+            name: ProviderHealth(alpha=alpha, max_error_rate=max_error_rate, cooldown=cooldown) for name in clients
+        }
+        self.attempt_timeout = attempt_timeout
+        self.deadline_seconds = deadline_seconds
+        self.random = rng or random.Random()
+        # Chave do cache de classificações: os resultados valem para o conjunto de providers
+        self.model = "router:" + ",".join(clients)
+        self.provider = "router"
+        self.prompt_version = next(iter(clients.values())).prompt_version
+        self.counters = {"requests": 0, "failovers": 0, "exhausted": 0}
+
+    def order(self) -> List[str]:
+        """Providers na ordem de tentativa desta requisição."""
+        # Empates (ex.: sem histórico) mantêm a ordem de LLM_ROUTER_PROVIDERS
+        by_latency = sorted(self.clients, key=lambda name: self.health[name].expected_latency())
+        available = [name for name in by_latency if self.health[name].available]
+        ejected = sorted(
+            (name for name in by_latency if not self.health[name].available),
+            key=lambda name: self.health[name].ejected_until,
+        )
+        weighted = [name for name in available if self.weights.get(name, 0) > 0]
+        if self.weights and weighted:
+            first = self.random.choices(weighted, weights=[self.weights[name] for name in weighted])[0]
+            available.remove(first)
+            available.insert(0, first)
+        return available + ejected
+
+    async def _route(self, call: Callable[[LLMClient], Awaitable[T]], *, measure_latency: bool = True) -> T:
+        self.counters["requests"] += 1
+        deadline = time.monotonic() + self.deadline_seconds
+        errors: List[str] = []
+        for attempt, name in enumerate(self.order()):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            if attempt:
+                self.counters["failovers"] += 1
+            health = self.health[name]
+            start = time.monotonic()
+            try:
+                result = await asyncio.wait_for(call(self.clients[name]), min(remaining, self.attempt_timeout))
+            except Exception as exc:  # noqa: BLE001
+                health.record(ok=False)
+                errors.append(f"{name}: {str(exc) or type(exc).__name__}")
+                logger.warning("LLM provider '%s' failed, trying the next one: %r", name, exc)
+                continue
+            health.record(ok=True, seconds=time.monotonic() - start if measure_latency else None)
+            return result
+        self.counters["exhausted"] += 1
+        if time.monotonic() >= deadline:
+            raise DeadlineExceeded(f"Prazo de {self.deadline_seconds:g}s esgotado entre os providers ({'; '.join(errors)})")
+        raise LLMUnavailable(f"Nenhum provider respondeu: {'; '.join(errors)}")
+
+    async def classify(self, text: str) -> Dict[str, Any]:
+        return await self._route(lambda client: client.classify(text))
+
+    async def classify_stream(self, text: str) -> AsyncIterator[str]:
+        async def open_stream(client: LLMClient):
+            stream = client.classify_stream(text)
+            try:
+                return await anext(stream, None), stream
+            except BaseException:
+                await stream.aclose()
+                raise
+
+        # Failover só até o primeiro trecho; a latência do stream não entra na EWMA
+        first, stream = await self._route(open_stream, measure_latency=False)
+        try:
+            if first is not None:
+                yield first
+            async for chunk in stream:
+                yield chunk
+        finally:
+            await stream.aclose()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "order": sorted(self.clients, key=lambda name: self.health[name].expected_latency()),
+            "weights": self.weights or None,
+            "providers": {name: health.stats() for name, health in self.health.items()},
+            **self.counters,
+        }
+
+
+def parse_weights(raw: str) -> Dict[str, float]:
+    """`"google=3,openai=1"` -> {"google": 3.0, "openai": 1.0}"""
+    weights: Dict[str, float] = {}
+    for item in raw.split(","):
+        if "=" in item:
+            name, value = item.split("=", 1)
+            weights[name.strip()] = float(value)
+    return weights
+
+
+def build_router() -> LLMRouter:
+    """Roteador sobre os clientes compartilhados de LLM_ROUTER_PROVIDERS; providers sem credenciais ficam de fora."""
+    settings = get_settings()
+    clients: Dict[str, LLMClient] = {}
+    for name in (p.strip() for p in settings.LLM_ROUTER_PROVIDERS.split(",")):
+        if not name or name == "router":
+            continue
+        try:
+            clients[name] = get_llm_client(name)
+        except ValueError as exc:
+            logger.warning("LLM provider '%s' left out of the router: %s", name, exc)
+    return LLMRouter(
+        clients,
+        weights=parse_weights(settings.LLM_ROUTER_WEIGHTS),
+        alpha=settings.LLM_ROUTER_EWMA_ALPHA,
+        max_error_rate=settings.LLM_ROUTER_MAX_ERROR_RATE,
+        cooldown=settings.LLM_ROUTER_COOLDOWN_SECONDS,
+        attempt_timeout=settings.LLM_ROUTER_ATTEMPT_TIMEOUT_SECONDS,
+        deadline_seconds=settings.LLM_DEADLINE_SECONDS,
+    )
+
+
+def current_router() -> LLMRouter | None:
+    """O roteador compartilhado, se LLM_PROVIDER=router e ele pôde ser criado."""
+    if get_settings().LLM_PROVIDER != "router":
+        return None
+    try:
+        client = get_llm_client()
+    except ValueError:
+        return None
+    return client if isinstance(client, LLMRouter) else None
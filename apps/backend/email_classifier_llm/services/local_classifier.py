@@ -0,0 +1,253 @@
+"""
+Pré-classificador local (Naive Bayes multinomial sobre n-gramas com hashing).
+
+Roda em CPU, sem rede, em microssegundos por email (só os primeiros
+`max_tokens` tokens entram no modelo, então o custo não cresce com o tamanho
+do email); responde sem chamar o LLM quando a confiança passa do limiar
+configurado. É treinado a partir do
+log JSONL de resultados do LLM (LOCAL_CLASSIFIER_TRAINING_LOG).
+
+CLI:
+    python -m email_classifier_llm.services.local_classifier train --log results.jsonl --out model.json
+    python -m email_classifier_llm.services.local_classifier report --log results.jsonl --model model.json
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import random
+import re
+import threading
+import zlib
+from collections import Counter, defaultdict
+from functools import lru_cache
+from itertools import islice
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from core.config import get_settings
+
+_TOKEN_RE = re.compile(r"\w+")
+DEFAULT_FEATURE_BITS = 18
+DEFAULT_MAX_TOKENS = 256  # assunto e início do corpo bastam; o histórico citado fica de fora
+
+LOCAL_REPLY = "Agradecemos a sua mensagem! Seguimos à disposição."
+
+
+def extract_features(text: str, bits: int = DEFAULT_FEATURE_BITS, max_tokens: int = DEFAULT_MAX_TOKENS) -> List[int]:
+    """Unigramas + bigramas com hashing (crc32) em 2**bits buckets, dos primeiros `max_tokens` tokens."""
+    mask = (1 << bits) - 1
+    tokens = [match.group().lower() for match in islice(_TOKEN_RE.finditer(text), max_tokens)]
+    features = [zlib.crc32(token.encode()) & mask for token in tokens]
+    features += [zlib.crc32(f"{a} {b}".encode()) & mask for a, b in zip(tokens, tokens[1:])]
+    return features
+
+
+class LocalClassifier:
+    def __init__(
+        self,
+        *,
+        classes: Sequence[str],
+        log_prior: Dict[str, float],
+        log_unseen: Dict[str, float],
+        weights: Dict[str, Dict[int, float]],
+        bits: int = DEFAULT_FEATURE_BITS,
+        max_tokens: int = DEFAULT_MAX_TOKENS,
+    ) -> None:
+        self.classes = list(classes)
+        self.log_prior = log_prior
+        self.log_unseen = log_unseen
+        self.weights = weights
+        self.bits = bits
+        self.max_tokens = max_tokens
+        self._lock = threading.Lock()
+        self.answered = 0
+        self.deferred = 0
+
+    @classmethod
+    def train(
+        cls,
+        samples: Iterable[Tuple[str, str]],
+        *,
+        alpha: float = 1.0,
+        bits: int = DEFAULT_FEATURE_BITS,
+        max_tokens: int = DEFAULT_MAX_TOKENS,
+    ) -> "LocalClassifier":
+        counts: Dict[str, Counter] = defaultdict(Counter)
+        docs: Counter = Counter()
+        for text, category in samples:
+            docs[category] += 1
+            counts[category].update(extract_features(text, bits, max_tokens))
+        if len(docs) < 2:
+            raise ValueError("Treino requer exemplos de pelo menos duas categorias")
+
+        total_docs = sum(docs.values())
+        vocab = len(set().union(*(c.keys() for c in counts.values())))
+        log_prior, log_unseen, weights = {}, {}, {}
+        for category in docs:
+            denominator = sum(counts[category].values()) + alpha * vocab
+            log_prior[category] = math.log(docs[category] / total_docs)
+            log_unseen[category] = math.log(alpha / denominator)
+            weights[category] = {
+                feature: math.log((count + alpha) / denominator)
+                for feature, count in counts[category].items()
+            }
+        return cls(classes=sorted(docs), log_prior=log_prior, log_unseen=log_unseen, weights=weights, bits=bits,
+                   max_tokens=max_tokens)
+
+    def predict(self, text: str) -> Tuple[str, float]:
+        """Retorna (categoria, probabilidade)."""
+        features = extract_features(text, self.bits, self.max_tokens)
+        scores = {}
+        for category in self.classes:
+            weights = self.weights[category]
+            unseen = self.log_unseen[category]
+            scores[category] = self.log_prior[category] + sum(weights.get(f, unseen) for f in features)
+        best = max(scores, key=scores.__getitem__)
+        top = scores[best]
+        normalizer = sum(math.exp(score - top) for score in scores.values())
+        return best, 1.0 / normalizer
+
+    def answer(self, text: str, *, threshold: float, categories: Sequence[str]) -> Optional[Dict[str, Any]]:
+        """Resultado local se a confiança for suficiente; None para seguir para o LLM."""
+        category, probability = self.predict(text)
+        confident = probability >= threshold and category in categories
+        with self._lock:
+            if confident:
+                self.answered += 1
+            else:
+                self.deferred += 1
+        if not confident:
+            return None
+        return {
+            "category": category,
+            "reason": f"Classificado localmente (confiança {probability:.2f}).",
+            "suggested_reply": LOCAL_REPLY,
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.answered + self.deferred
+        return {
+            "answered_locally": self.answered,
+            "deferred_to_llm": self.deferred,
+            "llm_calls_saved_ratio": round(self.answered / total, 4) if total else 0.0,
+        }
+
+    def save(self, path: str | Path) -> None:
+        payload = {
+            "bits": self.bits,
+            "max_tokens": self.max_tokens,
+            "classes": self.classes,
+            "log_prior": self.log_prior,
+            "log_unseen": self.log_unseen,
+            "weights": {c: {str(f): w for f, w in ws.items()} for c, ws in self.weights.items()},
+        }
+        Path(path).write_text(json.dumps(payload), encoding="utf-8")
+
+    @classmethod
+    def load(cls, path: str | Path) -> "LocalClassifier":
+        payload = json.loads(Path(path).read_text(encoding="utf-8"))
+        return cls(
+            classes=payload["classes"],
+            log_prior=payload["log_prior"],
+            log_unseen=payload["log_unseen"],
+            weights={c: {int(f): w for f, w in ws.items()} for c, ws in payload["weights"].items()},
+            bits=payload["bits"],
+            max_tokens=payload.get("max_tokens", DEFAULT_MAX_TOKENS),
+        )
+
+
+_log_lock = threading.Lock()
+
+
+def append_training_example(path: str | Path, text: str, result: Dict[str, Any]) -> None:
+    """Registra um resultado do LLM no log JSONL usado para treino."""
+    line = json.dumps({"text": text, "category": result.get("category")}, ensure_ascii=False)
+    with _log_lock, open(path, "a", encoding="utf-8") as fh:
+        fh.write(line + "\n")
+
+
+def read_training_log(path: str | Path) -> Iterator[Tuple[str, str]]:
+    with open(path, encoding="utf-8") as fh:
+        for line in fh:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            if record.get("text") and record.get("category"):
+                yield record["text"], record["category"]
+
+
+def configured_categories() -> List[str]:
+    """Categorias que podem ser respondidas localmente (LOCAL_CLASSIFIER_CATEGORIES)."""
+    return [c.strip() for c in get_settings().LOCAL_CLASSIFIER_CATEGORIES.split(",") if c.strip()]
+
+
+@lru_cache(maxsize=1)
+def get_local_classifier() -> LocalClassifier | None:
+    settings = get_settings()
+    if not settings.LOCAL_CLASSIFIER_ENABLED or not settings.LOCAL_CLASSIFIER_MODEL_PATH:
+        return None
+    path = Path(settings.LOCAL_CLASSIFIER_MODEL_PATH)
+    if not path.exists():
+        return None
+    return LocalClassifier.load(path)
+
+
+def evaluate(model: LocalClassifier, samples: Sequence[Tuple[str, str]], *, threshold: float, categories: Sequence[str]) -> Dict[str, Any]:
+    """Quantas chamadas ao LLM seriam evitadas e com que concordância."""
+    answered = agreed = correct = 0
+    for text, expected in samples:
+        category, probability = model.predict(text)
+        correct += category == expected
+        if probability >= threshold and category in categories:
+            answered += 1
+            agreed += category == expected
+    total = len(samples)
+    return {
+        "samples": total,
+        "accuracy": round(correct / total, 4) if total else 0.0,
+        "llm_calls_saved": answered,
+        "llm_calls_saved_ratio": round(answered / total, 4) if total else 0.0,
+        "agreement_when_local": round(agreed / answered, 4) if answered else None,
+    }
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    settings = get_settings()
+    categories = configured_categories()
+    parser = argparse.ArgumentParser(description="Pré-classificador local de emails")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    train = sub.add_parser("train", help="Treina a partir do log JSONL de resultados do LLM")
+    train.add_argument("--log", default=settings.LOCAL_CLASSIFIER_TRAINING_LOG, required=settings.LOCAL_CLASSIFIER_TRAINING_LOG is None)
+    train.add_argument("--out", default=settings.LOCAL_CLASSIFIER_MODEL_PATH, required=settings.LOCAL_CLASSIFIER_MODEL_PATH is None)
+    train.add_argument("--holdout", type=float, default=0.2, help="Fração reservada para avaliação")
+    train.add_argument("--alpha", type=float, default=1.0)
+
+    report = sub.add_parser("report", help="Relatório de chamadas ao LLM evitadas sobre um log")
+    report.add_argument("--log", default=settings.LOCAL_CLASSIFIER_TRAINING_LOG, required=settings.LOCAL_CLASSIFIER_TRAINING_LOG is None)
+    report.add_argument("--model", default=settings.LOCAL_CLASSIFIER_MODEL_PATH, required=settings.LOCAL_CLASSIFIER_MODEL_PATH is None)
+
+    for command in (train, report):
+        command.add_argument("--threshold", type=float, default=settings.LOCAL_CLASSIFIER_THRESHOLD)
+
+    args = parser.parse_args(argv)
+    samples = list(read_training_log(args.log))
+
+    if args.command == "train":
+        random.Random(0).shuffle(samples)
+        cut = int(len(samples) * (1 - args.holdout))
+        train_set, holdout = samples[:cut], samples[cut:]
+        model = LocalClassifier.train(train_set, alpha=args.alpha)
+        model.save(args.out)
+        print(f"Modelo salvo em {args.out} ({len(train_set)} exemplos de treino)")
+        if holdout:
+            print(json.dumps(evaluate(model, holdout, threshold=args.threshold, categories=categories), indent=2))
+    else:
+        model = LocalClassifier.load(args.model)
+        print(json.dumps(evaluate(model, samples, threshold=args.threshold, categories=categories), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,286 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from typing import Any, AsyncIterator, BinaryIO, Dict, NamedTuple, Tuple
+
+from core.config import get_settings
+from .classification_cache import get_classification_cache, make_cache_key
+from .client_matching import find_mentioned_clients, matching_enabled
+from .extraction_pool import get_extraction_pool
+from .json_stream import IncrementalJSONObjectParser
+from .llm_client import CATEGORIES, PARSE_FALLBACK, classification_from_dict, estimate_tokens, get_llm_client
+from .local_classifier import append_training_example, configured_categories, get_local_classifier
+from .processor import preprocess_text, source_size
+from .rate_limiter import DeadlineExceeded, LLMUnavailable
+from .telemetry import CLASSIFICATION_SECONDS, FALLBACK_RESPONSES, PARSE_FAILURES, log_sampled, span
+from .trimming import strip_quoted_content, truncate_to_budget
+
+logger = logging.getLogger(__name__)
+
+# Fallback amigável quando não sobra texto após extração/limpeza
+EMPTY_CONTENT_RESULT: Dict[str, str] = {
+    "category": "Improdutivo",
+    "reason": "Arquivo sem conteúdo válido após extração (encoding/arquivo em branco).",
+    "suggested_reply": "O arquivo enviado não pôde ser lido. Pode colar o texto diretamente ou reenviar o arquivo em .txt/.pdf?",
+}
+
+
+class ClassificationOutcome(NamedTuple):
+    result: Dict[str, Any]
+    status_code: int
+    # source (cache | local | llm | empty | error), input_tokens, tokens_saved
+    meta: Dict[str, Any]
+
+
+def error_result(exc: Exception) -> Dict[str, str]:
+    return {
+        "category": "Improdutivo",
+        "reason": f"Erro na classificação: {str(exc)}",
+        "suggested_reply": "Desculpe, ocorreu um erro interno. Tente novamente em alguns instantes.",
+    }
+
+
+async def read_file_text(
+    *, filename: str, content: bytes | None = None, path: str | None = None, fileobj: BinaryIO | None = None
+) -> str:
+    """
+    Extrai o texto de um upload (em memória, em disco ou o arquivo aberto) no
+    pool de extração; levanta ValueError se o arquivo estiver vazio.
+    """
+    if not source_size(content=content, path=path, fileobj=fileobj):
+        raise ValueError("Arquivo recebido está vazio (0 bytes).")
+    return await get_extraction_pool().extract(filename=filename, content=content, path=path, fileobj=fileobj)
+
+
+def prepare_text(text: str) -> tuple[str, Dict[str, Any]]:
+    """
+    Limpeza + corte de histórico/assinaturas + orçamento de tokens.
+    A remoção de citações precisa das quebras de linha, por isso roda antes
+    da normalização; o orçamento é aplicado sobre o texto já normalizado.
+    """
+    with span("preprocess"):
+        return _prepare_text(text)
+
+
+def _prepare_text(text: str) -> tuple[str, Dict[str, Any]]:
+    settings = get_settings()
+    cleaned = preprocess_text(text)
+    if not settings.TRIM_ENABLED or not cleaned:
+        tokens = estimate_tokens(cleaned) if cleaned else 0
+        return cleaned, {"input_tokens": tokens, "tokens_saved": 0}
+
+    trimmed = preprocess_text(strip_quoted_content(text))
+    trimmed = truncate_to_budget(trimmed, settings.TRIM_MAX_INPUT_TOKENS, settings.TRIM_HEAD_RATIO)
+    before, after = estimate_tokens(cleaned), estimate_tokens(trimmed)
+    return trimmed, {"input_tokens": after, "tokens_saved": max(before - after, 0)}
+
+
+async def _shortcut(cleaned: str, cache, key: str | None) -> Tuple[Dict[str, Any] | None, str]:
+    """Resposta sem chamar o LLM: cache ou classificador local."""
+    if cache is not None:
+        cached = await cache.get(key)
+        if cached is not None:
+            return cached, "cache"
+
+    local = get_local_classifier()
+    if local is not None:
+        settings = get_settings()
+        result = local.answer(
+            cleaned,
+            threshold=settings.LOCAL_CLASSIFIER_THRESHOLD,
+            categories=configured_categories(),
+        )
+        if result is not None:
+            return result, "local"
+    return None, "llm"
+
+
+async def _remember(cleaned: str, result: Dict[str, Any], cache, key: str | None) -> None:
+    """Guarda resultados válidos do LLM no cache e no log de treino."""
+    if result == PARSE_FALLBACK:
+        return
+    if cache is not None:
+        await cache.set(key, result)
+    training_log = get_settings().LOCAL_CLASSIFIER_TRAINING_LOG
+    if training_log:
+        await asyncio.to_thread(append_training_example, training_log, cleaned, result)
+
+
+def _observe(source: str, outcome: str, result: Dict[str, Any], started: float) -> None:
+    """Duração por origem/desfecho e contagem das respostas de fallback."""
+    CLASSIFICATION_SECONDS.observe(time.perf_counter() - started, source=source, outcome=outcome)
+    if source in ("empty", "error"):
+        FALLBACK_RESPONSES.inc(reason=source)
+    elif all(result.get(field) == value for field, value in PARSE_FALLBACK.items()):
+        FALLBACK_RESPONSES.inc(reason="parse")  # o resultado pode trazer `clients` e a meta do stream
+
+
+def _outcome_label(status_code: int) -> str:
+    return "ok" if status_code < 400 else "unavailable" if status_code == 503 else "error"
+
+
+def _classification_timeout() -> float | None:
+    return get_settings().LLM_CLASSIFICATION_TIMEOUT_SECONDS or None
+
+
+async def _with_timeout(awaitable):
+    """Teto rígido por classificação, acima do prazo de retentativas do limitador."""
+    timeout = _classification_timeout()
+    try:
+        return await asyncio.wait_for(awaitable, timeout)
+    except asyncio.TimeoutError:
+        raise DeadlineExceeded(f"Classificação excedeu {timeout:g}s") from None
+
+
+async def _stream_with_timeout(chunks: AsyncIterator[str]) -> AsyncIterator[str]:
+    """Mesmo teto de _with_timeout, contado do início ao fim do stream."""
+    timeout = _classification_timeout()
+    if timeout is None:
+        async for chunk in chunks:
+            yield chunk
+        return
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    iterator = aiter(chunks)
+    try:
+        while True:
+            try:
+                chunk = await asyncio.wait_for(anext(iterator), max(deadline - loop.time(), 0))
+            except StopAsyncIteration:
+                return
+            except asyncio.TimeoutError:
+                raise DeadlineExceeded(f"Classificação excedeu {timeout:g}s") from None
+            yield chunk
+    finally:
+        close = getattr(iterator, "aclose", None)
+        if close is not None:
+            await close()
+
+
+async def classify_text(text: str, *, use_cache: bool = True) -> ClassificationOutcome:
+    """
+    Pipeline de um item: pré-processamento, corte, cache, classificador local e LLM.
+    Retorna resultado e status_code com os mesmos fallbacks de /api/classify.
+    Com banco habilitado, os clientes citados no email vão em `result["clients"]`
+    (a consulta roda em paralelo com a classificação e nunca entra no cache).
+    """
+    started = time.perf_counter()
+    if not matching_enabled():
+        outcome = await _classify_text(text, use_cache=use_cache)
+    else:
+        outcome, clients = await asyncio.gather(_classify_text(text, use_cache=use_cache), find_mentioned_clients(text))
+        outcome = outcome._replace(result={**outcome.result, "clients": clients})
+    _observe(outcome.meta["source"], _outcome_label(outcome.status_code), outcome.result, started)
+    return outcome
+
+
+async def _classify_text(text: str, *, use_cache: bool) -> ClassificationOutcome:
+    cleaned, meta = prepare_text(text)
+    if not cleaned:
+        return ClassificationOutcome(dict(EMPTY_CONTENT_RESULT), 200, {**meta, "source": "empty"})
+
+    try:
+        llm_client = get_llm_client()
+        cache = get_classification_cache() if use_cache else None
+        key = make_cache_key(cleaned, prompt_version=llm_client.prompt_version, model=llm_client.model) if cache is not None else None
+        result, source = await _shortcut(cleaned, cache, key)
+        if result is not None:
+            return ClassificationOutcome(result, 200, {**meta, "source": source})
+
+        if get_settings().LLM_PACKING_ENABLED:
+            # Requisições concorrentes são agrupadas numa única chamada ao modelo
+            result = await _with_timeout(llm_client.batcher.submit(cleaned))
+        else:
+            result = await _with_timeout(llm_client.classify(cleaned))
+        await _remember(cleaned, result, cache, key)
+
+        log_sampled(logger, "classification", provider=llm_client.provider, category=result.get("category"),
+                    input_tokens=meta["input_tokens"], tokens_saved=meta["tokens_saved"])
+        return ClassificationOutcome(result, 200, {**meta, "source": "llm"})
+    except Exception as exc:
+        # Modelo sobrecarregado após as retentativas: 503 indica que vale tentar de novo
+        status_code = 503 if isinstance(exc, LLMUnavailable) else 500
+        return ClassificationOutcome(error_result(exc), status_code, {**meta, "source": "error"})
+
+
+def _result_events(result: Dict[str, Any], meta: Dict[str, Any]) -> list[Tuple[str, Dict[str, Any]]]:
+    return [
+        ("classification", {"category": result["category"], "reason": result["reason"]}),
+        ("reply", {"delta": result["suggested_reply"]}),
+        ("done", {**result, **meta}),
+    ]
+
+
+async def classify_text_stream(text: str, *, use_cache: bool = True) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+    """
+    Versão em streaming de classify_text: gera eventos (nome, dados).
+    `classification` sai assim que categoria e motivo são lidos, `reply` traz
+    trechos da resposta sugerida conforme chegam e `done` o resultado final.
+    Cache e classificador local respondem tudo de uma vez; os clientes
+    citados (com banco habilitado) vão em `done`/`error`.
+    """
+    started = time.perf_counter()
+    lookup = asyncio.ensure_future(find_mentioned_clients(text)) if matching_enabled() else None
+    try:
+        async for event, data in _classify_events(text, use_cache=use_cache):
+            if event in ("done", "error"):
+                _observe(data["source"], "ok" if event == "done" else "error", data, started)
+                if lookup is not None:
+                    data = {**data, "clients": await lookup}
+            yield event, data
+    finally:
+        if lookup is not None:
+            lookup.cancel()
+
+
+def _announceable(values: Dict[str, Any]) -> bool:
+    return values.get("category") in CATEGORIES and isinstance(values.get("reason"), str)
+
+
+async def _classify_events(text: str, *, use_cache: bool) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+    cleaned, meta = prepare_text(text)
+    if not cleaned:
+        for event in _result_events(dict(EMPTY_CONTENT_RESULT), {**meta, "source": "empty"}):
+            yield event
+        return
+
+    try:
+        llm_client = get_llm_client()
+        cache = get_classification_cache() if use_cache else None
+        key = make_cache_key(cleaned, prompt_version=llm_client.prompt_version, model=llm_client.model) if cache is not None else None
+        result, source = await _shortcut(cleaned, cache, key)
+        if result is not None:
+            for event in _result_events(result, {**meta, "source": source}):
+                yield event
+            return
+
+        parser = IncrementalJSONObjectParser()
+        announced = replied = held = False
+        async for chunk in _stream_with_timeout(llm_client.classify_stream(cleaned)):
+            for kind, field, value in parser.feed(chunk):
+                # Trechos da resposta só depois de uma categoria válida anunciada; se a
+                # resposta começou antes, ela vai inteira no fim
+                if kind == "delta" and field == "suggested_reply":
+                    held = held or not announced
+                    if not held:
+                        replied = True
+                        yield "reply", {"delta": value}
+                elif kind == "complete" and not announced and _announceable(parser.values):
+                    announced = True
+                    yield "classification", {"category": parser.values["category"], "reason": parser.values["reason"]}
+
+        try:
+            result = classification_from_dict(parser.values)._asdict()
+        except ValueError:
+            PARSE_FAILURES.inc(provider=llm_client.provider)
+            result = dict(PARSE_FALLBACK)
+        if not announced:
+            yield "classification", {"category": result["category"], "reason": result["reason"]}
+        if not replied:
+            yield "reply", {"delta": result["suggested_reply"]}
+        await _remember(cleaned, result, cache, key)
+        yield "done", {**result, **meta, "source": "llm"}
+    except Exception as exc:
+        yield "error", {**error_result(exc), **meta, "source": "error"}
@@ -1,13 +1,23 @@
 from __future__ import annotations
 
+import html
 import io
+import mmap
+import os
 import re
-from typing import Final
+from email import policy
+from email.message import EmailMessage
+from email.parser import BytesParser
+from typing import BinaryIO, Final
 
 from pypdf import PdfReader
 
 TXT_EXTENSIONS: Final = {".txt"}
 PDF_EXTENSIONS: Final = {".pdf"}
+EML_EXTENSIONS: Final = {".eml"}
+
+_HTML_SKIP_RE = re.compile(r"<(script|style)\b.*?</\1\s*>", re.IGNORECASE | re.DOTALL)
+_HTML_TAG_RE = re.compile(r"<[^>]+>")
 
 
 def _ext_of(filename: str) -> str:
@@ -16,54 +26,168 @@ def _ext_of(filename: str) -> str:
     return lower[dot:] if dot != -1 else ""
 
 
-def extract_text_from_file(*, filename: str, content: bytes) -> str:
+# Bytes sem mapeamento no cp1252: presença deles faz a decodificação cp1252 falhar
+_CP1252_UNDEFINED: Final = (b"\x81", b"\x8d", b"\x8f", b"\x90", b"\x9d")
+
+
+def _post(text: str) -> str:
+    # Remove null chars e normaliza espaços
+    return text.replace("\x00", "").strip()
+
+
+def _single_byte_encoding(content) -> str:
+    # cp1252 só falha nos 5 bytes indefinidos; latin-1 aceita qualquer byte
+    if any(content.find(byte) != -1 for byte in _CP1252_UNDEFINED):
+        return "latin-1"
+    return "cp1252"
+
+
+def sniff_fallback_encoding(content) -> str:
+    """
+    Escolhe, sem decodificar, a codificação que a cascata utf-16 → cp1252 →
+    latin-1 aceitaria quando o utf-8 já falhou. utf-16 com tamanho ímpar
+    sempre falha, então só é tentado com tamanho par.
+    """
+    if len(content) % 2 == 0:
+        return "utf-16"
+    return _single_byte_encoding(content)
+
+
+def _decode_text(content) -> str:
+    # `content` pode ser bytes ou um buffer (mmap) — str(buffer, encoding) decodifica sem cópia extra
+    # Tenta decodificação robusta: BOMs e fallbacks comuns do Windows
+    head = content[:3]
+    if head == b"\xef\xbb\xbf":  # UTF-8 BOM
+        try:
+            return _post(str(content, "utf-8-sig"))
+        except UnicodeDecodeError:
+            pass
+    if head[:2] == b"\xff\xfe":  # UTF-16 LE BOM
+        try:
+            return _post(str(content, "utf-16-le"))
+        except UnicodeDecodeError:
+            pass
+    if head[:2] == b"\xfe\xff":  # UTF-16 BE BOM
+        try:
+            return _post(str(content, "utf-16-be"))
+        except UnicodeDecodeError:
+            pass
+    # Caminho rápido: utf-8 (caso comum) numa única tentativa
+    try:
+        return _post(str(content, "utf-8"))
+    except UnicodeDecodeError:
+        pass
+    encoding = sniff_fallback_encoding(content)
+    if encoding == "utf-16":
+        try:
+            return _post(str(content, "utf-16"))
+        except UnicodeDecodeError:
+            # Surrogates inválidos: segue a mesma ordem da cascata original
+            encoding = _single_byte_encoding(content)
+    return _post(str(content, encoding))
+
+
+def _extract_pdf(stream: BinaryIO, max_pages: int | None) -> str:
+    reader = PdfReader(stream)
+    pages = reader.pages if max_pages is None else reader.pages[:max_pages]
+    pages_text = [page.extract_text() or "" for page in pages]
+    joined = "\n".join(pages_text)
+    return joined.strip()
+
+
+def _strip_html(markup: str) -> str:
+    return html.unescape(_HTML_TAG_RE.sub(" ", _HTML_SKIP_RE.sub(" ", markup)))
+
+
+def _part_text(part: EmailMessage) -> str:
+    try:
+        text = part.get_content()
+    except (LookupError, UnicodeError):
+        # charset desconhecido/errado no cabeçalho: decodifica os bytes como texto solto
+        text = _decode_text(part.get_payload(decode=True) or b"")
+    return _strip_html(text) if part.get_content_subtype() == "html" else text
+
+
+def _extract_message(stream: BinaryIO, max_pages: int | None) -> str:
+    """Assunto + corpo (text/plain, senão html) + anexos .txt/.pdf de um email RFC 822."""
+    message = BytesParser(policy=policy.default).parse(stream)
+    parts = []
+    if message["subject"]:
+        parts.append(f"Assunto: {message['subject']}")
+    body = message.get_body(preferencelist=("plain", "html"))
+    if body is not None:
+        parts.append(_part_text(body))
+    for attachment in message.iter_attachments():
+        filename = attachment.get_filename() or ""
+        if _ext_of(filename) not in TXT_EXTENSIONS | PDF_EXTENSIONS:
+            continue
+        try:
+            parts.append(extract_text_from_file(
+                filename=filename, content=attachment.get_payload(decode=True) or b"", max_pages=max_pages
+            ))
+        except Exception:  # noqa: BLE001 - anexo ilegível não invalida o email
+            continue
+    return _post("\n\n".join(part for part in parts if part))
+
+
+def source_size(*, content: bytes | None = None, path: str | None = None, fileobj: BinaryIO | None = None) -> int:
+    """Tamanho do upload em bytes, qualquer que seja a origem aceita por extract_text_from_file."""
+    if content is not None:
+        return len(content)
+    if path is not None:
+        return os.path.getsize(path)
+    return fileobj.seek(0, os.SEEK_END)
+
+
+def extract_text_from_file(
+    *,
+    filename: str,
+    content: bytes | None = None,
+    path: str | None = None,
+    fileobj: BinaryIO | None = None,
+    max_pages: int | None = None,
+) -> str:
+    """
+    Extrai texto de um upload em memória (`content`), já gravado em disco
+    (`path`) ou aberto (`fileobj`, lido desde o início; ex.: o arquivo
+    temporário do Starlette). Arquivos em disco são lidos via mmap/stream,
+    sem carregar uma cópia inteira na memória.
+    """
+    if sum(source is not None for source in (content, path, fileobj)) != 1:
+        raise ValueError("Provide exactly one of 'content', 'path' or 'fileobj'")
+    if fileobj is not None:
+        fileobj.seek(0)
     ext = _ext_of(filename)
     if ext in TXT_EXTENSIONS or ext == "":
-        # Tenta decodificação robusta: BOMs e fallbacks comuns do Windows
-        def _post(text: str) -> str:
-            # Remove null chars e normaliza espaços
-            return text.replace("\x00", "").strip()
-
-        if content.startswith(b"\xef\xbb\xbf"):  # UTF-8 BOM
-            try:
-                return _post(content.decode("utf-8-sig"))
-            except Exception:
-                pass
-        if content.startswith(b"\xff\xfe"):  # UTF-16 LE BOM
-            try:
-                return _post(content.decode("utf-16-le"))
-            except Exception:
-                pass
-        if content.startswith(b"\xfe\xff"):  # UTF-16 BE BOM
-            try:
-                return _post(content.decode("utf-16-be"))
-            except Exception:
-                pass
-        # Tentativas por ordem de probabilidade em Windows
-        for encoding in ("utf-8", "utf-16", "cp1252", "latin-1"):
-            try:
-                return _post(content.decode(encoding))
-            except Exception:
-                continue
-        # Último recurso: ignorar erros em utf-8
-        return _post(content.decode("utf-8", errors="ignore"))
+        if path is not None:
+            with open(path, "rb") as fh, mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                return _decode_text(mm)
+        return _decode_text(content if fileobj is None else fileobj.read())
     
     if ext in PDF_EXTENSIONS:
+        if fileobj is not None:
+            return _extract_pdf(fileobj, max_pages)
+        if path is not None:
+            with open(path, "rb") as fh:
+                return _extract_pdf(fh, max_pages)
         with io.BytesIO(content) as bio:
-            reader = PdfReader(bio)
-            pages_text = [page.extract_text() or "" for page in reader.pages]
-            joined = "\n".join(pages_text)
-            return joined.strip()
-    
-    raise ValueError("Unsupported file type. Use .txt or .pdf")
+            return _extract_pdf(bio, max_pages)
+
+    if ext in EML_EXTENSIONS:
+        if fileobj is not None:
+            return _extract_message(fileobj, max_pages)
+        if path is not None:
+            with open(path, "rb") as fh:
+                return _extract_message(fh, max_pages)
+        with io.BytesIO(content) as bio:
+            return _extract_message(bio, max_pages)
+
+    raise ValueError("Unsupported file type. Use .txt, .pdf or .eml")
 
 
 def preprocess_text(text: str) -> str:
-    # Normaliza quebras de linha e reduz espaços
-    text = text.replace("\r\n", "\n").replace("\r", "\n")
-    # Remove espaços à direita em cada linha e linhas vazias no fim/início
-    lines = [ln.rstrip() for ln in text.split("\n")]
-    # Rejunta e colapsa múltiplos espaços em um
-    joined = "\n".join(lines).strip()
-    joined = re.sub(r"\s+", " ", joined)
-    return joined.strip()
+    # Passada única: str.split() sem argumentos quebra em qualquer sequência de
+    # whitespace Unicode (o mesmo conjunto de `\s`, incluindo \r e \n) e descarta
+    # as pontas, o que equivale a normalizar quebras de linha, remover espaços à
+    # direita e colapsar múltiplos espaços em um
+    return " ".join(text.split())
@@ -0,0 +1,115 @@
+"""
+Cache de prefixo do prompt (context caching do Gemini).
+
+As instruções fixas (`prompt_<versão>_system.txt`) são registradas uma vez
+como `cachedContent`; cada chamada envia só o email e referencia o cache
+pelo nome. O TTL é renovado antes de expirar, sem bloquear as chamadas que
+ainda podem usar o handle atual. Se o registro falhar ou o provider não
+encontrar mais o cache, as chamadas voltam ao prompt completo e o registro
+só é tentado de novo depois de `PROMPT_CACHE_RETRY_SECONDS`.
+
+O nome do cache inclui a versão e um hash das instruções: editar o prompt
+(ou trocar de versão) registra outro prefixo em vez de reaproveitar o antigo.
+"""
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import logging
+import time
+from typing import Any, Optional
+
+from google.genai import types
+
+from .telemetry import PROMPT_CACHE_EVENTS
+
+logger = logging.getLogger(__name__)
+
+
+def prefix_key(version: str, system: str) -> str:
+    digest = hashlib.sha256(system.encode("utf-8")).hexdigest()[:12]
+    return f"email-classifier-{version}-{digest}"
+
+
+class PromptCache:
+    def __init__(
+        self,
+        client: Any,
+        *,
+        model: str,
+        system: str,
+        version: str,
+        ttl_seconds: float,
+        refresh_margin: float,
+        retry_seconds: float,
+    ) -> None:
+        self.client = client  # cliente aio do google-genai
+        self.model = model
+        self.system = system
+        self.key = prefix_key(version, system)
+        self.ttl_seconds = ttl_seconds
+        self.refresh_margin = min(refresh_margin, ttl_seconds / 2)
+        self.retry_seconds = retry_seconds
+        self.name: Optional[str] = None
+        self._refresh_at = 0.0
+        self._retry_at = 0.0
+        self._lock = asyncio.Lock()
+
+    async def handle(self) -> Optional[str]:
+        """Nome do cache a referenciar nesta chamada, ou None para enviar o prompt completo."""
+        name = self.name
+        now = time.monotonic()
+        if name is not None and (now < self._refresh_at or self._lock.locked()):
+            return name  # renovação em andamento: o handle atual ainda vale pela margem
+        if name is None and now < self._retry_at:
+            return None
+        async with self._lock:
+            now = time.monotonic()
+            if (self.name is not None and now < self._refresh_at) or (self.name is None and now < self._retry_at):
+                return self.name
+            await self._register()
+        return self.name
+
+    async def _register(self) -> None:
+        ttl = f"{int(self.ttl_seconds)}s"
+        event = "refreshed"
+        try:
+            if self.name is not None:
+                try:
+                    await self.client.caches.update(name=self.name, config=types.UpdateCachedContentConfig(ttl=ttl))
+                except Exception as exc:  # noqa: BLE001
+                    logger.info("Prompt cache %s could not be refreshed, registering again: %r", self.name, exc)
+                    self.name = None
+            if self.name is None:
+                event = "created"
+                cached = await self.client.caches.create(
+                    model=self.model,
+                    config=types.CreateCachedContentConfig(display_name=self.key, system_instruction=self.system, ttl=ttl),
+                )
+                self.name = cached.name
+        except Exception as exc:  # noqa: BLE001
+            logger.warning("Prompt cache unavailable, sending the full prompt for %ss: %r", self.retry_seconds, exc)
+            self._disable("failed")
+            return
+        self._refresh_at = time.monotonic() + self.ttl_seconds - self.refresh_margin
+        PROMPT_CACHE_EVENTS.inc(provider="google", event=event)
+
+    def invalidate(self) -> None:
+        """O provider recusou o handle (expirado ou removido): volta ao prompt completo por enquanto."""
+        if self.name is not None:
+            self._disable("invalidated")
+
+    def _disable(self, event: str) -> None:
+        self.name = None
+        self._retry_at = time.monotonic() + self.retry_seconds
+        PROMPT_CACHE_EVENTS.inc(provider="google", event=event)
+
+    async def aclose(self) -> None:
+        """Remove o cache no encerramento (o armazenamento é cobrado pelo TTL)."""
+        name, self.name = self.name, None
+        if name is None:
+            return
+        try:
+            await self.client.caches.delete(name=name)
+        except Exception as exc:  # noqa: BLE001
+            logger.info("Prompt cache %s not deleted: %r", name, exc)
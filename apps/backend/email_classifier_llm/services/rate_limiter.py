@@ -0,0 +1,322 @@
+"""
+Controle de vazão das chamadas ao LLM (lado do cliente).
+
+- Dois token buckets por minuto: requisições (RPM) e tokens estimados (TPM).
+  O custo em tokens é estimado antes da chamada e corrigido pelo uso real
+  informado pela API (o saldo pode ficar negativo e é pago com espera).
+- Janela de concorrência AIMD: cresce 1/limite a cada sucesso (≈ +1 por
+  janela completa) e cai pela metade num 429/503, no máximo uma vez por
+  `cooldown` segundos.
+- Retentativas com backoff exponencial "full jitter", respeitando
+  `Retry-After` (cabeçalho ou RetryInfo do Gemini) e um prazo total por
+  requisição — esperas que estourariam o prazo não são feitas.
+"""
+from __future__ import annotations
+
+import asyncio
+import random
+import re
+import time
+from collections import deque
+from email.utils import parsedate_to_datetime
+from functools import lru_cache
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional, TypeVar
+
+import httpx
+
+from core.config import get_settings
+
+T = TypeVar("T")
+
+RETRYABLE_STATUS = {408, 429, 500, 502, 503, 504}
+THROTTLE_STATUS = {429, 503}
+_DURATION_RE = re.compile(r"^\s*(\d+(?:\.\d+)?)s\s*$")
+
+
+class LLMUnavailable(RuntimeError):
+    """O modelo continuou indisponível (429/5xx/rede) após as retentativas."""
+
+
+class DeadlineExceeded(LLMUnavailable):
+    """O prazo da requisição acabou antes de uma resposta do modelo."""
+
+
+def status_of(exc: BaseException) -> Optional[int]:
+    """Status HTTP de erros do google-genai (`APIError.code`) ou do httpx."""
+    if isinstance(exc, httpx.HTTPStatusError):
+        return exc.response.status_code
+    code = getattr(exc, "code", None)
+    return code if isinstance(code, int) else None
+
+
+def is_retryable(exc: BaseException) -> bool:
+    if isinstance(exc, httpx.TransportError):
+        return True
+    return status_of(exc) in RETRYABLE_STATUS
+
+
+def retry_after_of(exc: BaseException) -> Optional[float]:
+    """Segundos pedidos pelo servidor: cabeçalho Retry-After ou `RetryInfo.retryDelay` do Gemini."""
+    response = getattr(exc, "response", None)
+    headers = getattr(response, "headers", None)
+    value = headers.get("retry-after") if headers is not None else None
+    if value:
+        try:
+            return max(float(value), 0.0)
+        except ValueError:
+            try:
+                return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+            except (TypeError, ValueError):
+                pass
+    details = getattr(exc, "details", None)
+    error = details.get("error") if isinstance(details, dict) else None
+    for item in (error or {}).get("details", []) if isinstance(error, dict) else []:
+        if isinstance(item, dict) and str(item.get("@type", "")).endswith("RetryInfo"):
+            match = _DURATION_RE.match(str(item.get("retryDelay", "")))
+            if match:
+                return float(match.group(1))
+    return None
+
+
+class TokenBucket:
+    """Capacidade `per_minute`, reposta continuamente; `per_minute <= 0` desliga o bucket."""
+
+    def __init__(self, per_minute: float) -> None:
+        self.capacity = float(per_minute)
+        self.tokens = float(per_minute)
+        self.rate = per_minute / 60.0
+        self._updated = time.monotonic()
+
+    @property
+    def enabled(self) -> bool:
+        return self.capacity > 0
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def reserve(self, amount: float) -> float:
+        """Debita `amount` (limitado à capacidade) e devolve quantos segundos esperar até o saldo cobrir o débito."""
+        if not self.enabled:
+            return 0.0
+        self._refill()
+        self.tokens -= min(amount, self.capacity)
+        return -self.tokens / self.rate if self.tokens < 0 else 0.0
+
+    def refund(self, amount: float) -> None:
+        if self.enabled:
+            self._refill()
+            self.tokens = min(self.capacity, self.tokens + amount)
+
+    def stats(self) -> Dict[str, Any]:
+        if not self.enabled:
+            return {"enabled": False}
+        self._refill()
+        return {"enabled": True, "capacity": self.capacity, "available": round(self.tokens, 2)}
+
+
+class AIMDWindow:
+    """Limite de chamadas simultâneas com aumento aditivo e redução multiplicativa."""
+
+    def __init__(
+        self,
+        *,
+        initial: int,
+        minimum: int,
+        maximum: int,
+        decrease_factor: float = 0.5,
+        cooldown: float = 1.0,
+    ) -> None:
+        self.minimum = max(1, minimum)
+        self.maximum = max(self.minimum, maximum)
+        self.limit = float(min(max(initial, self.minimum), self.maximum))
+        self.decrease_factor = decrease_factor
+        self.cooldown = cooldown
+        self.in_flight = 0
+        self.decreases = 0
+        self._last_decrease = float("-inf")
+        # Futures do loop corrente (sem primitivas asyncio presas a um loop)
+        self._waiters: Deque[asyncio.Future] = deque()
+
+    async def acquire(self, timeout: Optional[float] = None) -> None:
+        if self.in_flight < int(self.limit) and not self._waiters:
+            self.in_flight += 1
+            return
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.append(future)
+        try:
+            await asyncio.wait_for(asyncio.shield(future), timeout)
+        except BaseException:
+            if future.done() and not future.cancelled():
+                self.release()  # o slot chegou junto com o timeout/cancelamento
+            else:
+                future.cancel()
+            raise
+
+    def release(self, outcome: str = "neutral") -> None:
+        """outcome: success | throttled | neutral."""
+        self.in_flight -= 1
+        if outcome == "success":
+            self.limit = min(self.maximum, self.limit + 1 / self.limit)
+        elif outcome == "throttled":
+            now = time.monotonic()
+            if now - self._last_decrease >= self.cooldown:
+                self.limit = max(self.minimum, self.limit * self.decrease_factor)
+                self._last_decrease = now
+                self.decreases += 1
+        self._wake()
+
+    def _wake(self) -> None:
+        while self._waiters and self.in_flight < int(self.limit):
+            future = self._waiters.popleft()
+            if future.done() or future.get_loop().is_closed():
+                continue
+            self.in_flight += 1
+            future.set_result(None)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "limit": round(self.limit, 2),
+            "in_flight": self.in_flight,
+            "waiting": sum(1 for future in self._waiters if not future.done()),
+            "decreases": self.decreases,
+        }
+
+
+class LLMRateLimiter:
+    def __init__(
+        self,
+        *,
+        rpm: float,
+        tpm: float,
+        window: AIMDWindow,
+        max_attempts: int,
+        backoff_base: float,
+        backoff_max: float,
+        deadline_seconds: float,
+    ) -> None:
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+        self.window = window
+        self.max_attempts = max(1, max_attempts)
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.deadline_seconds = deadline_seconds
+        self.counters = {"calls": 0, "retries": 0, "throttled": 0, "failures": 0, "deadline_exceeded": 0}
+        self._sleep = asyncio.sleep
+
+    async def call(
+        self,
+        func: Callable[[], Awaitable[T]],
+        *,
+        tokens: int,
+        usage: Callable[[T], Optional[int]] | None = None,
+    ) -> T:
+        """
+        Executa `func` dentro dos limites, com retentativas. `usage` extrai do
+        resultado o total real de tokens, para corrigir a estimativa no TPM.
+        """
+        deadline = time.monotonic() + self.deadline_seconds
+        attempt = 0
+        while True:
+            attempt += 1
+            await self._admit(tokens, deadline)
+            self.counters["calls"] += 1
+            try:
+                result = await asyncio.wait_for(func(), self._remaining(deadline))
+            except asyncio.TimeoutError:
+                self.window.release()
+                self.counters["deadline_exceeded"] += 1
+                raise DeadlineExceeded(f"Prazo de {self.deadline_seconds:g}s esgotado aguardando o modelo") from None
+            except Exception as exc:
+                throttled = status_of(exc) in THROTTLE_STATUS
+                self.window.release("throttled" if throttled else "neutral")
+                self.counters["throttled"] += throttled
+                delay = self._retry_delay(exc, attempt, deadline)
+                self.counters["retries"] += 1
+                await self._sleep(delay)
+                continue
+            except BaseException:
+                self.window.release()
+                raise
+            self.window.release("success")
+            actual = usage(result) if usage is not None else None
+            if actual is not None:
+                correction = actual - tokens
+                if correction > 0:
+                    self.tokens.reserve(correction)
+                else:
+                    self.tokens.refund(-correction)
+            return result
+
+    async def _admit(self, tokens: int, deadline: float) -> None:
+        wait = max(self.requests.reserve(1), self.tokens.reserve(tokens))
+        if wait > self._remaining(deadline):
+            self.requests.refund(1)
+            self.tokens.refund(tokens)
+            self.counters["deadline_exceeded"] += 1
+            raise DeadlineExceeded(f"Limite de RPM/TPM exigiria esperar {wait:.1f}s, além do prazo da requisição")
+        if wait > 0:
+            await self._sleep(wait)
+        try:
+            await self.window.acquire(self._remaining(deadline))
+        except asyncio.TimeoutError:
+            self.requests.refund(1)
+            self.tokens.refund(tokens)
+            self.counters["deadline_exceeded"] += 1
+            raise DeadlineExceeded("Prazo esgotado aguardando vaga na janela de concorrência") from None
+
+    def _retry_delay(self, exc: Exception, attempt: int, deadline: float) -> float:
+        if not is_retryable(exc):
+            raise exc
+        if attempt >= self.max_attempts:
+            self.counters["failures"] += 1
+            raise LLMUnavailable(f"Modelo indisponível após {attempt} tentativas: {exc}") from exc
+        retry_after = retry_after_of(exc)
+        ceiling = min(self.backoff_max, self.backoff_base * 2 ** (attempt - 1))
+        delay = random.uniform(0, ceiling) if retry_after is None else retry_after + random.uniform(0, self.backoff_base)
+        if delay >= self._remaining(deadline):
+            self.counters["failures"] += 1
+            self.counters["deadline_exceeded"] += 1
+            raise DeadlineExceeded(f"Nova tentativa em {delay:.1f}s estouraria o prazo da requisição: {exc}") from exc
+        return delay
+
+    @staticmethod
+    def _remaining(deadline: float) -> float:
+        return max(deadline - time.monotonic(), 0.0)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "rpm": self.requests.stats(),
+            "tpm": self.tokens.stats(),
+            "concurrency": self.window.stats(),
+            **self.counters,
+        }
+
+
+@lru_cache(maxsize=None)
+def get_rate_limiter(provider: str) -> LLMRateLimiter | None:
+    """
+    Um limitador por provider no processo (a cota é por chave de API): um 429
+    de um provider não encolhe a janela nem consome o saldo dos outros.
+    RPM/TPM vêm de LLM_RPM_BY_PROVIDER/LLM_TPM_BY_PROVIDER, senão LLM_RPM/LLM_TPM.
+    """
+    from .llm_router import parse_weights
+
+    settings = get_settings()
+    if not settings.LLM_RATE_LIMIT_ENABLED:
+        return None
+    return LLMRateLimiter(
+        rpm=parse_weights(settings.LLM_RPM_BY_PROVIDER).get(provider, settings.LLM_RPM),
+        tpm=parse_weights(settings.LLM_TPM_BY_PROVIDER).get(provider, settings.LLM_TPM),
+        window=AIMDWindow(
+            initial=settings.LLM_CONCURRENCY_INITIAL,
+            minimum=settings.LLM_CONCURRENCY_MIN,
+            maximum=settings.LLM_CONCURRENCY_MAX,
+        ),
+        max_attempts=settings.LLM_RETRY_MAX_ATTEMPTS,
+        backoff_base=settings.LLM_RETRY_BASE_SECONDS,
+        backoff_max=settings.LLM_RETRY_MAX_BACKOFF_SECONDS,
+        deadline_seconds=settings.LLM_DEADLINE_SECONDS,
+    )
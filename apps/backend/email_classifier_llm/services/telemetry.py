@@ -0,0 +1,194 @@
+"""
+Métricas no formato texto do Prometheus (GET /metrics) e logs estruturados
+amostrados.
+
+Sem dependência externa: contadores e histogramas de buckets fixos, com uma
+série por combinação de labels (valores de cardinalidade baixa: etapa,
+desfecho, tipo de arquivo, provider). São atualizados só no event loop, por
+isso não há lock; cada processo do uvicorn expõe as próprias séries.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import random
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from core.config import get_settings
+from .processor import EML_EXTENSIONS, PDF_EXTENSIONS, TXT_EXTENSIONS, _ext_of
+
+# Buckets (s) do histograma por etapa: de extração de .txt pequenos a chamadas lentas ao LLM
+DEFAULT_BUCKETS: Tuple[float, ...] = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+_KNOWN_FILE_TYPES = TXT_EXTENSIONS | PDF_EXTENSIONS | EML_EXTENSIONS
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values) if value]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return str(int(value)) if float(value).is_integer() else repr(value)
+
+
+class Counter:
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> None:
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(tuple(str(labels.get(name, "")) for name in self.labelnames), 0)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for key, value in sorted(self._values.items()):
+            lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}")
+        return lines
+
+
+class Histogram:
+    def __init__(
+        self,
+        name: str,
+        help_text: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> None:
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Por série: contagem por bucket (não cumulativa, +Inf no fim), soma e total
+        self._series: Dict[Tuple[str, ...], List[float]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        series = self._series.get(key)
+        if series is None:
+            series = self._series[key] = [0] * (len(self.buckets) + 3)
+        series[bisect_left(self.buckets, value)] += 1
+        series[-2] += value
+        series[-1] += 1
+
+    def count(self, **labels: str) -> int:
+        series = self._series.get(tuple(str(labels.get(name, "")) for name in self.labelnames))
+        return int(series[-1]) if series else 0
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for key, series in sorted(self._series.items()):
+            cumulative = 0
+            for bound, hits in zip(self.buckets + (float("inf"),), series):
+                cumulative += hits
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {_format_value(cumulative)}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(series[-2])}")
+            lines.append(f"{self.name}_count{labels} {_format_value(series[-1])}")
+        return lines
+
+
+STAGE_SECONDS = Histogram(
+    "email_classifier_stage_duration_seconds",
+    "Duração de cada etapa (upload, extract, preprocess, llm_call, parse).",
+    ("stage", "outcome", "file_type", "provider"),
+)
+CLASSIFICATION_SECONDS = Histogram(
+    "email_classifier_classification_duration_seconds",
+    "Duração da classificação de um email (sem upload/extração), por origem do resultado.",
+    ("source", "outcome"),
+)
+FALLBACK_RESPONSES = Counter(
+    "email_classifier_fallback_responses_total",
+    "Respostas de fallback entregues (parse, empty, error).",
+    ("reason",),
+)
+PARSE_FAILURES = Counter(
+    "email_classifier_parse_failures_total",
+    "Respostas do modelo que não puderam ser interpretadas.",
+    ("provider",),
+)
+LLM_TOKENS = Counter(
+    "email_classifier_llm_tokens_total",
+    "Tokens informados pelos providers (input/output; cached é a parte do input lida do cache de prefixo).",
+    ("provider", "direction"),
+)
+
+PROMPT_CACHE_EVENTS = Counter(
+    "email_classifier_prompt_cache_events_total",
+    "Cache de prefixo do prompt: created, refreshed, failed, invalidated.",
+    ("provider", "event"),
+)
+
+METRICS = (STAGE_SECONDS, CLASSIFICATION_SECONDS, FALLBACK_RESPONSES, PARSE_FAILURES, LLM_TOKENS, PROMPT_CACHE_EVENTS)
+
+
+def render_metrics() -> str:
+    lines: List[str] = []
+    for metric in METRICS:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+def file_type_of(filename: Optional[str]) -> str:
+    """Label de tipo de arquivo com cardinalidade fixa: txt, pdf, eml ou other."""
+    ext = _ext_of(filename or "")
+    return ext[1:] if ext in _KNOWN_FILE_TYPES else "other"
+
+
+@contextmanager
+def span(stage: str, **labels: str) -> Iterator[None]:
+    """Mede o bloco no histograma de etapas; outcome é ok, error ou cancelled (ex.: hedge perdedor)."""
+    start = time.perf_counter()
+    outcome = "ok"
+    try:
+        yield
+    except asyncio.CancelledError:
+        outcome = "cancelled"
+        raise
+    except BaseException:
+        outcome = "error"
+        raise
+    finally:
+        STAGE_SECONDS.observe(time.perf_counter() - start, stage=stage, outcome=outcome, **labels)
+
+
+def record_tokens(
+    provider: str,
+    input_tokens: Optional[int],
+    output_tokens: Optional[int],
+    cached_tokens: Optional[int] = None,
+) -> None:
+    if cached_tokens:
+        LLM_TOKENS.inc(cached_tokens, provider=provider, direction="cached")
+    if input_tokens:
+        LLM_TOKENS.inc(input_tokens, provider=provider, direction="input")
+    if output_tokens:
+        LLM_TOKENS.inc(output_tokens, provider=provider, direction="output")
+
+
+def log_sampled(logger: logging.Logger, event: str, **fields: Any) -> None:
+    """Uma linha JSON em INFO para uma fração LOG_SAMPLE_RATE das chamadas."""
+    rate = get_settings().LOG_SAMPLE_RATE
+    if rate <= 0 or (rate < 1 and random.random() >= rate) or not logger.isEnabledFor(logging.INFO):
+        return
+    logger.info(json.dumps({"event": event, **fields}, ensure_ascii=False, default=str))
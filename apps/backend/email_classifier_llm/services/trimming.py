@@ -0,0 +1,113 @@
+"""
+Remove do email o que pouco ajuda na classificação (histórico citado,
+cabeçalhos de encaminhamento, assinaturas e avisos legais) e aplica um
+orçamento de tokens com truncamento cabeça+cauda.
+
+A detecção é feita linha a linha com operações de string (startswith,
+endswith, `in`), sem regex com backtracking: custo linear no tamanho do texto.
+"""
+from __future__ import annotations
+
+from typing import Final
+
+from .llm_client import estimate_tokens
+
+# Linhas que iniciam o histórico de uma resposta: tudo a partir delas é descartado
+_REPLY_SEPARATORS: Final = (
+    "-----original message-----",
+    "-----mensagem original-----",
+    "________________________________",
+)
+_REPLY_HEADERS: Final = (
+    ("on ", "wrote:"),
+    ("em ", "escreveu:"),
+    ("le ", "a écrit :"),
+)
+# Marcadores de encaminhamento: o cabeçalho é removido, o corpo encaminhado é mantido
+_FORWARD_MARKERS: Final = (
+    "---------- forwarded message ---------",
+    "---------- mensagem encaminhada ---------",
+    "begin forwarded message:",
+    "início da mensagem encaminhada:",
+)
+_HEADER_FIELDS: Final = (
+    "de:", "from:", "para:", "to:", "cc:", "cco:", "bcc:", "data:", "date:",
+    "enviado:", "sent:", "enviada em:", "assunto:", "subject:",
+)
+# Início de assinatura ou aviso legal: tudo a partir daqui é descartado
+_SIGNATURE_LINES: Final = ("--", "__")  # comparadas à linha já sem espaços: cobre o delimitador "-- "
+# "--"/"__" também separam seções no meio do texto: só valem como assinatura
+# se depois deles vierem no máximo estas linhas (não vazias) até o fim da mensagem
+SIGNATURE_MAX_LINES: Final = 10
+_SIGNATURE_PREFIXES: Final = (
+    "enviado do meu", "sent from my", "enviado de meu", "get outlook for",
+)
+_DISCLAIMER_FRAGMENTS: Final = (
+    "esta mensagem pode conter informa",
+    "esta mensagem e seus anexos",
+    "this email and any attachments",
+    "this message may contain confidential",
+    "aviso de confidencialidade",
+    "confidentiality notice",
+)
+
+TRUNCATION_MARKER: Final = " [...] "
+
+
+def _is_reply_header(lower: str) -> bool:
+    if lower in _REPLY_SEPARATORS:
+        return True
+    return any(lower.startswith(start) and lower.endswith(end) for start, end in _REPLY_HEADERS)
+
+
+def _is_signature_start(lower: str) -> bool:
+    if lower.startswith(_SIGNATURE_PREFIXES):
+        return True
+    return any(fragment in lower for fragment in _DISCLAIMER_FRAGMENTS)
+
+
+def strip_quoted_content(text: str) -> str:
+    """
+    Remove linhas citadas ("> ..."), o histórico após "Em ..., X escreveu:",
+    cabeçalhos de mensagens encaminhadas e assinaturas/avisos legais.
+    Se nada sobrar, devolve o texto original.
+    """
+    kept = []
+    nonblank = 0
+    delimiters = []  # (posição em kept, linhas não vazias antes dela) de cada "--"/"__"
+    in_forward_header = False
+    for raw in text.splitlines():
+        line = raw.strip()
+        lower = line.lower()
+        if in_forward_header:
+            # Cabeçalho do encaminhamento termina na primeira linha que não é campo
+            if not line or lower.startswith(_HEADER_FIELDS):
+                continue
+            in_forward_header = False
+        if lower in _FORWARD_MARKERS:
+            in_forward_header = True
+            continue
+        if line.startswith(">"):
+            continue
+        if _is_reply_header(lower) or _is_signature_start(lower):
+            break
+        if line in _SIGNATURE_LINES:
+            delimiters.append((len(kept), nonblank))
+        nonblank += bool(line)
+        kept.append(raw)
+    for position, before in delimiters:
+        if nonblank - before - 1 <= SIGNATURE_MAX_LINES:
+            del kept[position:]
+            break
+    stripped = "\n".join(kept)
+    return stripped if stripped.strip() else text
+
+
+def truncate_to_budget(text: str, max_tokens: int, head_ratio: float = 0.7) -> str:
+    """Mantém o início e o fim do texto dentro do orçamento de tokens."""
+    if max_tokens <= 0 or estimate_tokens(text) <= max_tokens:
+        return text
+    max_chars = max(max_tokens * 4 - len(TRUNCATION_MARKER), 0)
+    head = int(max_chars * head_ratio)
+    tail = max_chars - head
+    return text[:head].rstrip() + TRUNCATION_MARKER + text[len(text) - tail:].lstrip()
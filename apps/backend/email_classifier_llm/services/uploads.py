@@ -0,0 +1,160 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import shutil
+import tempfile
+from typing import Any, BinaryIO, Dict, List, Optional, Protocol
+
+from core.config import get_settings
+from .telemetry import file_type_of, span
+
+CHUNK_SIZE = 64 * 1024
+
+
+class UploadTooLarge(ValueError):
+    def __init__(self, max_bytes: int) -> None:
+        super().__init__(f"Arquivo excede o limite de {max_bytes} bytes.")
+        self.max_bytes = max_bytes
+
+
+class AsyncReadable(Protocol):
+    async def read(self, size: int = -1) -> bytes: ...
+
+
+class SpooledUpload:
+    """
+    Upload lido em blocos: fica em memória até `threshold` bytes e depois é
+    despejado num arquivo temporário, que o pypdf/mmap abre direto do disco.
+    """
+
+    def __init__(self, *, suffix: str = "", threshold: int, max_bytes: int, spool_dir: Optional[str] = None) -> None:
+        self.suffix = suffix
+        self.threshold = threshold
+        self.max_bytes = max_bytes
+        self.spool_dir = spool_dir
+        self.size = 0
+        self.path: Optional[str] = None
+        self._chunks: List[bytes] = []
+        self._file = None
+        self._source: Optional[BinaryIO] = None
+
+    async def write(self, chunk: bytes) -> None:
+        self.size += len(chunk)
+        if self.size > self.max_bytes:
+            raise UploadTooLarge(self.max_bytes)
+        if self._file is None and self.size <= self.threshold:
+            self._chunks.append(chunk)
+            return
+        if self._file is None:
+            self._file = tempfile.NamedTemporaryFile(
+                prefix="upload-", suffix=self.suffix, dir=self.spool_dir, delete=False
+            )
+            self.path = self._file.name
+            pending, self._chunks = self._chunks, []
+            pending.append(chunk)
+            await asyncio.to_thread(self._file.writelines, pending)
+            return
+        await asyncio.to_thread(self._file.write, chunk)
+
+    async def adopt(self, source: BinaryIO, size: int, *, persist: bool = False) -> None:
+        """
+        Usa um upload que já chegou inteiro (o SpooledTemporaryFile do Starlette):
+        o limite é conferido pelo tamanho, sem ler nada, e a extração lê `source`
+        no lugar. Só com `persist` (o arquivo precisa sobreviver à requisição)
+        o conteúdo é copiado para um arquivo temporário próprio.
+        """
+        if size > self.max_bytes:
+            raise UploadTooLarge(self.max_bytes)
+        self.size = size
+        if not persist:
+            self._source = source
+            return
+        self._file = tempfile.NamedTemporaryFile(
+            prefix="upload-", suffix=self.suffix, dir=self.spool_dir, delete=False
+        )
+        self.path = self._file.name
+        await asyncio.to_thread(_copy_file, source, self._file)
+
+    async def finish(self) -> None:
+        if self._file is not None:
+            await asyncio.to_thread(self._file.close)
+
+    def source(self) -> Dict[str, Any]:
+        """Argumentos `content=`, `path=` ou `fileobj=` para extract_text_from_file."""
+        if self._source is not None:
+            return {"fileobj": self._source}
+        if self.path is not None:
+            return {"path": self.path}
+        return {"content": b"".join(self._chunks)}
+
+    def close(self) -> None:
+        # `_source` pertence ao UploadFile, que o Starlette fecha ao fim da requisição
+        self._chunks = []
+        self._source = None
+        if self._file is not None:
+            self._file.close()
+        if self.path is not None:
+            try:
+                os.unlink(self.path)
+            except FileNotFoundError:
+                pass
+            self.path = None
+
+    def keep(self) -> str:
+        """Desvincula o arquivo em disco do upload (não é apagado no close) e devolve o caminho."""
+        if self.path is None:
+            raise ValueError("Upload não foi despejado em disco.")
+        path, self.path = self.path, None
+        return path
+
+    async def __aenter__(self) -> "SpooledUpload":
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        self.close()
+
+
+def _copy_file(source: BinaryIO, target: BinaryIO) -> None:
+    source.seek(0)
+    shutil.copyfileobj(source, target, CHUNK_SIZE)
+
+
+async def spool_upload(
+    file: AsyncReadable,
+    *,
+    filename: str = "",
+    threshold: Optional[int] = None,
+    spool_dir: Optional[str] = None,
+    persist: bool = False,
+) -> SpooledUpload:
+    """
+    Copia o upload em blocos de CHUNK_SIZE, aplicando UPLOAD_MAX_BYTES durante a leitura.
+    Um UploadFile do Starlette já está inteiro em `file.file` com `file.size`
+    conhecido (o BodySizeLimitMiddleware barra a parte grande enquanto chega):
+    é recusado pelo tamanho e lido no lugar, sem cópia. `persist` garante um
+    arquivo em disco próprio, para `keep()`.
+    """
+    settings = get_settings()
+    dot = filename.rfind(".")
+    if persist:
+        threshold = 0
+    upload = SpooledUpload(
+        suffix=filename[dot:] if dot != -1 else "",
+        threshold=settings.UPLOAD_SPOOL_THRESHOLD_BYTES if threshold is None else threshold,
+        max_bytes=settings.UPLOAD_MAX_BYTES,
+        spool_dir=spool_dir or settings.UPLOAD_SPOOL_DIR,
+    )
+    try:
+        with span("upload", file_type=file_type_of(filename)):
+            buffered, size = getattr(file, "file", None), getattr(file, "size", None)
+            if buffered is not None and size is not None:
+                await upload.adopt(buffered, size, persist=persist)
+            else:
+                while chunk := await file.read(CHUNK_SIZE):
+                    await upload.write(chunk)
+            await upload.finish()
+    except BaseException:
+        upload.close()
+        raise
+    return upload
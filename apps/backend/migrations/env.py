@@ -33,8 +33,8 @@ target_metadata = Base.metadata
 
 
 def get_url():
-    """Retorna a URL do banco de dados das variáveis de ambiente"""
-    return DATABASE_URL
+    """Retorna a URL do banco de dados das variáveis de ambiente (ou a do alembic.ini)"""
+    return DATABASE_URL or config.get_main_option("sqlalchemy.url")
 
 
 def run_migrations_offline() -> None:
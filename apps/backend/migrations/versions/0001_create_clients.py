@@ -0,0 +1,43 @@
+"""create clients
+
+Revision ID: 0001
+Revises: 
+Create Date: 2026-10-18 10:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0001'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Bancos criados antes das migrações (Base.metadata.create_all) já têm a tabela
+    if sa.inspect(op.get_bind()).has_table("clients"):
+        return
+    op.create_table(
+        "clients",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("nome_completo", sa.String(length=255), nullable=False),
+        sa.Column("cpf", sa.String(length=14), nullable=False),
+        sa.Column("data_nascimento", sa.Date(), nullable=False),
+        sa.Column("numero_cliente", sa.String(length=50), nullable=False),
+        sa.Column("email", sa.String(length=255), nullable=False),
+        sa.Column("perfil_investidor", sa.String(length=50), nullable=False),
+        sa.Column("ativos_custodiados", sa.Text(), nullable=True),
+        sa.Column("plano_contratual_em_dia", sa.Boolean(), nullable=False),
+    )
+    op.create_index("ix_clients_id", "clients", ["id"])
+    op.create_index("ix_clients_nome_completo", "clients", ["nome_completo"])
+    op.create_index("ix_clients_cpf", "clients", ["cpf"], unique=True)
+    op.create_index("ix_clients_numero_cliente", "clients", ["numero_cliente"], unique=True)
+    op.create_index("ix_clients_email", "clients", ["email"])
+
+
+def downgrade() -> None:
+    op.drop_table("clients")
@@ -0,0 +1,104 @@
+"""client search column and trigram / FTS5 index
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18 10:30:00
+
+"""
+import unicodedata
+
+from alembic import op
+import sqlalchemy as sa
+
+# DDL e normalização congeladas nesta revisão: mudanças futuras em
+# services/client_search.py não alteram o que esta migração aplica.
+BACKFILL_BATCH = 5_000
+
+PG_UPGRADE = (
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX IF NOT EXISTS ix_clients_search_text_trgm ON clients USING gin (search_text gin_trgm_ops)",
+)
+PG_DOWNGRADE = ("DROP INDEX IF EXISTS ix_clients_search_text_trgm",)
+
+SQLITE_UPGRADE = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS clients_fts USING fts5("
+    "search_text, content='clients', content_rowid='id', tokenize='trigram')",
+    "CREATE TRIGGER IF NOT EXISTS clients_fts_ai AFTER INSERT ON clients BEGIN "
+    "INSERT INTO clients_fts(rowid, search_text) VALUES (new.id, new.search_text); END",
+    "CREATE TRIGGER IF NOT EXISTS clients_fts_ad AFTER DELETE ON clients BEGIN "
+    "INSERT INTO clients_fts(clients_fts, rowid, search_text) VALUES ('delete', old.id, old.search_text); END",
+    "CREATE TRIGGER IF NOT EXISTS clients_fts_au AFTER UPDATE ON clients BEGIN "
+    "INSERT INTO clients_fts(clients_fts, rowid, search_text) VALUES ('delete', old.id, old.search_text); "
+    "INSERT INTO clients_fts(rowid, search_text) VALUES (new.id, new.search_text); END",
+    "INSERT INTO clients_fts(clients_fts) VALUES ('rebuild')",
+)
+SQLITE_DOWNGRADE = (
+    "DROP TRIGGER IF EXISTS clients_fts_ai",
+    "DROP TRIGGER IF EXISTS clients_fts_ad",
+    "DROP TRIGGER IF EXISTS clients_fts_au",
+    "DROP TABLE IF EXISTS clients_fts",
+)
+
+
+# revision identifiers, used by Alembic.
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+
+def _search_text(nome_completo, cpf, numero_cliente, email) -> str:
+    """Nome, CPF (com e sem máscara), número e email em minúsculas, sem acentos."""
+    digits = "".join(ch for ch in cpf or "" if ch.isdigit())
+    joined = " ".join(part for part in (nome_completo, cpf, digits, numero_cliente, email) if part)
+    decomposed = unicodedata.normalize("NFKD", joined)
+    return " ".join("".join(ch for ch in decomposed if not unicodedata.combining(ch)).lower().split())
+
+
+def _backfill_search_text(bind) -> None:
+    clients = sa.table(
+        "clients",
+        sa.column("id", sa.Integer), sa.column("nome_completo", sa.String), sa.column("cpf", sa.String),
+        sa.column("numero_cliente", sa.String), sa.column("email", sa.String), sa.column("search_text", sa.Text),
+    )
+    last_id = 0
+    while True:
+        rows = bind.execute(
+            sa.select(clients.c.id, clients.c.nome_completo, clients.c.cpf, clients.c.numero_cliente, clients.c.email)
+            .where(clients.c.search_text.is_(None), clients.c.id > last_id)
+            .order_by(clients.c.id)
+            .limit(BACKFILL_BATCH)
+        ).all()
+        if not rows:
+            return
+        bind.execute(
+            clients.update().where(clients.c.id == sa.bindparam("row_id")).values(search_text=sa.bindparam("value")),
+            [{"row_id": row[0], "value": _search_text(*row[1:])} for row in rows],
+        )
+        last_id = rows[-1][0]
+
+
+def _execute(bind, statements) -> None:
+    for statement in statements:
+        bind.execute(sa.text(statement))
+
+
+def upgrade() -> None:
+    op.add_column("clients", sa.Column("search_text", sa.Text(), nullable=True))
+    bind = op.get_bind()
+    _backfill_search_text(bind)
+    # GIN pg_trgm (PostgreSQL) ou FTS5 trigram com triggers (SQLite); outros bancos usam LIKE sem índice
+    if bind.dialect.name == "postgresql":
+        _execute(bind, PG_UPGRADE)
+    elif bind.dialect.name == "sqlite":
+        _execute(bind, SQLITE_UPGRADE)
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    if bind.dialect.name == "postgresql":
+        _execute(bind, PG_DOWNGRADE)
+    elif bind.dialect.name == "sqlite":
+        _execute(bind, SQLITE_DOWNGRADE)
+    with op.batch_alter_table("clients") as batch_op:
+        batch_op.drop_column("search_text")
@@ -0,0 +1,54 @@
+"""normalized cpf column and lower(email) index for exact lookups
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18 11:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# Backfill congelado nesta revisão (não depende do código da aplicação)
+BACKFILL_BATCH = 5_000
+
+
+# revision identifiers, used by Alembic.
+revision = '0003'
+down_revision = '0002'
+branch_labels = None
+depends_on = None
+
+
+def _backfill_cpf_digits(bind) -> None:
+    """cpf_digits = só os dígitos do CPF, nas linhas existentes, em lotes por id."""
+    clients = sa.table("clients", sa.column("id", sa.Integer), sa.column("cpf", sa.String),
+                       sa.column("cpf_digits", sa.String))
+    last_id = 0
+    while True:
+        rows = bind.execute(
+            sa.select(clients.c.id, clients.c.cpf)
+            .where(clients.c.cpf_digits.is_(None), clients.c.id > last_id)
+            .order_by(clients.c.id)
+            .limit(BACKFILL_BATCH)
+        ).all()
+        if not rows:
+            return
+        bind.execute(
+            clients.update().where(clients.c.id == sa.bindparam("row_id")).values(cpf_digits=sa.bindparam("value")),
+            [{"row_id": row_id, "value": "".join(ch for ch in cpf or "" if ch.isdigit())} for row_id, cpf in rows],
+        )
+        last_id = rows[-1][0]
+
+
+def upgrade() -> None:
+    op.add_column("clients", sa.Column("cpf_digits", sa.String(length=11), nullable=True))
+    _backfill_cpf_digits(op.get_bind())
+    op.create_index("ix_clients_cpf_digits", "clients", ["cpf_digits"], unique=True)
+    op.create_index("ix_clients_email_lower", "clients", [sa.text("lower(email)")])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_clients_email_lower", table_name="clients")
+    op.drop_index("ix_clients_cpf_digits", table_name="clients")
+    with op.batch_alter_table("clients") as batch_op:
+        batch_op.drop_column("cpf_digits")
@@ -0,0 +1,16 @@
+import pytest
+
+from core.config import get_settings
+
+
+@pytest.fixture
+def settings_env(monkeypatch):
+    """Aplica variáveis de ambiente e recarrega as Settings em cache."""
+    def apply(**values):
+        for key, value in values.items():
+            monkeypatch.setenv(key, str(value))
+        get_settings.cache_clear()
+        return get_settings()
+
+    yield apply
+    get_settings.cache_clear()
@@ -0,0 +1,46 @@
+import asyncio
+
+from email_classifier_llm.services.classification_cache import ClassificationCache, make_cache_key
+from email_classifier_llm.services.ttl_cache import TTLCache
+
+
+def test_key_depends_on_prompt_version_and_model():
+    key = make_cache_key("obrigado!", prompt_version="v1", model="m1")
+    assert key == make_cache_key("obrigado!", prompt_version="v1", model="m1")
+    assert key != make_cache_key("obrigado!", prompt_version="v2", model="m1")
+    assert key != make_cache_key("obrigado!", prompt_version="v1", model="m2")
+
+
+def test_lru_eviction_and_ttl():
+    cache = TTLCache(max_entries=2, ttl_seconds=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    cache.set("d", 4, ttl_seconds=0)
+    assert cache.get("d") is None
+    stats = cache.stats()
+    assert stats["evictions"] == 2
+    assert stats["expirations"] == 1
+
+
+def test_sqlite_tier_survives_restart(tmp_path):
+    path = str(tmp_path / "cache.db")
+    result = {"category": "Improdutivo", "reason": "r", "suggested_reply": "s"}
+
+    async def scenario():
+        first = ClassificationCache(max_entries=10, ttl_seconds=60, sqlite_path=path)
+        await first.set("k", result)
+        first.close()
+        second = ClassificationCache(max_entries=10, ttl_seconds=60, sqlite_path=path)
+        value = await second.get("k")
+        stats = second.stats()
+        second.close()
+        return value, stats
+
+    value, stats = asyncio.run(scenario())
+    assert value == result
+    assert stats["disk"]["hits"] == 1
+    assert stats["memory"]["misses"] == 1
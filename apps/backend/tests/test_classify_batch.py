@@ -0,0 +1,38 @@
+import asyncio
+import json
+
+from fastapi.testclient import TestClient
+
+from email_classifier_llm.main import app
+from email_classifier_llm.services import pipeline
+from email_classifier_llm.services.llm_client import LLMClient
+
+
+class SlowEchoClient(LLMClient):
+    """Responde fora de ordem: textos mais curtos demoram mais."""
+
+    async def classify(self, text):
+        if text == "falha":
+            raise RuntimeError("modelo indisponível")
+        await asyncio.sleep(0.05 / len(text))
+        return {"category": "Produtivo", "reason": text, "suggested_reply": "ok"}
+
+
+def test_batch_keeps_input_order_and_isolates_failures(monkeypatch):
+    monkeypatch.setattr(pipeline, "get_llm_client", lambda: SlowEchoClient())
+    client = TestClient(app)
+    resp = client.post(
+        "/api/classify/batch",
+        data={"texts": json.dumps(["a", "bbbbbbbb", "falha"]), "no_cache": "true"},
+        files=[("files", ("email.txt", b"ccc", "text/plain")), ("files", ("email.doc", b"x", "text/plain"))],
+    )
+    assert resp.status_code == 200
+    results = resp.json()["results"]
+    assert [item["index"] for item in results] == [0, 1, 2, 3, 4]
+    assert [item["result"]["reason"] for item in results[:2]] == ["a", "bbbbbbbb"]
+    assert results[2]["status"] == 500
+    assert results[2]["error"].startswith("Erro na classificação")
+    assert results[3]["source"] == "email.txt"
+    assert results[3]["result"]["reason"] == "ccc"
+    assert results[4]["status"] == 400
+    assert results[4]["result"] is None
@@ -0,0 +1,77 @@
+import asyncio
+from datetime import date
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from email_classifier_llm import database
+from email_classifier_llm.models.client import Base, Client
+from email_classifier_llm.routers.clients import router
+from email_classifier_llm.services.client_cache import get_client_cache
+
+pytest.importorskip("aiosqlite")
+
+
+@pytest.fixture
+def clients_app(tmp_path, settings_env):
+    url = f"sqlite:///{tmp_path / 'clients.db'}"
+    settings_env(ENABLE_DB="true", DATABASE_URL=url, CLIENT_CACHE_MAX_ENTRIES=10)
+    get_client_cache.cache_clear()
+    engine = create_engine(url)
+    Base.metadata.create_all(engine)
+    session = Session(engine)
+    session.add(Client(nome_completo="Maria Souza", cpf="123.456.789-00", numero_cliente="CLI001",
+                       email="maria@example.com", data_nascimento=date(1980, 1, 1), perfil_investidor="Moderado"))
+    session.commit()
+
+    app = FastAPI()
+    app.include_router(router, prefix="/api")
+    yield TestClient(app), session
+    session.close()
+    engine.dispose()
+    asyncio.run(database.close_db())
+    get_client_cache.cache_clear()
+
+
+def test_read_through_by_id_cpf_and_number(clients_app):
+    client, _ = clients_app
+    first = client.get("/api/clients/1")
+    assert first.status_code == 200
+    assert first.json()["client"]["nome_completo"] == "Maria Souza"
+    assert client.get("/api/clients/1").json() == first.json()
+
+    # CPF e número resolvem para a mesma entrada já serializada
+    by_cpf = client.get("/api/clients/search", params={"q": "12345678900"}).json()
+    by_number = client.get("/api/clients/search", params={"q": "CLI001"}).json()
+    assert by_cpf == by_number == {"success": True, "count": 1, "clients": [first.json()["client"]]}
+
+    stats = client.get("/api/clients/cache").json()
+    assert stats["enabled"] is True
+    assert stats["records"]["hits"] == 3
+    assert stats["records"]["misses"] == 1
+    assert client.get("/api/clients/99").status_code == 404
+
+
+def test_orm_writes_invalidate_all_keys(clients_app):
+    client, session = clients_app
+    assert client.get("/api/clients/1").json()["client"]["cpf"] == "123.456.789-00"
+
+    record = session.get(Client, 1)
+    record.cpf = "999.888.777-66"
+    record.nome_completo = "Maria Souza Lima"
+    session.commit()
+
+    assert client.get("/api/clients/1").json()["client"]["nome_completo"] == "Maria Souza Lima"
+    assert client.get("/api/clients/search", params={"q": "123.456.789-00"}).json()["count"] == 0
+    assert client.get("/api/clients/search", params={"q": "99988877766"}).json()["count"] == 1
+
+
+def test_cache_can_be_disabled(clients_app, settings_env):
+    client, _ = clients_app
+    settings_env(CLIENT_CACHE_ENABLED="false")
+    get_client_cache.cache_clear()
+    assert client.get("/api/clients/1").json()["client"]["numero_cliente"] == "CLI001"
+    assert client.get("/api/clients/cache").json() == {"enabled": False}
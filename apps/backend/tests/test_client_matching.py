@@ -0,0 +1,97 @@
+import asyncio
+from datetime import date
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import Session
+
+from email_classifier_llm import database
+from email_classifier_llm.models.client import Base, Client
+from email_classifier_llm.services import pipeline
+from email_classifier_llm.services.client_matching import extract_identifiers
+from email_classifier_llm.services.llm_client import LLMClient
+
+pytest.importorskip("aiosqlite")
+
+EMAIL = """Bom dia, preciso atualizar o cadastro do cliente CLI002 e também da
+minha esposa (cli001). Respondam para MARIA@example.com, por favor.
+
+--
+João Lima
+CPF 000.000.000-02 / 00000000002
+"""
+
+
+class EchoClient(LLMClient):
+    async def classify(self, text):
+        return {"category": "Produtivo", "reason": "cadastro", "suggested_reply": "ok"}
+
+
+def test_extract_identifiers_in_one_pass():
+    ids = extract_identifiers(EMAIL)
+    assert ids.cpfs == ["00000000002"]
+    assert ids.numeros == ["CLI002", "CLI001"]
+    assert ids.emails == ["maria@example.com"]
+    assert extract_identifiers("joao.12345678900@example.com").cpfs == []
+    assert not extract_identifiers("sem identificadores aqui")
+    assert sum(map(len, extract_identifiers(EMAIL, limit=2))) == 2
+
+
+@pytest.fixture
+def clients_db(tmp_path, settings_env):
+    url = f"sqlite:///{tmp_path / 'clients.db'}"
+    settings_env(ENABLE_DB="true", DATABASE_URL=url, CLASSIFICATION_CACHE_ENABLED="false")
+    engine = create_engine(url)
+    Base.metadata.create_all(engine)
+    with Session(engine) as session:
+        session.add_all([
+            Client(nome_completo="Maria Lima", cpf="000.000.000-01", numero_cliente="CLI001", email="maria@example.com",
+                   data_nascimento=date(1985, 1, 1), perfil_investidor="Conservador", plano_contratual_em_dia=False),
+            Client(nome_completo="João Lima", cpf="000.000.000-02", numero_cliente="CLI002", email="joao@example.com",
+                   data_nascimento=date(1980, 1, 1), perfil_investidor="Arrojado"),
+            Client(nome_completo="Ana Souza", cpf="000.000.000-03", numero_cliente="CLI003", email="ana@example.com",
+                   data_nascimento=date(1990, 1, 1), perfil_investidor="Moderado"),
+        ])
+        session.commit()
+    engine.dispose()
+    yield
+    asyncio.run(database.close_db())
+
+
+def test_classification_attaches_mentioned_clients_with_one_query(clients_db, monkeypatch):
+    monkeypatch.setattr(pipeline, "get_llm_client", lambda: EchoClient())
+
+    async def scenario():
+        statements = []
+        event.listen(database.get_async_engine().sync_engine, "before_cursor_execute",
+                     lambda conn, cursor, statement, *args: statements.append(statement))
+        outcome = await pipeline.classify_text(EMAIL)
+        return outcome, statements
+
+    outcome, statements = asyncio.run(scenario())
+    assert outcome.result["category"] == "Produtivo"
+    clients = {client["numero_cliente"]: client for client in outcome.result["clients"]}
+    assert sorted(clients) == ["CLI001", "CLI002"]
+    assert clients["CLI001"]["perfil_investidor"] == "Conservador"
+    assert clients["CLI001"]["plano_contratual_em_dia"] is False
+    assert clients["CLI001"]["matched_by"] == ["numero_cliente", "email"]
+    assert clients["CLI002"]["matched_by"] == ["cpf", "numero_cliente"]
+    assert len([s for s in statements if s.lstrip().upper().startswith("SELECT")]) == 1
+
+
+def test_stream_done_event_carries_clients(clients_db, monkeypatch):
+    monkeypatch.setattr(pipeline, "get_llm_client", lambda: EchoClient())
+
+    async def scenario():
+        return [event async for event in pipeline.classify_text_stream("Sou o cliente CLI003")]
+
+    events = asyncio.run(scenario())
+    done = dict(events)["done"]
+    assert [client["nome_completo"] for client in done["clients"]] == ["Ana Souza"]
+
+
+def test_no_clients_key_without_database(monkeypatch, settings_env):
+    settings_env(ENABLE_DB="false", CLASSIFICATION_CACHE_ENABLED="false")
+    monkeypatch.setattr(pipeline, "get_llm_client", lambda: EchoClient())
+    outcome = asyncio.run(pipeline.classify_text(EMAIL))
+    assert "clients" not in outcome.result
@@ -0,0 +1,88 @@
+from datetime import date
+
+from sqlalchemy import create_engine
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import Session
+
+from email_classifier_llm.models.client import Base, Client, build_search_text
+from email_classifier_llm.services.client_search import create_search_index, detect_query_shape, search_statement
+from email_classifier_llm.services.client_service import ClientService
+
+CLIENTS = [
+    ("José Antônio Conceição", "123.456.789-00", "CLI001", "jose@example.com"),
+    ("Maria Conceição Souza", "987.654.321-00", "CLI002", "maria.souza@example.com"),
+    ("Antonio Souza", "111.222.333-44", "CLI003", "asouza@example.com"),
+]
+
+
+def _session(tmp_path) -> Session:
+    engine = create_engine(f"sqlite:///{tmp_path / 'clients.db'}")
+    Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        create_search_index(conn)
+    session = Session(engine)
+    session.add_all(
+        Client(nome_completo=nome, cpf=cpf, numero_cliente=numero, email=email,
+               data_nascimento=date(1980, 1, 1), perfil_investidor="Moderado")
+        for nome, cpf, numero, email in CLIENTS
+    )
+    session.commit()
+    return session
+
+
+def _names(clients):
+    return [client.nome_completo for client in clients]
+
+
+def test_search_text_is_accent_insensitive_and_keeps_cpf_digits():
+    assert build_search_text("José  CONCEIÇÃO", "123.456.789-00", "CLI001", "a@b.com") == (
+        "jose conceicao 123.456.789-00 12345678900 cli001 a@b.com"
+    )
+
+
+def test_fts_search_ignores_accents_and_ranks_matches(tmp_path):
+    service = ClientService(_session(tmp_path))
+    assert set(_names(service.search_clients("conceicao"))) == {"José Antônio Conceição", "Maria Conceição Souza"}
+    assert _names(service.search_clients("ANTÔNIO souza")) == ["Antonio Souza"]
+    assert _names(service.search_clients("12345678900")) == ["José Antônio Conceição"]
+    assert _names(service.search_clients("cli002")) == ["Maria Conceição Souza"]
+
+
+def test_short_terms_and_updates_stay_searchable(tmp_path):
+    session = _session(tmp_path)
+    service = ClientService(session)
+    assert len(service.search_clients("so")) == 2
+    client = service.get_client_by_number("CLI003")
+    client.nome_completo = "Antonio Pereira"
+    session.commit()
+    assert _names(service.search_clients("pereira")) == ["Antonio Pereira"]
+    assert "Antonio Souza" not in _names(service.search_clients("antonio"))
+
+
+def test_postgres_statement_uses_trigram_friendly_like_and_similarity():
+    sql = str(search_statement("Conceição", "postgresql").compile(dialect=postgresql.dialect()))
+    assert "clients.search_text LIKE" in sql
+    assert "word_similarity" in sql
+
+
+def test_query_shape_detection():
+    assert detect_query_shape("123.456.789-00") == ("cpf", "12345678900")
+    assert detect_query_shape(" 12345678900 ") == ("cpf", "12345678900")
+    assert detect_query_shape("cli001") == ("numero", "CLI001")
+    assert detect_query_shape("Maria.Souza@Example.com") == ("email", "maria.souza@example.com")
+    assert detect_query_shape("123456") == ("text", "123456")
+    assert detect_query_shape("maria@") == ("text", "maria@")
+
+
+def test_exact_shapes_skip_fuzzy_search(tmp_path, monkeypatch):
+    from email_classifier_llm.services import client_search
+
+    session = _session(tmp_path)
+    service = ClientService(session)
+    monkeypatch.setattr(client_search, "search_statement", lambda *a: (_ for _ in ()).throw(AssertionError("fuzzy")))
+    assert _names(service.search_clients("98765432100")) == ["Maria Conceição Souza"]
+    assert _names(service.search_clients("987.654.321-00")) == ["Maria Conceição Souza"]
+    assert _names(service.search_clients("cli003")) == ["Antonio Souza"]
+    assert _names(service.search_clients("JOSE@example.com")) == ["José Antônio Conceição"]
+    assert service.search_clients("000.000.000-00") == []
+    assert service.get_client_by_cpf("123.456.789-00").numero_cliente == "CLI001"
@@ -0,0 +1,62 @@
+import asyncio
+from datetime import date
+
+import pytest
+
+from email_classifier_llm import database
+from email_classifier_llm.models.client import Base, Client
+from email_classifier_llm.services.client_search import create_search_index
+from email_classifier_llm.services.client_service import AsyncClientService
+
+pytest.importorskip("aiosqlite")
+
+
+def _client(index: int, nome: str) -> Client:
+    return Client(
+        nome_completo=nome,
+        cpf=f"000.000.000-{index:02d}",
+        data_nascimento=date(1990, 1, index),
+        numero_cliente=f"CLI{index:03d}",
+        email=f"cliente{index}@example.com",
+        perfil_investidor="Moderado",
+    )
+
+
+def test_async_url_maps_sync_drivers():
+    assert database.async_database_url("postgresql://u:p@db:5432/app") == "postgresql+asyncpg://u:p@db:5432/app"
+    assert database.async_database_url("postgresql+psycopg2://u@db/app") == "postgresql+asyncpg://u@db/app"
+    assert database.async_database_url("mysql+pymysql://u@db/app") == "mysql+aiomysql://u@db/app"
+    assert database.async_database_url("sqlite:///./app.db") == "sqlite+aiosqlite:///./app.db"
+
+
+def test_async_service_queries_through_pooled_engine(tmp_path, settings_env):
+    settings_env(ENABLE_DB="true", DATABASE_URL=f"sqlite:///{tmp_path / 'clients.db'}", DB_POOL_SIZE=3)
+
+    async def scenario():
+        engine = database.get_async_engine()
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+            await conn.run_sync(create_search_index)
+        async with database.get_sessionmaker()() as session:
+            session.add_all([_client(1, "Maria Souza"), _client(2, "João Lima")])
+            await session.commit()
+
+        async def search(term):
+            async for session in database.get_db():
+                return await AsyncClientService(session).search_clients(term)
+
+        found = await asyncio.gather(*(search("souza") for _ in range(10)))
+        async with database.get_sessionmaker()() as session:
+            service = AsyncClientService(session)
+            by_number = await service.get_client_by_number("CLI002")
+            by_id = await service.get_client_by_id(by_number.id)
+            listed = await service.get_all_clients(limit=1)
+        pool_size = engine.pool.size()
+        await database.close_db()
+        return found, by_id, listed, pool_size
+
+    found, by_id, listed, pool_size = asyncio.run(scenario())
+    assert all([c.nome_completo for c in result] == ["Maria Souza"] for result in found)
+    assert by_id.nome_completo == "João Lima"
+    assert len(listed) == 1
+    assert pool_size == 3
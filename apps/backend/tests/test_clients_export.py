@@ -0,0 +1,59 @@
+import asyncio
+import json
+from datetime import date
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, insert
+
+from email_classifier_llm import database
+from email_classifier_llm.models.client import Base, Client
+from email_classifier_llm.routers.clients import router
+
+pytest.importorskip("aiosqlite")
+
+ROWS = 25
+
+
+@pytest.fixture
+def api(tmp_path, settings_env):
+    url = f"sqlite:///{tmp_path / 'clients.db'}"
+    settings_env(ENABLE_DB="true", DATABASE_URL=url, CLIENT_EXPORT_CHUNK_SIZE=4)
+    engine = create_engine(url)
+    Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(insert(Client), [
+            {"nome_completo": f"Cliente {i}", "cpf": f"{i:011d}", "numero_cliente": f"CLI{i:03d}",
+             "email": f"c{i}@example.com", "data_nascimento": date(1980, 1, 1), "perfil_investidor": "Moderado",
+             "plano_contratual_em_dia": True}
+            for i in range(ROWS)
+        ])
+    engine.dispose()
+
+    app = FastAPI()
+    app.include_router(router, prefix="/api")
+    yield TestClient(app)
+    asyncio.run(database.close_db())
+
+
+def test_keyset_pagination_walks_the_whole_table(api):
+    seen, cursor, pages = [], None, 0
+    while True:
+        params = {"limit": 10, **({"after": cursor} if cursor is not None else {})}
+        body = api.get("/api/clients", params=params).json()
+        seen += [client["id"] for client in body["clients"]]
+        pages += 1
+        cursor = body["next_cursor"]
+        if cursor is None:
+            break
+    assert seen == sorted(seen) and len(seen) == ROWS == len(set(seen))
+    assert pages == 3
+
+
+def test_export_streams_every_row_as_ndjson(api):
+    with api.stream("GET", "/api/clients/export") as resp:
+        assert resp.headers["content-type"].startswith("application/x-ndjson")
+        chunks = list(resp.iter_bytes())
+    lines = b"".join(chunks).decode().splitlines()
+    assert [json.loads(line)["numero_cliente"] for line in lines] == [f"CLI{i:03d}" for i in range(ROWS)]
@@ -0,0 +1,96 @@
+import asyncio
+import time
+from concurrent.futures import Executor, Future
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+
+from benchmarks.pdf_fixtures import make_text_pdf
+from email_classifier_llm.services import extraction_pool
+from email_classifier_llm.services.extraction_pool import ExtractionPool
+
+
+def _pool(**overrides):
+    options = dict(kind="thread", max_workers=2, timeout_seconds=5, max_pages=None, max_bytes=1024 * 1024,
+                   inline_max_bytes=0)
+    return ExtractionPool(**{**options, **overrides})
+
+
+class BrokenExecutor(Executor):
+    """Simula um pool de processos cujo worker morreu."""
+
+    def __init__(self):
+        self.submitted = 0
+        self.shutdowns = []
+
+    def submit(self, fn, *args, **kwargs):
+        self.submitted += 1
+        future = Future()
+        future.set_exception(BrokenProcessPool("worker morto"))
+        return future
+
+    def shutdown(self, wait=True, *, cancel_futures=False):
+        self.shutdowns.append((wait, cancel_futures))
+
+
+class ForbiddenExecutor(Executor):
+    def submit(self, fn, *args, **kwargs):
+        raise AssertionError("não deveria sair do event loop")
+
+
+def test_slow_extraction_times_out(monkeypatch):
+    def slow_extract(**kwargs):
+        time.sleep(0.5)
+        return "tarde demais"
+
+    monkeypatch.setattr(extraction_pool, "extract_text_from_file", slow_extract)
+    pool = _pool(timeout_seconds=0.05)
+    try:
+        with pytest.raises(TimeoutError, match="0.05s"):
+            asyncio.run(pool.extract(filename="email.txt", content=b"texto"))
+    finally:
+        pool.shutdown()
+
+
+def test_size_and_page_limits():
+    pool = _pool(max_bytes=100, max_pages=1)
+    try:
+        with pytest.raises(ValueError, match="100 bytes"):
+            asyncio.run(pool.extract(filename="email.txt", content=b"x" * 101))
+
+        pool.max_bytes = 1024 * 1024
+        text = asyncio.run(pool.extract(filename="relatorio.pdf", content=make_text_pdf(3, lines_per_page=2)))
+    finally:
+        pool.shutdown()
+    assert "p0 l1" in text and "p1" not in text  # páginas além de max_pages não são lidas
+
+
+def test_small_text_is_decoded_inline_and_pdf_goes_to_the_pool(tmp_path):
+    pool = _pool(inline_max_bytes=64)
+    pool._executor = ForbiddenExecutor()
+    assert asyncio.run(pool.extract(filename="email.txt", content="Olá".encode())) == "Olá"
+
+    path = tmp_path / "email.txt"
+    path.write_bytes(b"a" * 65)  # acima do limite inline: vai para o pool
+    with pytest.raises(AssertionError, match="event loop"):
+        asyncio.run(pool.extract(filename="email.txt", path=str(path)))
+
+
+def test_broken_process_pool_falls_back_to_threads_once():
+    pool = _pool()
+    pool.shutdown()
+    broken = pool._executor = BrokenExecutor()
+    pool.kind = "process"
+    pdf = make_text_pdf(1, lines_per_page=1)
+
+    async def scenario():
+        return await asyncio.gather(*(pool.extract(filename="relatorio.pdf", content=pdf) for _ in range(3)))
+
+    try:
+        texts = asyncio.run(scenario())
+        replacement = pool._executor
+    finally:
+        pool.shutdown()
+    assert all("p0 l0" in text for text in texts)
+    assert broken.submitted == 3 and broken.shutdowns == [(False, True)]  # encerrado uma vez, sem esperar
+    assert pool.kind == "thread" and not isinstance(replacement, BrokenExecutor)
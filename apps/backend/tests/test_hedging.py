@@ -0,0 +1,91 @@
+import asyncio
+
+import pytest
+
+from email_classifier_llm.services import pipeline
+from email_classifier_llm.services.hedging import HedgeBudget, Hedger, LatencySketch
+from email_classifier_llm.services.llm_client import LLMClient
+
+
+def test_sketch_quantiles_and_window():
+    sketch = LatencySketch(window=1000)
+    for ms in range(1, 1001):
+        sketch.add(ms / 1000)
+    assert sketch.quantile(0.5) == pytest.approx(0.5, rel=0.02)
+    assert sketch.quantile(0.99) == pytest.approx(0.99, rel=0.02)
+
+    # Duas gerações depois, as latências antigas saem do sketch
+    for _ in range(2000):
+        sketch.add(0.01)
+    assert sketch.quantile(0.99) == pytest.approx(0.01, rel=0.02)
+
+
+def _hedger(credit=1.0):
+    sketch = LatencySketch()
+    for _ in range(20):
+        sketch.add(0.01)
+    budget = HedgeBudget(ratio=0.0, burst=10)
+    budget.credit = credit
+    return Hedger(sketch=sketch, budget=budget, percentile=0.95, min_samples=10, min_delay=0.02)
+
+
+def test_slow_primary_is_hedged_and_cancelled():
+    hedger = _hedger()
+    calls, cancelled = [], []
+
+    async def call():
+        calls.append(len(calls))
+        try:
+            await asyncio.sleep(5 if len(calls) == 1 else 0.01)
+        except asyncio.CancelledError:
+            cancelled.append(True)
+            raise
+        return len(calls)
+
+    assert asyncio.run(hedger.run(call)) == 2
+    assert cancelled == [True]
+    assert hedger.counters == {"calls": 1, "hedged": 1, "hedge_wins": 1, "denied_by_budget": 0}
+
+
+def test_budget_bounds_extra_calls():
+    budget = HedgeBudget(ratio=0.05, burst=10)
+    for _ in range(19):
+        budget.earn()
+    assert not budget.try_spend()
+    budget.earn()
+    assert budget.try_spend() and not budget.try_spend()
+
+    hedger = _hedger(credit=0)
+    calls = []
+
+    async def call():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return "ok"
+
+    assert asyncio.run(hedger.run(call)) == "ok"
+    assert len(calls) == 1 and hedger.counters["denied_by_budget"] == 1
+
+
+class StuckClient(LLMClient):
+    async def classify(self, text):
+        await asyncio.sleep(5)
+
+    async def classify_stream(self, text):
+        yield '{"category": "Produtivo", "reason": "'
+        await asyncio.sleep(5)
+
+
+def test_hard_timeout_per_classification(settings_env, monkeypatch):
+    settings_env(LLM_CLASSIFICATION_TIMEOUT_SECONDS=0.05, CLASSIFICATION_CACHE_ENABLED="false", ENABLE_DB="false")
+    monkeypatch.setattr(pipeline, "get_llm_client", lambda: StuckClient())
+
+    outcome = asyncio.run(pipeline.classify_text("Preciso do extrato"))
+    assert outcome.status_code == 503
+    assert "excedeu" in outcome.result["reason"]
+
+    async def stream():
+        return [event async for event in pipeline.classify_text_stream("Preciso do extrato")]
+
+    events = asyncio.run(stream())
+    assert events[-1][0] == "error" and "excedeu" in events[-1][1]["reason"]
@@ -0,0 +1,128 @@
+import asyncio
+import json
+import sqlite3
+from email.message import EmailMessage
+
+import pytest
+
+from email_classifier_llm.services import pipeline
+from email_classifier_llm.services.ingest import ingest, iter_sources
+from email_classifier_llm.services.llm_client import LLMClient
+from email_classifier_llm.services.rate_limiter import LLMUnavailable
+
+
+class RecordingClient(LLMClient):
+    def __init__(self):
+        self.seen = []
+
+    async def classify(self, text):
+        self.seen.append(text)
+        await asyncio.sleep(0.01 if "primeira" in text else 0)  # termina fora de ordem
+        return {"category": "Produtivo", "reason": text[:40], "suggested_reply": "ok"}
+
+
+class FlakyClient(RecordingClient):
+    def __init__(self, failing):
+        super().__init__()
+        self.failing = failing
+
+    async def classify(self, text):
+        if self.failing in text:
+            self.seen.append(text)
+            raise LLMUnavailable("cota esgotada")
+        return await super().classify(text)
+
+
+def _eml(subject, body, attachment=None):
+    msg = EmailMessage()
+    msg["Subject"] = subject
+    msg["From"] = "cliente@example.com"
+    msg.set_content(body)
+    if attachment:
+        msg.add_attachment(attachment.encode(), maintype="text", subtype="plain", filename="anexo.txt")
+    return msg.as_bytes()
+
+
+@pytest.fixture
+def sources(tmp_path):
+    mbox = tmp_path / "arquivo.mbox"
+    mbox.write_bytes(b"".join(
+        b"From cliente@example.com Mon Jan  1 00:00:00 2024\n" + _eml(subject, body) + b"\n"
+        for subject, body in [("Extrato", "primeira mensagem\n>From de citação"), ("Senha", "segunda mensagem")]
+    ))
+    emails = tmp_path / "emails"
+    emails.mkdir()
+    (emails / "a.eml").write_bytes(_eml("Boleto", "terceira mensagem", attachment="segue o boleto"))
+    (emails / "ignorado.txt").write_text("não é eml")
+    export = tmp_path / "export.jsonl"
+    export.write_text(json.dumps({"id": 1, "body": "quarta mensagem"}) + "\n\n" + json.dumps({"text": "quinta"}) + "\n")
+    return [str(mbox), str(emails), str(export)]
+
+
+@pytest.fixture
+def client(settings_env, monkeypatch):
+    settings_env(EXTRACTION_POOL="inline", CLASSIFICATION_CACHE_ENABLED="false", ENABLE_DB="false")
+    recording = RecordingClient()
+    monkeypatch.setattr(pipeline, "get_llm_client", lambda: recording)
+    return recording
+
+
+def test_sources_are_streamed_with_stable_keys(sources):
+    messages = list(iter_sources(sources))
+    assert [m.key.rsplit("/", 1)[-1] for m in messages] == [
+        "arquivo.mbox#0", "arquivo.mbox#1", "a.eml", "export.jsonl:1", "export.jsonl:3"
+    ]
+    assert b"\nFrom de cita" in messages[0].content
+
+
+def test_jsonl_output_in_order_and_resumes_without_reprocessing(tmp_path, sources, client):
+    out = tmp_path / "results.jsonl"
+    summary = asyncio.run(ingest(sources, str(out), concurrency=3))
+    assert summary == {"skipped": 0, "written": 5, "failed": 0}
+    records = [json.loads(line) for line in out.read_text().splitlines()]
+    assert [r["seq"] for r in records] == [0, 1, 2, 3, 4]
+    assert records[0]["result"]["reason"].startswith("Assunto: Extrato primeira mensagem")
+    assert any("segue o boleto" in text for text in client.seen)
+
+    # Interrompido depois de 2 registros, com uma linha pela metade
+    lines = out.read_text().splitlines(keepends=True)
+    out.write_text("".join(lines[:2]) + lines[2][:10])
+    client.seen.clear()
+    summary = asyncio.run(ingest(sources, str(out), concurrency=3))
+    assert summary == {"skipped": 2, "written": 3, "failed": 0}
+    assert len(client.seen) == 3
+    assert [json.loads(line)["seq"] for line in out.read_text().splitlines()] == [0, 1, 2, 3, 4]
+
+
+def test_sqlite_output_and_mismatched_checkpoint(tmp_path, sources, client):
+    out = tmp_path / "results.db"
+    asyncio.run(ingest(sources[:2], str(out), concurrency=2))
+    asyncio.run(ingest(sources, str(out), concurrency=2))
+    with sqlite3.connect(out) as conn:
+        rows = conn.execute("SELECT seq, status, category FROM classifications ORDER BY seq").fetchall()
+    assert rows == [(i, 200, "Produtivo") for i in range(5)]
+    assert len(client.seen) == 5
+
+    with pytest.raises(RuntimeError, match="Checkpoint"):
+        asyncio.run(ingest(sources[2:], str(out), concurrency=2))
+
+
+def test_retryable_failure_is_not_checkpointed(tmp_path, sources, client, monkeypatch):
+    out = tmp_path / "results.jsonl"
+    flaky = FlakyClient("terceira mensagem")
+    monkeypatch.setattr(pipeline, "get_llm_client", lambda: flaky)
+    summary = asyncio.run(ingest(sources, str(out), concurrency=3))
+    assert summary["written"] == 2
+    assert summary["stopped"]["seq"] == 2
+    assert summary["stopped"]["status"] == 503
+    assert summary["stopped"]["key"].endswith("a.eml")
+    assert [json.loads(line)["seq"] for line in out.read_text().splitlines()] == [0, 1]
+
+    # Com o LLM de volta, a nova execução retoma a partir da mensagem que falhou
+    monkeypatch.setattr(pipeline, "get_llm_client", lambda: client)
+    summary = asyncio.run(ingest(sources, str(out), concurrency=3))
+    assert summary == {"skipped": 2, "written": 3, "failed": 0}
+    records = [json.loads(line) for line in out.read_text().splitlines()]
+    assert [r["seq"] for r in records] == [0, 1, 2, 3, 4]
+    assert all(r["status"] == 200 for r in records)
+    assert len(client.seen) == 3
@@ -0,0 +1,88 @@
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from email_classifier_llm.main import app
+from email_classifier_llm.services import pipeline
+from email_classifier_llm.services.job_queue import DONE, FAILED, QUEUED, SQLiteJobQueue
+from email_classifier_llm.services.llm_client import LLMClient
+
+
+@pytest.fixture
+def queue(tmp_path):
+    q = SQLiteJobQueue(str(tmp_path / "jobs.db"), visibility_timeout=60, max_attempts=2, retry_backoff=0)
+    yield q
+    q.close()
+
+
+def test_claims_by_priority_then_arrival(queue):
+    low = queue.enqueue({"text": "a"})
+    high = queue.enqueue({"text": "b"}, priority=5)
+    later = queue.enqueue({"text": "c"})
+    assert [queue.claim().id for _ in range(3)] == [high, low, later]
+    assert queue.claim() is None
+
+
+def test_bounded_retries_end_in_dead_letter(queue):
+    job_id = queue.enqueue({"text": "a"})
+    first = queue.claim()
+    assert queue.fail(first, "timeout") == QUEUED
+    second = queue.claim()
+    assert second.attempt == 2
+    assert queue.fail(second, "timeout", result={"reason": "erro"}, status_code=500) == FAILED
+    assert queue.claim() is None
+    job = queue.get(job_id)
+    assert (job["status"], job["attempts"], job["status_code"]) == (FAILED, 2, 500)
+    assert [dead["id"] for dead in queue.dead_letters()] == [job_id]
+
+
+def test_expired_lease_is_redelivered_and_stale_worker_loses_it(tmp_path):
+    queue = SQLiteJobQueue(str(tmp_path / "jobs.db"), visibility_timeout=0.05, max_attempts=2, retry_backoff=0)
+    job_id = queue.enqueue({"text": "a"})
+    crashed = queue.claim()
+    time.sleep(0.1)
+    retry = queue.claim()
+    assert (retry.id, retry.attempt) == (job_id, 2)
+    assert not queue.complete(crashed, {"category": "Produtivo"}, 200)
+    assert not queue.heartbeat(crashed)
+
+    time.sleep(0.1)
+    assert queue.claim() is None  # tentativas esgotadas: dead letter
+    assert queue.get(job_id)["status"] == FAILED
+    assert queue.stats()["dead_letter"] == 1
+    queue.close()
+
+
+class EchoClient(LLMClient):
+    async def classify(self, text):
+        return {"category": "Produtivo", "reason": text, "suggested_reply": "ok"}
+
+
+def _wait(client, job_id):
+    for _ in range(200):
+        job = client.get(f"/api/jobs/{job_id}").json()
+        if job["status"] in (DONE, FAILED):
+            return job
+        time.sleep(0.02)
+    raise AssertionError(job)
+
+
+def test_jobs_api_returns_classify_result(tmp_path, settings_env, monkeypatch):
+    settings_env(JOBS_ENABLED="true", JOBS_DB_PATH=tmp_path / "jobs.db", JOBS_POLL_INTERVAL_SECONDS=0.05, EXTRACTION_POOL="inline",
+                 CLASSIFICATION_CACHE_ENABLED="false")
+    monkeypatch.setattr(pipeline, "get_llm_client", lambda: EchoClient())
+
+    with TestClient(app) as client:
+        resp = client.post("/api/jobs/classify", data={"text": "Preciso do extrato", "priority": "3"})
+        assert resp.status_code == 202
+        job = _wait(client, resp.json()["id"])
+        assert job["status"] == DONE and job["status_code"] == 200
+        assert job["result"]["reason"] == "Preciso do extrato"
+
+        resp = client.post("/api/jobs/classify", files={"file": ("email.txt", b"Segue anexo", "text/plain")})
+        assert _wait(client, resp.json()["id"])["result"]["reason"] == "Segue anexo"
+        assert not any((tmp_path / "jobs.db.files").iterdir())
+
+        assert client.get("/api/jobs/inexistente").status_code == 404
+        assert client.get("/api/jobs").json()["done"] == 2
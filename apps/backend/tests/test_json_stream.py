@@ -0,0 +1,104 @@
+import json
+
+from fastapi.testclient import TestClient
+
+from email_classifier_llm.main import app
+from email_classifier_llm.services import pipeline
+from email_classifier_llm.services.json_stream import IncrementalJSONObjectParser
+from email_classifier_llm.services.llm_client import LLMClient
+
+RESPONSE = (
+    'Claro! ```json\n{"category": "Produtivo", "score": 0.9, "tags": ["a", "}"], '
+    '"reason": "Pede \\"status\\" do chamado",\n'
+    '"suggested_reply": "Ol\\u00e1! Seguimos\\nverificando."}\n```'
+)
+
+
+def test_parser_matches_json_loads_in_any_chunking():
+    expected = json.loads(RESPONSE[RESPONSE.index("{"):RESPONSE.rindex("}") + 1])
+    for size in (1, 2, 3, 7, len(RESPONSE)):
+        parser = IncrementalJSONObjectParser()
+        deltas = []
+        for start in range(0, len(RESPONSE), size):
+            for kind, key, value in parser.feed(RESPONSE[start:start + size]):
+                if kind == "delta" and key == "suggested_reply":
+                    deltas.append(value)
+        assert parser.values == expected
+        assert "".join(deltas) == expected["suggested_reply"]
+        assert parser.done
+
+
+def test_parser_reports_fields_before_the_object_closes():
+    parser = IncrementalJSONObjectParser()
+    events = parser.feed('{"category": "Produtivo", "reason": "x", "suggested_reply": "Bom')
+    assert ("complete", "category", "Produtivo") in events
+    assert ("complete", "reason", "x") in events
+    assert events[-1] == ("delta", "suggested_reply", "Bom")
+    assert not parser.done
+
+
+class StreamingClient(LLMClient):
+    async def classify(self, text):
+        raise AssertionError("não deve ser chamado")
+
+    async def classify_stream(self, text):
+        for start in range(0, len(RESPONSE), 5):
+            yield RESPONSE[start:start + 5]
+
+
+def _events(body: str):
+    for block in body.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.splitlines())
+        yield lines["event"], json.loads(lines["data"])
+
+
+def test_stream_endpoint_sends_classification_then_reply_deltas(monkeypatch):
+    monkeypatch.setattr(pipeline, "get_llm_client", lambda: StreamingClient())
+    resp = TestClient(app).post("/api/classify/stream", data={"text": "status do chamado?", "no_cache": "true"})
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("text/event-stream")
+
+    events = list(_events(resp.text))
+    names = [name for name, _ in events]
+    assert names[0] == "classification" and names[-1] == "done"
+    assert events[0][1] == {"category": "Produtivo", "reason": 'Pede "status" do chamado'}
+    replies = [data["delta"] for name, data in events if name == "reply"]
+    assert len(replies) > 1
+    assert "".join(replies) == "Olá! Seguimos\nverificando."
+    assert events[-1][1]["suggested_reply"] == "Olá! Seguimos\nverificando."
+    assert events[-1][1]["source"] == "llm"
+
+
+EMOJI_RESPONSE = (
+    '{"category": "Improdutivo", "reason": "Felicita\\u00e7\\u00f5es \\ud83c\\udf89", '
+    '"suggested_reply": "Obrigado! \\ud83d\\ude00 Sem par: \\ud83d."}'
+)
+
+
+def test_parser_joins_escaped_surrogate_pairs():
+    for size in (1, 2, 5, len(EMOJI_RESPONSE)):
+        parser = IncrementalJSONObjectParser()
+        deltas = []
+        for start in range(0, len(EMOJI_RESPONSE), size):
+            for kind, key, value in parser.feed(EMOJI_RESPONSE[start:start + size]):
+                if kind == "delta" and key == "suggested_reply":
+                    deltas.append(value)
+        assert parser.values["reason"] == "Felicitações 🎉"
+        assert parser.values["suggested_reply"] == "Obrigado! 😀 Sem par: �."
+        assert "".join(deltas) == parser.values["suggested_reply"]
+
+
+class EmojiStreamingClient(StreamingClient):
+    async def classify_stream(self, text):
+        for start in range(0, len(EMOJI_RESPONSE), 3):
+            yield EMOJI_RESPONSE[start:start + 3]
+
+
+def test_stream_endpoint_handles_escaped_emoji(monkeypatch):
+    monkeypatch.setattr(pipeline, "get_llm_client", lambda: EmojiStreamingClient())
+    resp = TestClient(app).post("/api/classify/stream", data={"text": "Parabéns!", "no_cache": "true"})
+
+    events = list(_events(resp.text))
+    assert events[0] == ("classification", {"category": "Improdutivo", "reason": "Felicitações 🎉"})
+    assert events[-1][0] == "done"
+    assert events[-1][1]["suggested_reply"] == "Obrigado! 😀 Sem par: �."
@@ -0,0 +1,19 @@
+import asyncio
+
+from email_classifier_llm.services import llm_client
+
+
+def test_registry_shares_one_client_per_provider(settings_env):
+    settings_env(GEMINI_API_KEY="test-key", PROMPT_VERSION="v1")
+
+    async def scenario():
+        await llm_client.init_llm_clients()
+        first = llm_client.get_llm_client()
+        second = llm_client.get_llm_client("google")
+        await llm_client.close_llm_clients()
+        return first, second
+
+    first, second = asyncio.run(scenario())
+    assert first is second
+    assert first.prompt_template is llm_client.load_prompt("v1")
+    assert llm_client._clients == {}
@@ -0,0 +1,116 @@
+import asyncio
+import random
+
+import pytest
+
+from benchmarks.fake_gemini import FakeGeminiServer
+from email_classifier_llm.services import llm_client, rate_limiter
+from email_classifier_llm.services.llm_client import LLMClient
+from email_classifier_llm.services.llm_router import LLMRouter, current_router
+from email_classifier_llm.services.rate_limiter import LLMUnavailable
+
+
+class StubClient(LLMClient):
+    def __init__(self, name, delay=0.0, fail=False):
+        self.name = name
+        self.delay = delay
+        self.fail = fail
+        self.calls = 0
+
+    async def classify(self, text):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError(f"{self.name} fora do ar")
+        return {"category": "Produtivo", "reason": self.name, "suggested_reply": "ok"}
+
+
+def _router(clients, **overrides):
+    options = dict(alpha=0.5, max_error_rate=0.5, cooldown=60, attempt_timeout=1, deadline_seconds=2,
+                   rng=random.Random(0))
+    return LLMRouter({client.name: client for client in clients}, **{**options, **overrides})
+
+
+def test_http_clients_against_stub_server(settings_env):
+    with FakeGeminiServer() as server:
+        settings_env(OPENAI_API_KEY="k", OPENAI_BASE_URL=f"{server.base_url}/v1", ANTHROPIC_API_KEY="k",
+                     ANTHROPIC_BASE_URL=server.base_url, OLLAMA_BASE_URL=server.base_url)
+
+        async def scenario():
+            results = []
+            for client_class in (llm_client.OpenAIClient, llm_client.AnthropicClient, llm_client.OllamaClient):
+                client = client_class()
+                try:
+                    results.append(await client.classify("Preciso da segunda via do boleto"))
+                finally:
+                    await client.aclose()
+            return results
+
+        results = asyncio.run(scenario())
+    assert [result["category"] for result in results] == ["Produtivo"] * 3
+    assert server.requests == 3
+
+
+def test_fails_over_and_ejects_unhealthy_provider():
+    down, backup = StubClient("down", fail=True), StubClient("backup")
+    router = _router([down, backup])
+
+    async def scenario():
+        return [await router.classify("texto") for _ in range(5)]
+
+    results = asyncio.run(scenario())
+    assert [result["reason"] for result in results] == ["backup"] * 5
+    assert down.calls == 1  # fora da rotação após a primeira falha (alpha=0.5)
+    stats = router.stats()
+    assert stats["failovers"] == 1 and not stats["providers"]["down"]["available"]
+
+
+def test_prefers_lower_latency_provider():
+    slow, fast = StubClient("slow", delay=0.05), StubClient("fast")
+    router = _router([slow, fast])
+
+    async def scenario():
+        for _ in range(20):
+            await router.classify("texto")
+
+    asyncio.run(scenario())
+    assert slow.calls == 1 and fast.calls == 19
+    assert router.stats()["order"] == ["fast", "slow"]
+
+
+def test_weighted_split_and_shared_deadline():
+    cheap, premium = StubClient("cheap"), StubClient("premium")
+    router = _router([cheap, premium], weights={"cheap": 3, "premium": 1})
+
+    async def split():
+        for _ in range(400):
+            await router.classify("texto")
+
+    asyncio.run(split())
+    assert 0.68 < cheap.calls / 400 < 0.82
+
+    hung = [StubClient("a", delay=5), StubClient("b", delay=5)]
+    with pytest.raises(LLMUnavailable, match="Prazo"):
+        asyncio.run(_router(hung, attempt_timeout=0.1, deadline_seconds=0.15).classify("texto"))
+
+
+def test_router_provider_routes_gemini_outage_to_openai(settings_env):
+    with FakeGeminiServer(throttle=100) as gemini, FakeGeminiServer() as openai:
+        settings_env(LLM_PROVIDER="router", LLM_ROUTER_PROVIDERS="google,openai,anthropic", GEMINI_API_KEY="k",
+                     GEMINI_BASE_URL=gemini.base_url, OPENAI_API_KEY="k", OPENAI_BASE_URL=openai.base_url,
+                     ANTHROPIC_API_KEY="", LLM_RATE_LIMIT_ENABLED="false")
+        rate_limiter.get_rate_limiter.cache_clear()
+
+        async def scenario():
+            await llm_client.init_llm_clients()
+            try:
+                results = [await llm_client.get_llm_client().classify("Segue o extrato") for _ in range(4)]
+                return results, current_router().stats()
+            finally:
+                await llm_client.close_llm_clients()
+
+        results, stats = asyncio.run(scenario())
+    rate_limiter.get_rate_limiter.cache_clear()
+    assert all(result["category"] == "Produtivo" for result in results)
+    assert list(stats["providers"]) == ["google", "openai"]  # anthropic sem chave fica de fora
+    assert stats["providers"]["google"]["failures"] >= 1 and openai.requests == 4
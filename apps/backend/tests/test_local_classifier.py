@@ -0,0 +1,107 @@
+import json
+
+import pytest
+
+from email_classifier_llm.services import local_classifier
+from email_classifier_llm.services.local_classifier import LocalClassifier, evaluate, extract_features
+
+SAMPLES = [
+    ("Muito obrigado pelo retorno, ótimo fim de semana!", "Improdutivo"),
+    ("Feliz Natal e próspero Ano Novo a toda a equipe", "Improdutivo"),
+    ("Obrigado! Abraços a todos", "Improdutivo"),
+    ("Resposta automática: estou fora do escritório", "Improdutivo"),
+    ("Solicito o resgate do CDB e o prazo de liquidação", "Produtivo"),
+    ("Não consigo acessar o portal, erro de senha inválida", "Produtivo"),
+    ("Poderiam enviar o relatório de risco da carteira?", "Produtivo"),
+    ("Qual o saldo atual da minha carteira de investimentos?", "Produtivo"),
+] * 5
+
+
+def test_answers_locally_only_when_confident(tmp_path):
+    model = LocalClassifier.train(SAMPLES)
+    path = tmp_path / "model.json"
+    model.save(path)
+    model = LocalClassifier.load(path)
+
+    result = model.answer("Obrigado e feliz Natal!", threshold=0.9, categories=["Improdutivo"])
+    assert result is not None and result["category"] == "Improdutivo"
+
+    # Produtivo nunca é respondido localmente com a configuração padrão
+    assert model.answer("Solicito o relatório de risco da carteira", threshold=0.9, categories=["Improdutivo"]) is None
+    assert model.stats()["answered_locally"] == 1
+    assert model.stats()["deferred_to_llm"] == 1
+
+
+class FixedClassifier(LocalClassifier):
+    """Predições fixas por texto, para conferir as contas de `evaluate`."""
+
+    def __init__(self, predictions):
+        super().__init__(classes=["Improdutivo", "Produtivo"], log_prior={}, log_unseen={}, weights={})
+        self.predictions = predictions
+
+    def predict(self, text):
+        return self.predictions[text]
+
+
+def test_save_and_load_round_trip(tmp_path):
+    model = LocalClassifier.train(SAMPLES, alpha=0.5, bits=12)
+    path = tmp_path / "model.json"
+    model.save(path)
+    loaded = LocalClassifier.load(path)
+
+    assert loaded.classes == model.classes and loaded.bits == 12 and loaded.max_tokens == model.max_tokens
+    assert loaded.log_prior == model.log_prior and loaded.log_unseen == model.log_unseen
+    assert loaded.weights == model.weights  # chaves voltam a ser int
+    for text in ("Obrigado, bom feriado", "Solicito o extrato da carteira", "texto sem relação"):
+        assert loaded.predict(text) == model.predict(text)
+
+
+def test_evaluate_counts_saved_calls_and_agreement():
+    model = FixedClassifier({
+        "obrigado": ("Improdutivo", 0.99),   # local e correto
+        "feliz natal": ("Improdutivo", 0.98),  # local, mas o LLM disse Produtivo
+        "bom dia": ("Improdutivo", 0.6),     # abaixo do limiar
+        "resgate": ("Produtivo", 0.99),      # categoria não respondida localmente
+    })
+    samples = [("obrigado", "Improdutivo"), ("feliz natal", "Produtivo"),
+               ("bom dia", "Improdutivo"), ("resgate", "Produtivo")]
+
+    assert evaluate(model, samples, threshold=0.95, categories=["Improdutivo"]) == {
+        "samples": 4,
+        "accuracy": 0.75,
+        "llm_calls_saved": 2,
+        "llm_calls_saved_ratio": 0.5,
+        "agreement_when_local": 0.5,
+    }
+    assert evaluate(model, samples, threshold=0.999, categories=["Improdutivo"])["agreement_when_local"] is None
+    assert evaluate(model, [], threshold=0.9, categories=["Improdutivo"])["accuracy"] == 0.0
+
+
+def test_long_emails_are_scored_on_the_first_tokens():
+    model = LocalClassifier.train(SAMPLES, max_tokens=8)
+    head = "Muito obrigado pelo retorno, ótimo fim de semana!"
+    assert len(extract_features(head + " resgate" * 10_000, max_tokens=8)) == 8 + 7
+    assert model.predict(head + " resgate do CDB" * 10_000) == model.predict(head)
+
+
+def test_training_requires_two_categories():
+    with pytest.raises(ValueError, match="duas categorias"):
+        LocalClassifier.train([(text, "Produtivo") for text, _ in SAMPLES])
+
+
+def test_cli_trains_with_holdout_and_reports(tmp_path, settings_env, capsys):
+    settings_env(LOCAL_CLASSIFIER_CATEGORIES="Improdutivo")
+    log = tmp_path / "results.jsonl"
+    log.write_text("".join(json.dumps({"text": text, "category": category}) + "\n" for text, category in SAMPLES))
+    out = tmp_path / "model.json"
+
+    local_classifier.main(["train", "--log", str(log), "--out", str(out), "--holdout", "0.25", "--threshold", "0.5"])
+    printed = capsys.readouterr().out
+    assert "(30 exemplos de treino)" in printed
+    holdout = json.loads(printed[printed.index("{"):])
+    assert holdout["samples"] == 10 and holdout["llm_calls_saved"] > 0
+
+    local_classifier.main(["report", "--log", str(log), "--model", str(out), "--threshold", "1.01"])
+    report = json.loads(capsys.readouterr().out)
+    assert report["samples"] == 40
+    assert report["llm_calls_saved"] == 0 and report["agreement_when_local"] is None
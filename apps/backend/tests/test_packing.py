@@ -0,0 +1,54 @@
+import asyncio
+import json
+import re
+
+from email_classifier_llm.services.llm_client import GoogleClient
+
+
+def _ids(prompt):
+    return re.findall(r'"id": "(\d+)"', prompt)
+
+
+def test_packed_call_retries_only_missing_items(settings_env):
+    settings_env(GEMINI_API_KEY="test-key", LLM_PACK_MAX_ITEMS=10)
+    client = GoogleClient()
+    prompts = []
+
+    async def fake_call_model(prompt, schema=None):
+        prompts.append(prompt)
+        ids = _ids(prompt)
+        if not ids:
+            return json.dumps({"category": "Produtivo", "reason": "r1", "suggested_reply": "ok"})
+        # Primeira chamada "esquece" o item 1
+        answered = [i for i in ids if not (len(prompts) == 1 and i == "1")]
+        return "Resultado:\n" + json.dumps(
+            [{"id": i, "category": "Produtivo", "reason": f"r{i}", "suggested_reply": "ok"} for i in answered]
+        )
+
+    client._call_model = fake_call_model
+    results = asyncio.run(client.classify_many(["a", "b", "c"]))
+    asyncio.run(client.aclose())
+
+    assert [r["reason"] for r in results] == ["r0", "r1", "r2"]
+    assert len(prompts) == 2
+    assert _ids(prompts[1]) == []  # item restante vai sozinho pelo prompt individual
+
+
+def test_micro_batcher_groups_concurrent_requests(settings_env):
+    settings_env(GEMINI_API_KEY="test-key", LLM_PACK_WINDOW_MS=20)
+    client = GoogleClient()
+    calls = []
+
+    async def fake_classify_many(texts):
+        calls.append(list(texts))
+        return [{"category": "Improdutivo", "reason": text, "suggested_reply": ""} for text in texts]
+
+    client.classify_many = fake_classify_many
+
+    async def scenario():
+        return await asyncio.gather(*(client.batcher.submit(t) for t in ("x", "y", "z")))
+
+    results = asyncio.run(scenario())
+    asyncio.run(client.aclose())
+    assert calls == [["x", "y", "z"]]
+    assert [r["reason"] for r in results] == ["x", "y", "z"]
@@ -0,0 +1,76 @@
+import random
+import re
+from pathlib import Path
+
+import pytest
+
+from email_classifier_llm.services.processor import _decode_text, preprocess_text
+
+CORPUS = sorted((Path(__file__).parent / "data" / "emails").glob("*.txt"))
+
+
+def legacy_preprocess_text(text: str) -> str:
+    text = text.replace("\r\n", "\n").replace("\r", "\n")
+    lines = [ln.rstrip() for ln in text.split("\n")]
+    joined = "\n".join(lines).strip()
+    joined = re.sub(r"\s+", " ", joined)
+    return joined.strip()
+
+
+def legacy_decode(content: bytes) -> str:
+    def _post(text: str) -> str:
+        return text.replace("\x00", "").strip()
+
+    for bom, encoding in ((b"\xef\xbb\xbf", "utf-8-sig"), (b"\xff\xfe", "utf-16-le"), (b"\xfe\xff", "utf-16-be")):
+        if content.startswith(bom):
+            try:
+                return _post(content.decode(encoding))
+            except Exception:
+                pass
+    for encoding in ("utf-8", "utf-16", "cp1252", "latin-1"):
+        try:
+            return _post(content.decode(encoding))
+        except Exception:
+            continue
+    return _post(content.decode("utf-8", errors="ignore"))
+
+
+def _encodings_of(text: str):
+    yield text.encode("utf-8")
+    yield text.encode("utf-8-sig")
+    yield text.encode("utf-16")
+    yield text.encode("utf-16-le")
+    yield text.encode("utf-16-be")
+    yield text.encode("cp1252", errors="replace")
+    yield text.encode("latin-1", errors="replace")
+    yield text.encode("latin-1", errors="replace") + b"\x81"
+    yield text.encode("cp1252", errors="replace") + b" "
+    yield b"\xef\xbb\xbf" + text.encode("latin-1", errors="replace")
+
+
+@pytest.mark.parametrize("path", CORPUS, ids=lambda p: p.name)
+def test_preprocess_matches_legacy_on_corpus(path):
+    text = path.read_text(encoding="utf-8")
+    assert preprocess_text(text) == legacy_preprocess_text(text)
+
+
+def test_preprocess_matches_legacy_on_random_whitespace():
+    rng = random.Random(7)
+    alphabet = [" ", "\t", "\n", "\r", "\x0b", "\x0c", "\x1c", "\x85", "\xa0", " ", "　", "​", "a", "é", "\x00"]
+    for _ in range(5000):
+        text = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 40)))
+        assert preprocess_text(text) == legacy_preprocess_text(text)
+
+
+@pytest.mark.parametrize("path", CORPUS, ids=lambda p: p.name)
+def test_decode_matches_legacy_cascade(path):
+    text = path.read_text(encoding="utf-8")
+    for content in _encodings_of(text):
+        assert _decode_text(content) == legacy_decode(content)
+
+
+def test_decode_matches_legacy_on_random_bytes():
+    rng = random.Random(11)
+    for _ in range(3000):
+        content = bytes(rng.randrange(256) for _ in range(rng.randint(0, 32)))
+        assert _decode_text(content) == legacy_decode(content)
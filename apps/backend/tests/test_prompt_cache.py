@@ -0,0 +1,110 @@
+import asyncio
+import json
+
+from benchmarks.fake_gemini import FakeGeminiServer
+from email_classifier_llm.services import llm_client, rate_limiter
+from email_classifier_llm.services.prompt_cache import prefix_key
+from email_classifier_llm.services.telemetry import LLM_TOKENS, PROMPT_CACHE_EVENTS
+
+
+def _run(server, settings_env, scenario, min_tokens=0, **overrides):
+    if min_tokens is not None:
+        overrides["PROMPT_CACHE_MIN_TOKENS"] = min_tokens
+    settings_env(GEMINI_API_KEY="test-key", GEMINI_BASE_URL=server.base_url, LLM_RATE_LIMIT_ENABLED="false",
+                 **overrides)
+    rate_limiter.get_rate_limiter.cache_clear()
+
+    async def run():
+        client = llm_client.GoogleClient()
+        try:
+            return await scenario(client)
+        finally:
+            await client.aclose()
+
+    try:
+        return asyncio.run(run())
+    finally:
+        rate_limiter.get_rate_limiter.cache_clear()
+
+
+def test_prefix_registered_once_and_requests_send_only_the_email(settings_env):
+    cached_before = LLM_TOKENS.value(provider="google", direction="cached")
+
+    async def scenario(client):
+        results = [await client.classify(f"Preciso do boleto {i}") for i in range(3)]
+        client.prompt_cache._refresh_at = 0  # perto de expirar: renova o TTL do mesmo handle
+        results.append(await client.classify("Preciso do boleto 3"))
+        return results, client.prompt_cache.name
+
+    with FakeGeminiServer() as server:
+        results, name = _run(server, settings_env, scenario)
+        body = json.loads(server.last_body)
+
+    assert all(result["category"] == "Produtivo" for result in results)
+    assert server.cache_events == {"created": 1, "refreshed": 1, "deleted": 1}  # removido no aclose
+    assert body["cachedContent"] == name and "systemInstruction" not in body
+    assert json.dumps(body["contents"], ensure_ascii=False).count("Email:") == 1
+    assert "assistente de classificação" not in json.dumps(body["contents"], ensure_ascii=False)
+    assert LLM_TOKENS.value(provider="google", direction="cached") > cached_before
+
+
+def test_shipped_prompt_is_cached_with_default_settings(settings_env, monkeypatch):
+    monkeypatch.delenv("PROMPT_VERSION", raising=False)
+    monkeypatch.delenv("PROMPT_CACHE_ENABLED", raising=False)
+    monkeypatch.delenv("PROMPT_CACHE_MIN_TOKENS", raising=False)
+
+    async def scenario(client):
+        system, user = llm_client.split_prompt(client._build_packed_prompt({"0": "Preciso do boleto"}))
+        assert system == client.system_prompt and "Preciso do boleto" in user and "Categorias" not in user
+        return await client.classify("Preciso do boleto"), client.prompt_cache.name
+
+    with FakeGeminiServer() as server:
+        result, name = _run(server, settings_env, scenario, min_tokens=None)
+        body = json.loads(server.last_body)
+
+    assert result["category"] == "Produtivo"
+    assert name is not None and body["cachedContent"] == name and "systemInstruction" not in body
+
+
+def test_falls_back_to_full_prompt_when_cache_is_unavailable(settings_env):
+    failed_before = PROMPT_CACHE_EVENTS.value(provider="google", event="failed")
+
+    async def scenario(client):
+        return await client.classify("Preciso do boleto"), client.prompt_cache.name
+
+    with FakeGeminiServer(caching=False) as server:
+        result, name = _run(server, settings_env, scenario)
+        body = json.loads(server.last_body)
+
+    assert result["category"] == "Produtivo" and name is None
+    assert "assistente de classificação" in json.dumps(body["systemInstruction"], ensure_ascii=False)
+    assert PROMPT_CACHE_EVENTS.value(provider="google", event="failed") == failed_before + 1
+
+
+def test_expired_handle_is_dropped_and_call_repeated_inline(settings_env):
+    async def scenario(client):
+        await client.classify("Preciso do boleto")
+        server.caches.clear()  # expirou no provider antes da renovação
+        return await client.classify("Preciso do boleto"), client.prompt_cache.name
+
+    with FakeGeminiServer() as server:
+        result, name = _run(server, settings_env, scenario)
+        body = json.loads(server.last_body)
+
+    assert result["category"] == "Produtivo" and name is None
+    assert server.requests == 3 and "cachedContent" not in body
+
+
+def test_prompt_edit_or_version_changes_the_prefix(settings_env):
+    assert prefix_key("v2", "instruções") != prefix_key("v2", "instruções editadas")
+    assert prefix_key("v2", "instruções") != prefix_key("v3", "instruções")
+
+    with FakeGeminiServer() as server:
+        # Versão sem instruções separadas: o prompt completo vai em cada chamada, sem cache
+        assert _run(server, settings_env, lambda client: _cache_of(client), PROMPT_VERSION="v1") is None
+    assert server.cache_events["created"] == 0
+
+
+async def _cache_of(client):
+    await client.classify("Preciso do boleto")
+    return client.prompt_cache
@@ -0,0 +1,200 @@
+import asyncio
+
+import httpx
+import pytest
+from google.genai import errors
+
+from benchmarks.fake_gemini import FakeGeminiServer
+from email_classifier_llm.services import rate_limiter
+from email_classifier_llm.services.llm_client import AnthropicClient, GoogleClient, OllamaClient, OpenAIClient
+from email_classifier_llm.services.rate_limiter import (
+    AIMDWindow,
+    DeadlineExceeded,
+    LLMRateLimiter,
+    LLMUnavailable,
+    TokenBucket,
+    retry_after_of,
+)
+
+
+def _limiter(**overrides):
+    options = dict(rpm=0, tpm=0, window=AIMDWindow(initial=4, minimum=1, maximum=8), max_attempts=3,
+                   backoff_base=0.01, backoff_max=0.05, deadline_seconds=5)
+    limiter = LLMRateLimiter(**{**options, **overrides})
+    limiter.sleeps = []
+
+    async def fake_sleep(seconds):
+        limiter.sleeps.append(seconds)
+
+    limiter._sleep = fake_sleep
+    return limiter
+
+
+def _api_error(code, retry_after=None, details=None):
+    headers = {"retry-after": retry_after} if retry_after is not None else {}
+    return errors.APIError(code, details or {"error": {"code": code}}, response=httpx.Response(code, headers=headers))
+
+
+def test_retry_after_from_header_and_gemini_retry_info():
+    assert retry_after_of(_api_error(429, "2")) == 2
+    retry_info = {"error": {"code": 429, "details": [
+        {"@type": "type.googleapis.com/google.rpc.RetryInfo", "retryDelay": "7s"}]}}
+    assert retry_after_of(_api_error(429, details=retry_info)) == 7
+    assert retry_after_of(ValueError("x")) is None
+
+
+def test_token_bucket_reports_wait_for_debt():
+    bucket = TokenBucket(60)  # 1 por segundo
+    assert bucket.reserve(60) == 0
+    assert bucket.reserve(2) == pytest.approx(2, abs=0.05)
+    assert not TokenBucket(0).enabled and TokenBucket(0).reserve(10) == 0
+
+
+def test_aimd_window_shrinks_on_throttle_and_grows_on_success():
+    window = AIMDWindow(initial=8, minimum=1, maximum=10, cooldown=0)
+
+    async def scenario():
+        await window.acquire()
+        window.release("throttled")
+        assert window.limit == 4
+        for _ in range(4):
+            await window.acquire()
+        blocked = asyncio.create_task(window.acquire())
+        await asyncio.sleep(0)
+        assert not blocked.done() and window.stats()["waiting"] == 1
+        window.release("success")
+        await blocked
+        assert window.limit == pytest.approx(4.25)
+        with pytest.raises(asyncio.TimeoutError):
+            await window.acquire(timeout=0.01)
+        assert window.in_flight == 4
+
+    asyncio.run(scenario())
+
+
+def test_retries_honour_retry_after_then_succeed():
+    limiter = _limiter()
+    failures = [_api_error(429, "0.2"), _api_error(503)]
+
+    async def call():
+        if failures:
+            raise failures.pop(0)
+        return "ok"
+
+    assert asyncio.run(limiter.call(call, tokens=10)) == "ok"
+    assert limiter.sleeps[0] >= 0.2
+    assert limiter.sleeps[1] <= 0.01 * 2
+    stats = limiter.stats()
+    assert (stats["calls"], stats["retries"], stats["throttled"]) == (3, 2, 2)
+    assert stats["concurrency"]["decreases"] == 1 and stats["concurrency"]["in_flight"] == 0
+
+
+def test_gives_up_after_max_attempts_and_on_deadline():
+    async def always_busy():
+        raise _api_error(503)
+
+    limiter = _limiter()
+    with pytest.raises(LLMUnavailable, match="3 tentativas"):
+        asyncio.run(limiter.call(always_busy, tokens=1))
+
+    async def far_retry():
+        raise _api_error(429, "60")
+
+    limiter = _limiter()
+    with pytest.raises(DeadlineExceeded):
+        asyncio.run(limiter.call(far_retry, tokens=1))
+    assert limiter.sleeps == []
+
+    async def bad_request():
+        raise _api_error(400)
+
+    with pytest.raises(errors.APIError):
+        asyncio.run(_limiter().call(bad_request, tokens=1))
+
+
+def test_tpm_budget_beyond_deadline_fails_fast():
+    limiter = _limiter(tpm=600, deadline_seconds=1)  # 10 tokens/s
+
+    async def call():
+        return "ok"
+
+    async def scenario():
+        await limiter.call(call, tokens=600)
+        await limiter.call(call, tokens=600)
+
+    with pytest.raises(DeadlineExceeded, match="RPM/TPM"):
+        asyncio.run(scenario())
+
+
+def test_window_timeout_refunds_rpm_and_tpm():
+    limiter = _limiter(rpm=60, tpm=6000, window=AIMDWindow(initial=1, minimum=1, maximum=1), deadline_seconds=0.05)
+
+    async def scenario():
+        await limiter.window.acquire()  # janela cheia: a próxima chamada não consegue vaga
+        with pytest.raises(DeadlineExceeded, match="janela"):
+            await limiter.call(lambda: asyncio.sleep(0), tokens=500)
+
+    asyncio.run(scenario())
+    assert limiter.requests.stats()["available"] == pytest.approx(60, abs=0.5)
+    assert limiter.tokens.stats()["available"] == pytest.approx(6000, abs=1)
+
+
+def test_google_client_retries_throttled_calls(settings_env):
+    with FakeGeminiServer(throttle=2, retry_after=0) as server:
+        settings_env(GEMINI_API_KEY="test-key", GEMINI_BASE_URL=server.base_url, LLM_RETRY_BASE_SECONDS=0.01)
+        rate_limiter.get_rate_limiter.cache_clear()
+
+        async def scenario():
+            client = GoogleClient()
+            try:
+                return await client.classify("Preciso da segunda via do boleto")
+            finally:
+                await client.aclose()
+
+        result = asyncio.run(scenario())
+        stats = rate_limiter.get_rate_limiter("google").stats()
+    rate_limiter.get_rate_limiter.cache_clear()
+    assert result["category"] == "Produtivo"
+    assert server.requests == 3
+    assert stats["throttled"] == 2 and stats["retries"] == 2
+
+
+@pytest.mark.parametrize("client_class", [OpenAIClient, AnthropicClient, OllamaClient])
+def test_http_clients_retry_throttled_calls(settings_env, client_class):
+    with FakeGeminiServer(throttle=2, retry_after=0) as server:
+        settings_env(OPENAI_API_KEY="k", OPENAI_BASE_URL=server.base_url, ANTHROPIC_API_KEY="k",
+                     ANTHROPIC_BASE_URL=server.base_url, OLLAMA_BASE_URL=server.base_url,
+                     LLM_RETRY_BASE_SECONDS=0.01)
+        rate_limiter.get_rate_limiter.cache_clear()
+
+        async def scenario():
+            client = client_class()
+            try:
+                return await client.classify("Preciso da segunda via do boleto")
+            finally:
+                await client.aclose()
+
+        result = asyncio.run(scenario())
+        stats = rate_limiter.get_rate_limiter(client_class.provider).stats()
+    rate_limiter.get_rate_limiter.cache_clear()
+    assert result["category"] == "Produtivo"
+    assert server.requests == 3
+    assert stats["throttled"] == 2 and stats["retries"] == 2 and stats["calls"] == 3
+
+
+def test_each_provider_has_its_own_limiter(settings_env):
+    settings_env(LLM_RPM=1000, LLM_RPM_BY_PROVIDER="openai=60", LLM_TPM_BY_PROVIDER="openai=6000,ollama=0")
+    rate_limiter.get_rate_limiter.cache_clear()
+    google, openai = rate_limiter.get_rate_limiter("google"), rate_limiter.get_rate_limiter("openai")
+    assert rate_limiter.get_rate_limiter("google") is google and openai is not google
+    assert google.requests.capacity == 1000 and openai.requests.capacity == 60
+    assert openai.tokens.capacity == 6000 and not rate_limiter.get_rate_limiter("ollama").tokens.enabled
+
+    async def scenario():
+        # Um 429 do Gemini encolhe só a janela dele
+        await google.window.acquire()
+        google.window.release("throttled")
+
+    asyncio.run(scenario())
+    rate_limiter.get_rate_limiter.cache_clear()
+    assert google.window.limit < openai.window.limit
@@ -0,0 +1,132 @@
+import asyncio
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+from benchmarks.fake_gemini import FakeGeminiServer
+from email_classifier_llm.main import app
+from email_classifier_llm.services import llm_client, pipeline, rate_limiter
+from email_classifier_llm.services.llm_client import (
+    CLASSIFICATION_SCHEMA,
+    PARSE_FALLBACK,
+    GoogleClient,
+    LLMClient,
+    PromptClient,
+    parse_classification,
+)
+from email_classifier_llm.services.telemetry import PARSE_FAILURES
+
+
+class MarkdownClient(PromptClient):
+    provider = "markdown"
+
+    async def _generate(self, prompt, schema):
+        return '```json\n{"category": "Improdutivo", "reason": "Agradecimento", "suggested_reply": "Obrigado!"}\n```'
+
+
+def test_strict_parse_and_tolerant_fallback():
+    raw = '{"category": "Produtivo", "reason": "Pede boleto", "suggested_reply": "Segue."}'
+    assert parse_classification(raw).category == "Produtivo"
+    for invalid in ('Claro! ' + raw, '{"category": "Talvez", "reason": "", "suggested_reply": ""}',
+                    '{"category": "Produtivo"}', '[]'):
+        with pytest.raises(ValueError):
+            parse_classification(invalid)
+
+    # Fora do JSON mode (ex.: Anthropic) o objeto ainda é recuperado do meio do texto
+    result = asyncio.run(MarkdownClient(http_client=object()).classify("Obrigado pelo retorno"))
+    assert result["category"] == "Improdutivo"
+
+
+class OffSchemaMarkdownClient(PromptClient):
+    provider = "off-schema"
+
+    async def _generate(self, prompt, schema):
+        return 'Resultado: {"category": "Urgente", "reason": "x", "suggested_reply": "y"}'
+
+
+class OffSchemaStreamingClient(LLMClient):
+    provider = "off-schema-stream"
+
+    async def classify(self, text):
+        raise AssertionError("não deve ser chamado")
+
+    async def classify_stream(self, text):
+        yield '{"category": "Urgente", "reason": "Prazo", '
+        yield '"suggested_reply": "Já verificamos."}'
+
+
+def test_off_schema_categories_fall_back_everywhere(settings_env, monkeypatch):
+    settings_env(GEMINI_API_KEY="test-key", CLASSIFICATION_CACHE_ENABLED="false", JOBS_ENABLED="false")
+
+    # Objeto recuperado do texto passa pela mesma checagem
+    before = PARSE_FAILURES.value(provider="off-schema")
+    assert asyncio.run(OffSchemaMarkdownClient(http_client=object()).classify("x")) == PARSE_FALLBACK
+    assert PARSE_FAILURES.value(provider="off-schema") == before + 1
+
+    # Itens empacotados: o inválido não é aceito e a resposta conta como falha de parse
+    client = GoogleClient()
+    before = PARSE_FAILURES.value(provider="google")
+    parsed = client._parse_packed_response(json.dumps([
+        {"id": "0", "category": "Produtivo", "reason": "r0", "suggested_reply": "ok"},
+        {"id": "1", "category": "Talvez", "reason": "r1", "suggested_reply": "ok"},
+        {"id": "2", "category": "Improdutivo", "reason": None, "suggested_reply": "ok"},
+    ]), ["0", "1", "2"])
+    asyncio.run(client.aclose())
+    assert list(parsed) == ["0"]
+    assert PARSE_FAILURES.value(provider="google") == before + 1
+
+    # Stream: a categoria fora do enum não é anunciada e o resultado final é o fallback
+    monkeypatch.setattr(pipeline, "get_llm_client", lambda: OffSchemaStreamingClient())
+    before = PARSE_FAILURES.value(provider="off-schema-stream")
+    resp = TestClient(app).post("/api/classify/stream", data={"text": "prazo?", "no_cache": "true"})
+    events = [
+        (block.split("\n")[0].split(": ", 1)[1], json.loads(block.split("\n")[1].split(": ", 1)[1]))
+        for block in resp.text.strip().split("\n\n")
+    ]
+    assert [name for name, _ in events] == ["classification", "reply", "done"]
+    assert events[0][1]["category"] == PARSE_FALLBACK["category"]
+    assert events[1][1] == {"delta": PARSE_FALLBACK["suggested_reply"]}
+    assert {field: events[-1][1][field] for field in PARSE_FALLBACK} == PARSE_FALLBACK
+    assert PARSE_FAILURES.value(provider="off-schema-stream") == before + 1
+
+
+@pytest.mark.parametrize("json_mode", [True, False])
+def test_gemini_request_carries_response_schema(settings_env, json_mode):
+    with FakeGeminiServer() as server:
+        settings_env(GEMINI_API_KEY="test-key", GEMINI_BASE_URL=server.base_url, LLM_RATE_LIMIT_ENABLED="false",
+                     LLM_JSON_MODE=str(json_mode).lower())
+        rate_limiter.get_rate_limiter.cache_clear()
+
+        async def scenario():
+            client = llm_client.GoogleClient()
+            try:
+                return await client.classify("Preciso da segunda via do boleto")
+            finally:
+                await client.aclose()
+
+        result = asyncio.run(scenario())
+    rate_limiter.get_rate_limiter.cache_clear()
+
+    assert result["category"] == "Produtivo"
+    config = json.loads(server.last_body).get("generationConfig", {})
+    if json_mode:
+        assert config["responseMimeType"] == "application/json"
+        assert config["responseJsonSchema"] == CLASSIFICATION_SCHEMA
+    else:
+        assert "responseJsonSchema" not in config
+
+
+def test_endpoint_returns_serialized_bytes(settings_env):
+    with FakeGeminiServer() as server:
+        settings_env(GEMINI_API_KEY="test-key", GEMINI_BASE_URL=server.base_url, CLASSIFICATION_CACHE_ENABLED="false",
+                     LLM_RATE_LIMIT_ENABLED="false", JOBS_ENABLED="false", EXTRACTION_POOL="inline")
+        rate_limiter.get_rate_limiter.cache_clear()
+        with TestClient(app) as client:
+            single = client.post("/api/classify", data={"text": "Preciso do boleto"})
+            batch = client.post("/api/classify/batch", data={"texts": json.dumps(["Segue o extrato", "Obrigado!"])})
+    rate_limiter.get_rate_limiter.cache_clear()
+
+    assert single.headers["content-type"] == "application/json"
+    assert single.json()["category"] == "Produtivo" and "X-Tokens-Saved" in single.headers
+    assert batch.json()["count"] == 2 and batch.json()["failed"] == 0
@@ -0,0 +1,79 @@
+import logging
+
+from fastapi.testclient import TestClient
+
+from benchmarks.fake_gemini import FakeGeminiServer
+from email_classifier_llm.main import app
+from email_classifier_llm.services import llm_client, pipeline, rate_limiter
+from email_classifier_llm.services.llm_client import PromptClient
+from email_classifier_llm.services.telemetry import (
+    FALLBACK_RESPONSES,
+    LLM_TOKENS,
+    PARSE_FAILURES,
+    STAGE_SECONDS,
+    Counter,
+    Histogram,
+)
+
+
+def test_exposition_format():
+    histogram = Histogram("demo_seconds", "Demo.", ("stage",), buckets=(0.1, 1))
+    for value in (0.05, 0.1, 0.5, 3):
+        histogram.observe(value, stage="llm_call")
+    counter = Counter("demo_total", "Demo.", ("reason",))
+    counter.inc(reason='com "aspas"')
+    counter.inc(2)
+
+    lines = histogram.render() + counter.render()
+    assert 'demo_seconds_bucket{stage="llm_call",le="0.1"} 2' in lines
+    assert 'demo_seconds_bucket{stage="llm_call",le="1"} 3' in lines
+    assert 'demo_seconds_bucket{stage="llm_call",le="+Inf"} 4' in lines
+    assert 'demo_seconds_count{stage="llm_call"} 4' in lines
+    assert 'demo_total{reason="com \\"aspas\\""} 1' in lines
+    assert "demo_total 2" in lines
+
+
+def test_metrics_endpoint_covers_each_stage(settings_env):
+    with FakeGeminiServer() as server:
+        settings_env(GEMINI_API_KEY="test-key", GEMINI_BASE_URL=server.base_url, EXTRACTION_POOL="inline",
+                     CLASSIFICATION_CACHE_ENABLED="false", LLM_RATE_LIMIT_ENABLED="false", JOBS_ENABLED="false")
+        rate_limiter.get_rate_limiter.cache_clear()
+        calls_before = STAGE_SECONDS.count(stage="llm_call", outcome="ok", provider="google")
+        tokens_before = LLM_TOKENS.value(provider="google", direction="output")
+        with TestClient(app) as client:
+            resp = client.post("/api/classify", files={"file": ("email.txt", b"Preciso do boleto", "text/plain")})
+            assert resp.status_code == 200
+            body = client.get("/metrics").text
+    rate_limiter.get_rate_limiter.cache_clear()
+
+    assert STAGE_SECONDS.count(stage="llm_call", outcome="ok", provider="google") == calls_before + 1
+    assert LLM_TOKENS.value(provider="google", direction="output") > tokens_before
+    for labels in ('stage="upload",outcome="ok",file_type="txt"', 'stage="extract",outcome="ok",file_type="txt"',
+                   'stage="preprocess",outcome="ok"', 'stage="parse",outcome="ok",provider="google"'):
+        assert f"email_classifier_stage_duration_seconds_count{{{labels}}}" in body
+    assert 'email_classifier_classification_duration_seconds_count{source="llm",outcome="ok"}' in body
+
+
+class ProseClient(PromptClient):
+    provider = "prose"
+
+    async def _generate(self, prompt, schema):
+        return "Claro! A categoria é Produtivo."
+
+
+def test_parse_failures_and_fallbacks_are_counted(monkeypatch, settings_env, caplog):
+    settings_env(CLASSIFICATION_CACHE_ENABLED="false", LOG_SAMPLE_RATE=1)
+    monkeypatch.setattr(pipeline, "get_llm_client", lambda: ProseClient(http_client=object()))
+    parse_before = PARSE_FAILURES.value(provider="prose")
+    fallback_before = FALLBACK_RESPONSES.value(reason="parse")
+    empty_before = FALLBACK_RESPONSES.value(reason="empty")
+
+    client = TestClient(app)
+    with caplog.at_level(logging.INFO, logger=llm_client.__name__):
+        assert client.post("/api/classify", data={"text": "Segue o extrato"}).json() == llm_client.PARSE_FALLBACK
+    client.post("/api/classify", data={"text": "   "})
+
+    assert PARSE_FAILURES.value(provider="prose") == parse_before + 1
+    assert FALLBACK_RESPONSES.value(reason="parse") == fallback_before + 1
+    assert FALLBACK_RESPONSES.value(reason="empty") == empty_before + 1
+    assert any('"event": "llm_response"' in record.getMessage() for record in caplog.records)
@@ -0,0 +1,58 @@
+import time
+from pathlib import Path
+
+from email_classifier_llm.services.trimming import TRUNCATION_MARKER, strip_quoted_content, truncate_to_budget
+
+EMAILS = Path(__file__).parent / "data" / "emails"
+
+
+def test_reply_history_is_removed():
+    text = (EMAILS / "relatorio.txt").read_text(encoding="utf-8")
+    stripped = strip_quoted_content(text)
+    assert "rentabilidade zerada" in stripped
+    assert "escreveu" not in stripped
+    assert "segue em anexo" not in stripped
+
+
+def test_forward_header_and_disclaimer_are_removed():
+    text = (EMAILS / "encaminhado.txt").read_text(encoding="utf-8")
+    stripped = strip_quoted_content(text)
+    assert "senha inválida" in stripped
+    assert "Forwarded message" not in stripped
+    assert "carlos@cliente.com" not in stripped
+    assert "confidencial" not in stripped
+
+
+def test_signature_is_removed_but_never_everything():
+    assert strip_quoted_content("Preciso do boleto.\n--\nMaria\nTel 1234") == "Preciso do boleto."
+    assert strip_quoted_content("Preciso do boleto.\n-- \nMaria\nTel 1234") == "Preciso do boleto."
+    assert strip_quoted_content("> só citação") == "> só citação"
+
+
+def test_separator_in_the_middle_of_the_body_is_kept():
+    body = "Resumo do pedido:\n--\n" + "".join(f"Item {i}: resgate de CDB\n" for i in range(12))
+    assert strip_quoted_content(body + "__\nMaria\nTel 1234") == body.rstrip("\n")
+    # Assinatura antes do histórico citado: conta só até o fim da mensagem atual
+    reply = "Preciso do boleto.\n--\nMaria\nEm 1 de jan, João escreveu:\n" + "> linha\n" * 20
+    assert strip_quoted_content(reply) == "Preciso do boleto."
+
+
+def test_budget_keeps_head_and_tail():
+    text = "início " + "meio " * 5000 + "fim"
+    truncated = truncate_to_budget(text, max_tokens=100)
+    assert truncated.startswith("início")
+    assert truncated.endswith("fim")
+    assert TRUNCATION_MARKER in truncated
+    assert len(truncated) <= 400
+
+
+def test_stripping_is_linear_on_adversarial_input():
+    line = "On " + "x" * 200 + " wrot\n"
+    small, large = line * 500, line * 5000
+    start = time.perf_counter()
+    strip_quoted_content(small)
+    small_elapsed = time.perf_counter() - start
+    start = time.perf_counter()
+    strip_quoted_content(large)
+    large_elapsed = time.perf_counter() - start
+    assert large_elapsed < small_elapsed * 30
@@ -0,0 +1,142 @@
+import asyncio
+import io
+import os
+from tempfile import SpooledTemporaryFile
+
+import pytest
+from fastapi import FastAPI, File, Form, UploadFile as FormFile
+from fastapi.testclient import TestClient
+from starlette.datastructures import UploadFile
+
+from email_classifier_llm.middleware import BodySizeLimitMiddleware, MultipartPartCounter
+from email_classifier_llm.services.extraction_pool import ExtractionPool
+from email_classifier_llm.services.processor import extract_text_from_file
+from email_classifier_llm.services.uploads import UploadTooLarge, spool_upload
+
+
+class FakeUpload:
+    def __init__(self, data: bytes) -> None:
+        self._stream = io.BytesIO(data)
+
+    async def read(self, size: int = -1) -> bytes:
+        return self._stream.read(size)
+
+
+def test_large_upload_is_spooled_to_disk(settings_env):
+    settings_env(UPLOAD_SPOOL_THRESHOLD_BYTES=1024, UPLOAD_MAX_BYTES=1024 * 1024)
+    data = "Olá, segue o relatório.\n".encode("utf-8") * 1000
+
+    async def scenario():
+        async with await spool_upload(FakeUpload(data), filename="email.txt") as upload:
+            source = upload.source()
+            assert upload.size == len(data)
+            assert os.path.exists(source["path"])
+            return source["path"], extract_text_from_file(filename="email.txt", **source)
+
+    path, text = asyncio.run(scenario())
+    assert not os.path.exists(path)
+    assert text == data.decode("utf-8").strip()
+
+
+def test_upload_limit_is_enforced_while_reading(settings_env):
+    settings_env(UPLOAD_SPOOL_THRESHOLD_BYTES=1024, UPLOAD_MAX_BYTES=100 * 1024)
+
+    with pytest.raises(UploadTooLarge):
+        asyncio.run(spool_upload(FakeUpload(b"x" * (200 * 1024)), filename="email.txt"))
+
+
+def _starlette_upload(data: bytes, *, max_size: int, size: int | None = None) -> UploadFile:
+    buffered = SpooledTemporaryFile(max_size=max_size)
+    buffered.write(data)
+    buffered.seek(0)
+    return UploadFile(buffered, size=len(data) if size is None else size, filename="email.txt")
+
+
+@pytest.mark.parametrize("starlette_spool", [1024 * 1024, 1024], ids=["starlette-memory", "starlette-disk"])
+@pytest.mark.parametrize("kind", ["thread", "inline"])
+def test_starlette_upload_is_read_in_place(settings_env, monkeypatch, tmp_path, starlette_spool, kind):
+    settings_env(UPLOAD_SPOOL_THRESHOLD_BYTES=1024, UPLOAD_MAX_BYTES=1024 * 1024)
+    data = "Olá, segue o relatório.\n".encode("utf-8") * 1000
+    pool = ExtractionPool(kind=kind, max_workers=1, timeout_seconds=5, max_pages=None, max_bytes=len(data))
+
+    async def no_chunked_read(self, size=-1):
+        raise AssertionError("upload já bufferizado não deve ser relido em blocos")
+
+    monkeypatch.setattr(UploadFile, "read", no_chunked_read)
+
+    async def scenario():
+        large = _starlette_upload(data, max_size=starlette_spool)
+        async with await spool_upload(large, filename="email.txt", spool_dir=str(tmp_path)) as upload:
+            assert upload.size == len(data)
+            assert upload.source() == {"fileobj": large.file}
+            text = await pool.extract(filename="email.txt", **upload.source())
+        assert not large.file.closed  # quem fecha é o Starlette
+        return text
+
+    try:
+        assert asyncio.run(scenario()) == data.decode("utf-8").strip()
+    finally:
+        pool.shutdown()
+    assert list(tmp_path.iterdir()) == []  # nenhuma cópia em disco
+
+
+def test_persisted_starlette_upload_is_copied_once(settings_env, tmp_path):
+    settings_env(UPLOAD_SPOOL_THRESHOLD_BYTES=1024 * 1024, UPLOAD_MAX_BYTES=1024 * 1024)
+
+    async def scenario():
+        upload = await spool_upload(_starlette_upload(b"oi", max_size=1024), filename="email.txt", persist=True, spool_dir=str(tmp_path))
+        async with upload:
+            return upload.keep()
+
+    path = asyncio.run(scenario())
+    with open(path, "rb") as fh:
+        assert fh.read() == b"oi"
+
+
+def test_starlette_upload_over_limit_is_rejected_by_size(settings_env, tmp_path):
+    settings_env(UPLOAD_SPOOL_THRESHOLD_BYTES=1024, UPLOAD_MAX_BYTES=100 * 1024)
+    oversized = _starlette_upload(b"x", max_size=1024, size=200 * 1024)
+
+    with pytest.raises(UploadTooLarge):
+        asyncio.run(spool_upload(oversized, filename="email.txt", spool_dir=str(tmp_path)))
+    assert oversized.file.tell() == 0  # nada foi lido
+    assert list(tmp_path.iterdir()) == []
+
+
+def _limited_app(max_part_bytes: int) -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(BodySizeLimitMiddleware, max_bytes=10 * 1024 * 1024, max_part_bytes=max_part_bytes)
+
+    @app.post("/upload")
+    async def upload(file: FormFile = File(...), text: str = Form("")):
+        return {"size": file.size, "text": text}
+
+    return app
+
+
+def test_oversized_file_part_is_rejected_while_streaming():
+    client = TestClient(_limited_app(max_part_bytes=100 * 1024))
+
+    ok = client.post("/upload", files={"file": ("email.txt", b"x" * (100 * 1024))}, data={"text": "oi"})
+    assert ok.status_code == 200 and ok.json() == {"size": 100 * 1024, "text": "oi"}
+
+    response = client.post("/upload", files={"file": ("email.txt", b"x" * (200 * 1024))})
+    assert response.status_code == 413
+    assert "102400 bytes" in response.json()["detail"]
+
+
+def test_part_counter_finds_delimiters_split_across_chunks():
+    body = (
+        b"--abc\r\nContent-Disposition: form-data; name=\"a\"\r\n\r\n" + b"x" * 50
+        + b"\r\n--abc\r\nContent-Disposition: form-data; name=\"b\"\r\n\r\n" + b"y" * 10
+        + b"\r\n--abc--\r\n"
+    )
+    whole = MultipartPartCounter(b"abc")
+    expected = whole.feed(body)
+    for size in (1, 3, 7):
+        counter = MultipartPartCounter(b"abc")
+        largest = 0
+        for start in range(0, len(body), size):
+            largest = counter.feed(body[start:start + size])
+        assert largest == expected
+    assert 50 < expected < 100  # a maior parte é a de "a" (cabeçalhos + 50 bytes), não o corpo todo
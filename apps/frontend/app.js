@@ -77,6 +77,35 @@
     `;
   }
 
+  // Lê um corpo text/event-stream e chama onEvent(evento, dados) por mensagem
+  async function readEventStream(resp, onEvent) {
+    const reader = resp.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+
+    const dispatch = (block) => {
+      let event = 'message';
+      const dataLines = [];
+      for (const line of block.split('\n')) {
+        if (line.startsWith('event:')) event = line.slice(6).trim();
+        else if (line.startsWith('data:')) dataLines.push(line.slice(5).trimStart());
+      }
+      if (dataLines.length) onEvent(event, JSON.parse(dataLines.join('\n')));
+    };
+
+    while (true) {
+      const { value, done } = await reader.read();
+      if (done) break;
+      buffer += decoder.decode(value, { stream: true });
+      let sep;
+      while ((sep = buffer.indexOf('\n\n')) !== -1) {
+        dispatch(buffer.slice(0, sep));
+        buffer = buffer.slice(sep + 2);
+      }
+    }
+    if (buffer.trim()) dispatch(buffer);
+  }
+
   form.addEventListener('submit', async (ev) => {
     ev.preventDefault();
     setLoading(true);
@@ -102,7 +131,7 @@
       if (textVal) data.append('text', textVal);
       if (file) data.append('file', file);
 
-      const resp = await fetch(`${window.BACKEND_BASE}/api/classify`, {
+      const resp = await fetch(`${window.BACKEND_BASE}/api/classify/stream`, {
         method: 'POST',
         body: data,
       });
@@ -112,14 +141,33 @@
         throw new Error(`Falha na classificação: ${resp.status} ${msg}`);
       }
 
-      const payload = await resp.json();
-      resCategory.textContent = payload.category || '—';
-      resReason.textContent = payload.reason || '—';
-      resReply.textContent = payload.suggested_reply || '—';
+      resCategory.textContent = '…';
+      resReason.textContent = '…';
+      resReply.textContent = '';
+      clientResponseTextarea.value = '';
       resultSection.classList.remove('d-none');
-      
-      // Sincronizar resposta com a área editável dos clientes
-      clientResponseTextarea.value = payload.suggested_reply || '';
+
+      // Renderiza os eventos SSE conforme chegam
+      await readEventStream(resp, (event, payload) => {
+        if (event === 'classification') {
+          resCategory.textContent = payload.category || '—';
+          resReason.textContent = payload.reason || '—';
+        } else if (event === 'reply') {
+          resReply.textContent += payload.delta;
+          clientResponseTextarea.value += payload.delta;
+        } else if (event === 'done' || event === 'error') {
+          resCategory.textContent = payload.category || '—';
+          resReason.textContent = payload.reason || '—';
+          resReply.textContent = payload.suggested_reply || '—';
+          // Sincronizar resposta com a área editável dos clientes
+          clientResponseTextarea.value = payload.suggested_reply || '';
+          // Clientes identificados no email (CPF, número ou email)
+          if (payload.clients && payload.clients.length > 0) {
+            clientResultsContent.innerHTML = payload.clients.map(formatClientData).join('');
+            clientResultsSection.classList.remove('d-none');
+          }
+        }
+      });
     } catch (err) {
       console.error(err);
       alert(err.message || 'Erro inesperado');